@@ -0,0 +1,32 @@
+"""
+AI Server 核心模块
+
+子模块均采用懒加载，仅在首次访问时才导入：
+- asr:   语音识别 (FunASR)
+- audio: 音频编解码 (Opus)
+- llm:   大语言模型 (ChatGLM)
+- tts:   语音合成 (EdgeTTS)
+- pipeline: 流式语音对话流水线
+- server: 设备接入服务
+
+各子模块共用的协作式取消令牌定义在 ai_core.cancel (由 pipeline 重新导出)
+"""
+
+import importlib
+
+_SUBMODULES = ('asr', 'audio', 'llm', 'tts', 'pipeline', 'server')
+
+__all__ = list(_SUBMODULES)
+
+
+def __getattr__(name):
+    """按需导入子模块，避免启动时加载 torch 等重量级依赖"""
+    if name in _SUBMODULES:
+        module = importlib.import_module(f'.{name}', __name__)
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals().keys()) + __all__)
@@ -1,9 +1,31 @@
 """
 ASR (自动语音识别) 模块
 
-提供语音转文本功能
+提供语音转文本功能，以及多进程识别 AsrWorkerPool(上行PCM经共享内存缓冲池传递)
+
+注意：FunASR 依赖 torch，采用懒加载，仅在首次访问时导入
 """
 
-from .funasr_wrapper import FunASR
+import importlib
+
+# 导出名称 -> 所在子模块
+_LAZY_EXPORTS = {
+    'FunASR': '.funasr_wrapper',
+    'AsrWorkerPool': '.worker',         # 多进程ASR (共享内存传递PCM)
+}
+
+__all__ = list(_LAZY_EXPORTS)
+
+
+def __getattr__(name):
+    """按需导入导出对象"""
+    if name in _LAZY_EXPORTS:
+        module = importlib.import_module(_LAZY_EXPORTS[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
-__all__ = ['FunASR']
\ No newline at end of file
+def __dir__():
+    return sorted(list(globals().keys()) + __all__)
@@ -2,7 +2,6 @@
 
 from pathlib import Path
 from typing import Optional, Union
-import torch
 
 class FunASR:
     """FunASR 语音识别封装类"""
@@ -25,6 +24,9 @@ class FunASR:
         
     def _detect_best_device(self) -> str:
         """检测最佳计算设备"""
+        # torch 导入耗时较长，仅在需要检测设备时才加载
+        import torch
+        
         # 1. 优先NVIDIA GPU
         if torch.cuda.is_available():
             return "cuda"
@@ -95,13 +97,59 @@ class FunASR:
         except Exception:
             return None
     
-    def transcribe_audio_data(self, audio_data, sample_rate: int = 16000) -> Optional[str]:
-        """识别音频数据"""
+    @staticmethod
+    def _to_samples(audio_data, sample_rate: int):
+        """
+        将内存中的音频转换为模型输入
+        
+        bytes 按WAV(以 RIFF 开头)或16bit单声道裸PCM解析为 float32 数组，
+        memoryview(如共享内存缓冲池中的PCM)直接读取不做额外拷贝；
+        数组等其他类型原样返回
+        
+        Returns:
+            Tuple: (模型输入, 采样率)
+        """
+        if not isinstance(audio_data, (bytes, bytearray, memoryview)):
+            return audio_data, sample_rate
+        
+        import numpy as np
+        
+        data = audio_data if isinstance(audio_data, memoryview) else bytes(audio_data)
+        channels = 1
+        if data[:4] == b"RIFF":
+            import io
+            import wave
+            with wave.open(io.BytesIO(data)) as wav:
+                sample_rate = wav.getframerate()
+                channels = wav.getnchannels()
+                data = wav.readframes(wav.getnframes())
+        samples = np.frombuffer(data, dtype='<i2').astype(np.float32) / 32768.0
+        if channels > 1:
+            # 多声道取平均得到单声道
+            samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+        return samples, sample_rate
+    
+    def transcribe_audio_data(self, audio_data, sample_rate: int = 16000, cancel_token=None) -> Optional[str]:
+        """
+        识别内存中的音频数据，无需落盘
+        
+        Args:
+            audio_data: float32采样数组(如 UplinkProcessor.decode_to_array 的返回值)、
+                WAV字节数据，或16bit单声道裸PCM字节数据
+            sample_rate: 采样率(WAV数据以文件头为准)
+            cancel_token: CancelToken，排队期间或推理前已取消时直接返回None
+                (模型推理本身不可中断，最多浪费一次推理)
+        """
         try:
+            if cancel_token is not None and cancel_token.cancelled:
+                return None
             if not self.initialize_model():
                 return None
             
-            result = self.asr_model.generate(input=audio_data)
+            samples, sample_rate = self._to_samples(audio_data, sample_rate)
+            if cancel_token is not None and cancel_token.cancelled:
+                return None
+            result = self.asr_model.generate(input=samples, fs=sample_rate)
             return result[0]["text"] if result and len(result) > 0 else None
                 
         except Exception:
@@ -0,0 +1,330 @@
+"""多进程ASR - 每个工作进程一份FunASR模型，上行PCM经共享内存缓冲池按句柄传递"""
+
+import os
+import time
+import queue
+import struct
+import itertools
+import threading
+import multiprocessing
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Any, Dict, Optional, Tuple
+
+
+def _pcm_view(audio_data, sample_rate: int = 16000) -> Optional[Tuple[memoryview, int]]:
+    """
+    取出16bit单声道PCM数据的视图(不拷贝)
+
+    Args:
+        audio_data: WAV或裸PCM字节数据
+        sample_rate: 裸PCM的采样率(WAV以文件头为准)
+
+    Returns:
+        Optional[Tuple[memoryview, int]]: (PCM, 采样率)，不是16bit单声道WAV/裸PCM时返回None
+    """
+    if not isinstance(audio_data, (bytes, bytearray, memoryview)):
+        return None
+    data = memoryview(audio_data)
+    if data[:4] != b"RIFF":
+        return data, sample_rate
+    # 逐块查找 fmt / data，不依赖固定的44字节文件头
+    offset = 12
+    sample_rate = channels = bits = None
+    while offset + 8 <= len(data):
+        chunk_id = bytes(data[offset:offset + 4])
+        size = struct.unpack_from('<I', data, offset + 4)[0]
+        body = offset + 8
+        if chunk_id == b'fmt ':
+            _, channels, sample_rate, _, _, bits = struct.unpack_from('<HHIIHH', data, body)
+        elif chunk_id == b'data':
+            if channels != 1 or bits != 16:
+                return None
+            return data[body:body + size], sample_rate
+        offset = body + size + (size & 1)
+    return None
+
+
+def _worker_main(index: int, descriptor: Dict[str, Any], tasks, results,
+                 model: Optional[str], device: Optional[str]):
+    """工作进程：加载模型后循环处理识别任务，取到任务时先报告，进程异常退出时主进程据此处理其任务"""
+    from ..audio.shm import PcmBufferPool, PcmHandle
+    from .funasr_wrapper import FunASR
+
+    pool = PcmBufferPool.attach(descriptor)
+    asr = FunASR(model=model, device=device)
+    asr.initialize_model()
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            task_id, payload, sample_rate = task
+            results.put(("taken", task_id, index, None))
+            try:
+                if isinstance(payload, PcmHandle):
+                    try:
+                        # 直接读取共享内存，用完即释放槽位
+                        pcm = pool.view(payload)
+                        try:
+                            text = asr.transcribe_audio_data(pcm, payload.sample_rate)
+                        finally:
+                            pcm.release()
+                    finally:
+                        pool.release(payload)
+                elif isinstance(payload, str):
+                    text = asr.transcribe_file(payload)
+                else:
+                    text = asr.transcribe_audio_data(payload, sample_rate)
+                results.put(("done", task_id, index, text))
+            except Exception as e:
+                results.put(("error", task_id, index, str(e)))
+    finally:
+        pool.close()
+
+
+class AsrWorkerPool:
+    """
+    多进程ASR
+
+    解码与识别分属不同进程时，通过队列直接传递PCM至少要序列化、反序列化各拷贝一次；
+    这里音频只写入一次共享内存缓冲池，队列中只传递 PcmHandle。
+    接口与 FunASR 相同(transcribe_audio_data / transcribe_file)，可直接作为 VoicePipeline 的 asr
+    缓冲池槽位用尽或单句超过槽位容量时退回到经队列传递音频数据。
+    工作进程异常退出(如内存不足)时，其正在处理的任务以失败结束并释放所持句柄，随后重新拉起该进程
+    """
+
+    def __init__(self,
+                 processes: Optional[int] = None,
+                 pool: Any = None,
+                 model: Optional[str] = None,
+                 device: Optional[str] = None,
+                 timeout: Optional[float] = None):
+        """
+        启动工作进程
+
+        Args:
+            processes: 工作进程数 (ASR_WORKERS，默认2)
+            pool: PcmBufferPool，默认按 PCM_POOL_* 环境变量创建
+            model: 模型路径，默认使用 FunASR 内置路径
+            device: 计算设备，默认由工作进程自动检测
+            timeout: 阻塞接口等待单次识别的最长秒数 (ASR_WORKER_TIMEOUT，默认30)
+        """
+        from ..audio.shm import PcmBufferPool
+
+        # 工作进程会加载 torch，使用 spawn 避免 fork 继承父进程的线程与锁状态
+        context = multiprocessing.get_context("spawn")
+        self._context = context
+        self.processes = processes or int(os.getenv('ASR_WORKERS', '2'))
+        self.timeout = timeout or float(os.getenv('ASR_WORKER_TIMEOUT', '30'))
+        self._model = model
+        self._device = device
+        self._owns_pool = pool is None
+        self.pool = pool if pool is not None else PcmBufferPool(lock=context.Lock())
+        self._tasks = context.Queue()
+        self._results = context.Queue()
+        self._ids = itertools.count()
+        # 任务ID -> (Future, 提交的数据)；任务ID -> 正在处理的工作进程序号
+        self._pending: Dict[int, Tuple[Future, Any]] = {}
+        self._taken: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._closing = False
+        self.stats = {"submitted": 0, "shared": 0, "inline": 0, "failed": 0,
+                      "timeouts": 0, "worker_crashes": 0}
+
+        # 每个工作进程的启动时间与重启退避(启动后很快退出时逐次加倍，避免反复拉起无法加载模型的进程)
+        self._started_at = [0.0] * self.processes
+        self._respawn_at = [0.0] * self.processes
+        self._backoff = [0.5] * self.processes
+        self._workers = [self._spawn(index) for index in range(self.processes)]
+        self._collector = threading.Thread(target=self._collect, name="asr-results", daemon=True)
+        self._collector.start()
+        print(f"🧵 ASR工作进程: {self.processes} 个，共享内存缓冲池 {self.pool.slots} × {self.pool.slot_bytes} 字节")
+
+    def _spawn(self, index: int):
+        worker = self._context.Process(
+            target=_worker_main, name=f"asr-worker-{index}", daemon=True,
+            args=(index, self.pool.descriptor(), self._tasks, self._results, self._model, self._device))
+        worker.start()
+        self._started_at[index] = time.monotonic()
+        return worker
+
+    def _collect(self):
+        checked_at = time.monotonic()
+        while True:
+            if time.monotonic() - checked_at >= 0.5:
+                self._check_workers()
+                checked_at = time.monotonic()
+            try:
+                item = self._results.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if item is None:
+                break
+            kind, task_id, index, value = item
+            if kind == "taken":
+                with self._lock:
+                    if task_id in self._pending:
+                        self._taken[task_id] = index
+                continue
+            with self._lock:
+                self._taken.pop(task_id, None)
+                pending = self._pending.pop(task_id, None)
+            if pending is None:
+                continue
+            future = pending[0]
+            if kind == "error":
+                self.stats["failed"] += 1
+                future.set_exception(RuntimeError(value))
+            else:
+                future.set_result(value)
+
+    def _check_workers(self):
+        """处理异常退出的工作进程：其任务以失败结束并释放句柄，重新拉起进程处理队列中的其余任务"""
+        from ..audio.shm import PcmHandle
+
+        if self._closing:
+            return
+        now = time.monotonic()
+        for index, worker in enumerate(self._workers):
+            if worker.is_alive():
+                continue
+            if self._respawn_at[index]:
+                # 已处理过该次退出，等待退避结束后重启
+                if now >= self._respawn_at[index]:
+                    self._respawn_at[index] = 0.0
+                    self._workers[index] = self._spawn(index)
+                continue
+            self.stats["worker_crashes"] += 1
+            if now - self._started_at[index] < 60:
+                self._backoff[index] = min(60.0, self._backoff[index] * 2)
+            else:
+                self._backoff[index] = 0.5
+            print(f"⚠️ ASR工作进程 {worker.name} 异常退出 (exitcode={worker.exitcode})，"
+                  f"{self._backoff[index]:.0f} 秒后重新启动")
+            with self._lock:
+                lost = [task_id for task_id, owner in self._taken.items() if owner == index]
+                orphans = [self._pending.pop(task_id) for task_id in lost if task_id in self._pending]
+                for task_id in lost:
+                    del self._taken[task_id]
+            for future, payload in orphans:
+                if isinstance(payload, PcmHandle):
+                    try:
+                        self.pool.release(payload)
+                    except ValueError:
+                        # 进程退出前已释放
+                        pass
+                self.stats["failed"] += 1
+                future.set_exception(RuntimeError(f"ASR工作进程异常退出 (exitcode={worker.exitcode})"))
+            self._respawn_at[index] = now + self._backoff[index]
+
+    def submit(self, audio_data, sample_rate: int = 16000) -> Future:
+        """
+        提交识别任务
+
+        Args:
+            audio_data: PcmHandle(由工作进程释放)、16bit单声道WAV/裸PCM字节数据、
+                float32采样数组或音频文件路径
+
+        Returns:
+            Future: 识别文本
+        """
+        from ..audio.shm import PcmHandle, PoolExhausted
+
+        payload = audio_data
+        if not isinstance(audio_data, (PcmHandle, str)):
+            view = _pcm_view(audio_data, sample_rate)
+            if view is not None:
+                try:
+                    payload = self.pool.put(view[0], view[1])
+                except PoolExhausted:
+                    pass
+                finally:
+                    view[0].release()
+        if isinstance(payload, PcmHandle):
+            self.stats["shared"] += 1
+        elif not isinstance(payload, str):
+            self.stats["inline"] += 1
+
+        future: Future = Future()
+        task_id = next(self._ids)
+        with self._lock:
+            self._pending[task_id] = (future, payload)
+        self.stats["submitted"] += 1
+        self._tasks.put((task_id, payload, sample_rate))
+        return future
+
+    def _wait(self, future: Future, timeout: Optional[float]) -> Optional[str]:
+        try:
+            return future.result(timeout if timeout is not None else self.timeout)
+        except FutureTimeout:
+            # 不再等待结果；任务已交出的句柄仍由处理它的工作进程释放
+            with self._lock:
+                for task_id, (pending, _) in list(self._pending.items()):
+                    if pending is future:
+                        del self._pending[task_id]
+                        self._taken.pop(task_id, None)
+            self.stats["timeouts"] += 1
+            raise RuntimeError("等待ASR工作进程超时")
+
+    def transcribe_audio_data(self, audio_data, sample_rate: int = 16000, cancel_token=None,
+                              timeout: Optional[float] = None) -> Optional[str]:
+        """
+        识别内存中的音频数据(阻塞)，参数与 FunASR.transcribe_audio_data 相同
+
+        Args:
+            audio_data: PcmHandle、WAV/裸PCM字节数据或float32采样数组
+            sample_rate: 采样率(WAV数据与句柄以自身为准)
+            cancel_token: CancelToken，提交前已取消时直接返回None
+            timeout: 最长等待秒数，默认使用 self.timeout
+        """
+        from ..audio.shm import PcmHandle
+
+        if cancel_token is not None and cancel_token.cancelled:
+            # 调用方交出的句柄不再提交，引用在此释放
+            if isinstance(audio_data, PcmHandle):
+                self.pool.release(audio_data)
+            return None
+        try:
+            return self._wait(self.submit(audio_data, sample_rate), timeout)
+        except Exception as e:
+            print(f"⚠️ ASR工作进程识别失败: {e}")
+            return None
+
+    def transcribe_file(self, audio_file, timeout: Optional[float] = None) -> Optional[str]:
+        """识别音频文件(阻塞)"""
+        try:
+            return self._wait(self.submit(str(audio_file)), timeout)
+        except Exception as e:
+            print(f"⚠️ ASR工作进程识别失败: {e}")
+            return None
+
+    def close(self, timeout: float = 10.0):
+        """停止工作进程并释放共享内存"""
+        self._closing = True
+        for _ in self._workers:
+            self._tasks.put(None)
+        for worker in self._workers:
+            worker.join(timeout)
+            if worker.is_alive():
+                worker.terminate()
+        self._results.put(None)
+        self._collector.join(timeout)
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._taken.clear()
+        for future, _ in pending.values():
+            future.set_exception(RuntimeError("ASR工作进程已停止"))
+        if self._owns_pool:
+            self.pool.close()
+
+    def get_stats(self) -> Dict:
+        """获取统计"""
+        return {**self.stats, "workers": self.processes,
+                "alive": sum(1 for worker in self._workers if worker.is_alive()),
+                "pool": self.pool.get_stats()}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
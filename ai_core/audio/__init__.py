@@ -5,16 +5,51 @@ AI音频处理模块 - 设备通信音频编解码
 - DownlinkProcessor: TTS音频 → Opus编码 → 下位机传输
 - UplinkProcessor: 下位机Opus → 音频解码 → ASR处理
 
+以及流式编码器 StreamingOpusEncoder：TTS音频块边写入边输出Ogg/Opus页，
+流式解码器 StreamingOpusDecoder 与端点检测 Endpointer：上行语音边到达边解码并检测句尾，
+紧凑传输帧 OpusFrameEncoder / OpusFrameDecoder：长度前缀的裸Opus包，设备无需Ogg解析器
+
 音频规格：16kHz采样率，立体声，16bit位深
+
+注意：导出对象采用懒加载，仅在首次访问时导入
 """
 
-from .audio import (
-    DownlinkProcessor, UplinkProcessor, find_ffmpeg_path, get_ffmpeg_executable
-)
+import importlib
+
+# 导出名称 -> 所在子模块
+_LAZY_EXPORTS = {
+    'DownlinkProcessor': '.audio',      # 下行处理器 (TTS→Opus)
+    'UplinkProcessor': '.audio',        # 上行处理器 (Opus→ASR)
+    'find_ffmpeg_path': '.audio',       # FFmpeg路径检测工具
+    'get_ffmpeg_executable': '.audio',  # FFmpeg可执行文件获取
+    'StreamingOpusEncoder': '.streaming',  # 流式Opus编码 (管道输入输出)
+    'StreamingOpusDecoder': '.streaming',  # 流式Opus解码 (上行 → PCM)
+    'Endpointer': '.endpoint',          # 句尾检测 (尾部静音/中间结果)
+    'OggPage': '.ogg',                  # Ogg页
+    'OggPageReader': '.ogg',            # 增量Ogg页切分
+    'OggPageWriter': '.ogg',            # Ogg页封装
+    'OpusConfig': '.framing',           # 紧凑帧编解码参数
+    'OpusFrameEncoder': '.framing',     # Ogg/Opus → 紧凑帧
+    'OpusFrameDecoder': '.framing',     # 紧凑帧 → Opus包
+    'frames_to_ogg': '.framing',        # Opus包 → Ogg/Opus
+    'OggRemuxer': '.framing',           # 紧凑帧 → Ogg/Opus (增量)
+    'PcmBufferPool': '.shm',            # 共享内存PCM缓冲池 (跨进程零拷贝)
+    'PcmHandle': '.shm',                # 缓冲池中一句PCM的句柄
+    'PoolExhausted': '.shm',            # 缓冲池无空闲槽位
+}
+
+__all__ = list(_LAZY_EXPORTS)
+
+
+def __getattr__(name):
+    """按需导入导出对象"""
+    if name in _LAZY_EXPORTS:
+        module = importlib.import_module(_LAZY_EXPORTS[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
-__all__ = [
-    'DownlinkProcessor',     # 下行处理器 (TTS→Opus)
-    'UplinkProcessor',       # 上行处理器 (Opus→ASR)  
-    'find_ffmpeg_path',      # FFmpeg路径检测工具
-    'get_ffmpeg_executable'  # FFmpeg可执行文件获取
-]
\ No newline at end of file
+def __dir__():
+    return sorted(list(globals().keys()) + __all__)
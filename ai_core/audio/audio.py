@@ -16,12 +16,26 @@ import io
 import tempfile
 import subprocess
 import base64
-from typing import Optional, Dict, Any, Union
-from pydub import AudioSegment
-from dotenv import load_dotenv
+import struct
+from typing import Optional, Dict, Any, Union, TYPE_CHECKING
 
-# 自动加载 .env 文件，覆盖现有环境变量
-load_dotenv(override=True)
+if TYPE_CHECKING:
+    from pydub import AudioSegment
+
+# .env 文件是否已加载（首次读取配置时才加载，避免导入时的副作用）
+_env_loaded = False
+
+
+def _ensure_env_loaded() -> None:
+    """
+    首次读取配置时加载 .env 文件，覆盖现有环境变量
+    """
+    global _env_loaded
+    if _env_loaded:
+        return
+    from dotenv import load_dotenv
+    load_dotenv(override=True)
+    _env_loaded = True
 
 
 def _get_audio_config() -> Dict[str, int]:
@@ -31,6 +45,7 @@ def _get_audio_config() -> Dict[str, int]:
     Returns:
         Dict[str, int]: 包含采样率、声道数、位深的配置字典
     """
+    _ensure_env_loaded()
     return {
         'sample_rate': int(os.getenv('AUDIO_SAMPLE_RATE', '16000')),
         'channels': int(os.getenv('AUDIO_CHANNELS', '2')),
@@ -45,6 +60,7 @@ def _get_downlink_bitrates() -> Dict[str, str]:
     Returns:
         Dict[str, str]: 各预设的比特率配置
     """
+    _ensure_env_loaded()
     return {
         'ultra_low_latency': f"{os.getenv('DOWNLINK_ULTRA_LOW_LATENCY_BITRATE', '64')}k",
         'low_latency': f"{os.getenv('DOWNLINK_LOW_LATENCY_BITRATE', '96')}k",
@@ -60,6 +76,7 @@ def _get_downlink_frame_durations() -> Dict[str, str]:
     Returns:
         Dict[str, str]: 各预设的帧长配置(ms)
     """
+    _ensure_env_loaded()
     return {
         'ultra_low_latency': os.getenv('DOWNLINK_ULTRA_LOW_LATENCY_FRAME_DURATION', '2.5'),
         'low_latency': os.getenv('DOWNLINK_LOW_LATENCY_FRAME_DURATION', '5'),
@@ -80,6 +97,8 @@ def find_ffmpeg_path() -> Optional[str]:
     Returns:
         Optional[str]: FFmpeg安装路径，如果在系统PATH中则返回None
     """
+    _ensure_env_loaded()
+    
     # 1. 检查环境变量
     env_ffmpeg_path = os.environ.get('AI_SERVER_FFMPEG_PATH')
     if env_ffmpeg_path and os.path.exists(os.path.join(env_ffmpeg_path, "ffmpeg.exe")):
@@ -124,6 +143,48 @@ def get_ffmpeg_executable() -> str:
     return "ffmpeg"
 
 
+def run_ffmpeg_pipe(cmd: list, input_data: bytes) -> bytes:
+    """
+    通过标准输入输出管道运行FFmpeg，数据全程在内存中流转
+    
+    Args:
+        cmd: FFmpeg命令，输入为 pipe:0，输出为 pipe:1
+        input_data: 写入标准输入的数据
+        
+    Returns:
+        bytes: 标准输出的数据
+        
+    Raises:
+        RuntimeError: FFmpeg执行失败时抛出
+    """
+    result = subprocess.run(cmd, input=input_data, capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.decode("utf-8", "ignore").strip())
+    return result.stdout
+
+
+def build_wav_header(data_size: int, sample_rate: int, channels: int, bit_depth: int = 16) -> bytes:
+    """
+    生成PCM WAV文件头(44字节)
+    
+    管道输出无法回写文件头中的长度字段，因此解码为裸PCM后在内存中补上文件头
+    
+    Args:
+        data_size: PCM数据字节数
+        sample_rate: 采样率
+        channels: 声道数
+        bit_depth: 位深
+        
+    Returns:
+        bytes: WAV文件头
+    """
+    block_align = channels * bit_depth // 8
+    return struct.pack('<4sI4s4sIHHIIHH4sI',
+                       b'RIFF', 36 + data_size, b'WAVE',
+                       b'fmt ', 16, 1, channels, sample_rate, sample_rate * block_align, block_align, bit_depth,
+                       b'data', data_size)
+
+
 class DownlinkProcessor:
     """
     下行处理器 - TTS音频编码为Opus格式传输给下位机
@@ -229,9 +290,30 @@ class DownlinkProcessor:
             "frame_duration": self.frame_duration
         }
     
+    def _build_opus_command(self, input_path: str, output_path: str,
+                            input_format: Optional[str] = None, output_format: Optional[str] = None) -> list:
+        """生成Opus编码的FFmpeg命令，输入输出可以是文件或管道(pipe:0 / pipe:1)"""
+        cmd = [self.ffmpeg_cmd, "-hide_banner", "-loglevel", "error"]
+        if input_format:
+            cmd += ["-f", input_format]
+        cmd += [
+            "-i", input_path,
+            "-c:a", "libopus",
+            "-b:a", self.bitrate,
+            "-frame_duration", self.frame_duration,  # Opus帧长设置
+            "-ar", str(self.sample_rate),
+            "-ac", str(self.channels),
+            "-sample_fmt", "s16",  # 16bit采样格式
+            "-application", "voip",
+        ]
+        if output_format:
+            cmd += ["-f", output_format]
+        cmd += ["-y", output_path]
+        return cmd
+    
     def _process_audio_to_opus(self, input_path: str, output_path: Optional[str] = None) -> str:
         """
-        内部方法：使用FFmpeg将音频转换为Opus格式
+        内部方法：使用FFmpeg将音频文件转换为Opus文件
         
         Args:
             input_path (str): 输入音频文件路径
@@ -246,75 +328,87 @@ class DownlinkProcessor:
         if output_path is None:
             output_path = tempfile.mktemp(suffix='.opus')
         
-        cmd = [
-            self.ffmpeg_cmd,
-            "-i", input_path,
-            "-c:a", "libopus",
-            "-b:a", self.bitrate,
-            "-frame_duration", self.frame_duration,  # Opus帧长设置
-            "-ar", str(self.sample_rate),
-            "-ac", str(self.channels),
-            "-sample_fmt", "s16",  # 16bit采样格式
-            "-application", "voip",
-            "-y",
-            output_path
-        ]
-        
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+            subprocess.run(self._build_opus_command(input_path, output_path),
+                           capture_output=True, text=True, check=True)
             return output_path
         except subprocess.CalledProcessError as e:
             raise RuntimeError(f"Opus编码失败: {e.stderr}")
     
-    def process_to_bytes(self, input_path: str) -> bytes:
+    def encode_bytes(self, audio_data: bytes, input_format: Optional[str] = None) -> bytes:
+        """
+        在内存中将音频数据编码为Opus(Ogg封装)，不产生任何临时文件
+        
+        Args:
+            audio_data: 输入音频数据(MP3/WAV等)
+            input_format: 输入格式，如 "mp3"，None时由FFmpeg自动识别
+            
+        Returns:
+            bytes: Opus编码的字节数据
+            
+        Raises:
+            RuntimeError: FFmpeg执行失败时抛出
+        """
+        cmd = self._build_opus_command("pipe:0", "pipe:1", input_format, "ogg")
+        try:
+            return run_ffmpeg_pipe(cmd, audio_data)
+        except RuntimeError as e:
+            raise RuntimeError(f"Opus编码失败: {e}")
+    
+    def process_to_bytes(self, input_audio: Union[str, bytes]) -> bytes:
         """
-        处理音频文件并返回Opus字节数据
+        处理音频并返回Opus字节数据
         
         Args:
-            input_path: 输入音频文件路径
+            input_audio: 输入音频文件路径，或内存中的音频数据
             
         Returns:
             bytes: Opus编码的字节数据
         """
-        print(f"📁 TTS文件: {input_path}")
+        if isinstance(input_audio, (bytes, bytearray)):
+            print(f"📁 TTS音频: {len(input_audio):,} bytes (内存)")
+            opus_data = self.encode_bytes(bytes(input_audio))
+            print(f"📤 Opus输出: {len(opus_data):,} bytes")
+            return opus_data
+        
+        from pydub import AudioSegment
+        
+        print(f"📁 TTS文件: {input_audio}")
         
         # 加载音频并获取信息
-        audio = AudioSegment.from_file(input_path)
+        audio = AudioSegment.from_file(input_audio)
         duration = len(audio) / 1000.0
         print(f"   原始音频: {audio.frame_rate}Hz, {audio.channels}ch, {duration:.1f}s")
         
-        # 转换为Opus
-        with tempfile.NamedTemporaryFile(suffix='.opus', delete=False) as temp_file:
-            temp_path = temp_file.name
-        
+        # 文件输入，编码结果直接从管道读取
+        cmd = self._build_opus_command(input_audio, "pipe:1", output_format="ogg")
         try:
-            self._process_audio_to_opus(input_path, temp_path)
-            
-            with open(temp_path, 'rb') as f:
-                opus_data = f.read()
-            
-            print(f"📤 Opus输出: {len(opus_data):,} bytes")
-            return opus_data
-            
-        finally:
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
+            opus_data = run_ffmpeg_pipe(cmd, b"")
+        except RuntimeError as e:
+            raise RuntimeError(f"Opus编码失败: {e}")
+        
+        print(f"📤 Opus输出: {len(opus_data):,} bytes")
+        return opus_data
     
-    def process_to_file(self, input_path: str, output_path: str) -> str:
+    def process_to_file(self, input_audio: Union[str, bytes], output_path: str) -> str:
         """
-        处理音频文件并保存为Opus文件
+        处理音频并保存为Opus文件
         
         Args:
-            input_path: 输入音频文件路径
+            input_audio: 输入音频文件路径，或内存中的音频数据
             output_path: 输出Opus文件路径
             
         Returns:
             str: 输出文件路径
         """
-        print(f"📁 TTS文件: {input_path}")
         print(f"📁 输出文件: {output_path}")
         
-        self._process_audio_to_opus(input_path, output_path)
+        if isinstance(input_audio, (bytes, bytearray)):
+            with open(output_path, 'wb') as f:
+                f.write(self.encode_bytes(bytes(input_audio)))
+        else:
+            print(f"📁 TTS文件: {input_audio}")
+            self._process_audio_to_opus(input_audio, output_path)
         
         # 获取文件大小
         file_size = os.path.getsize(output_path)
@@ -322,31 +416,53 @@ class DownlinkProcessor:
         
         return output_path
     
-    def process_to_base64(self, input_path: str) -> str:
+    def process_to_frames(self, input_audio: Union[str, bytes]) -> bytes:
+        """
+        处理音频并返回紧凑传输帧(CONFIG + 长度前缀的裸Opus包 + END)
+        
+        与Ogg封装相比每包省去页头开销，也无需Base64，设备按帧头读出包即可解码
+        
+        Args:
+            input_audio: 输入音频文件路径，或内存中的音频数据
+            
+        Returns:
+            bytes: 紧凑帧数据，格式见 ai_core.audio.framing
+        """
+        from .framing import OpusFrameEncoder
+        
+        ogg_data = self.process_to_bytes(input_audio)
+        encoder = OpusFrameEncoder(float(self.frame_duration))
+        frames = encoder.feed(ogg_data) + encoder.finish()
+        print(f"📦 紧凑帧输出: {len(frames):,} bytes ({encoder.sequence} 包)")
+        return frames
+    
+    def process_to_base64(self, input_audio: Union[str, bytes]) -> str:
         """
-        处理音频文件并返回Base64编码的Opus数据
+        处理音频并返回Base64编码的Opus数据
         
         Args:
-            input_path: 输入音频文件路径
+            input_audio: 输入音频文件路径，或内存中的音频数据
             
         Returns:
             str: Base64编码的Opus数据
         """
-        opus_bytes = self.process_to_bytes(input_path)
+        opus_bytes = self.process_to_bytes(input_audio)
         b64_data = base64.b64encode(opus_bytes).decode('utf-8')
         print(f"📤 Base64输出: {len(b64_data):,} 字符")
         return b64_data
     
-    def process_audio(self, input_path: str, output_format: str = "bytes") -> Union[bytes, str]:
+    def process_audio(self, input_audio: Union[str, bytes], output_format: str = "bytes") -> Union[bytes, str]:
         """
-        处理音频文件为Opus格式 - 主要接口方法
+        处理音频为Opus格式 - 主要接口方法
         
         Args:
-            input_path (str): 输入音频文件路径(支持MP3/WAV/FLAC等格式)
+            input_audio (Union[str, bytes]): 输入音频文件路径(支持MP3/WAV/FLAC等格式)，
+                或内存中的音频数据(如 EdgeTTS.synthesize 的返回值)，后者全程不落盘
             output_format (str): 输出格式选择
                 - "bytes": 返回Opus字节数据(默认)
                 - "base64": 返回Base64编码字符串  
                 - "file": 保存文件并返回文件路径
+                - "frames": 返回紧凑传输帧(裸Opus包，见 ai_core.audio.framing)
         
         Returns:
             Union[bytes, str]: 根据output_format返回相应格式的数据
@@ -356,15 +472,20 @@ class DownlinkProcessor:
             RuntimeError: Opus编码失败时抛出
         """
         if output_format == "bytes":
-            return self.process_to_bytes(input_path)
+            return self.process_to_bytes(input_audio)
         elif output_format == "base64":
-            return self.process_to_base64(input_path)
+            return self.process_to_base64(input_audio)
+        elif output_format == "frames":
+            return self.process_to_frames(input_audio)
         elif output_format == "file":
             # 自动生成输出文件名
-            base_name = os.path.splitext(os.path.basename(input_path))[0]
+            if isinstance(input_audio, (bytes, bytearray)):
+                base_name = "memory"
+            else:
+                base_name = os.path.splitext(os.path.basename(input_audio))[0]
             output_path = f"outputs/downlink_{self.preset}_{base_name}.opus"
             os.makedirs(os.path.dirname(output_path), exist_ok=True)
-            return self.process_to_file(input_path, output_path)
+            return self.process_to_file(input_audio, output_path)
         else:
             raise ValueError(f"不支持的输出格式: {output_format}")
 
@@ -463,6 +584,19 @@ class UplinkProcessor:
             "bit_depth": self.bit_depth
         }
     
+    def _build_decode_command(self, output_path: str, output_format: str, channels: Optional[int] = None) -> list:
+        """生成Opus解码的FFmpeg命令，输入固定为标准输入管道"""
+        return [
+            self.ffmpeg_cmd, "-hide_banner", "-loglevel", "error",
+            "-i", "pipe:0",
+            "-ar", str(self.sample_rate),
+            "-ac", str(channels or self.channels),
+            "-acodec", "pcm_s16le",  # 16bit PCM编码器
+            "-f", output_format,
+            "-y",
+            output_path
+        ]
+    
     def _decode_opus_to_audio(self, opus_data: bytes, output_path: Optional[str] = None) -> str:
         """
         内部方法：使用FFmpeg将Opus数据解码为音频文件
@@ -480,31 +614,63 @@ class UplinkProcessor:
         if output_path is None:
             output_path = tempfile.mktemp(suffix=f'.{self.format}')
         
-        # 先保存Opus数据到临时文件
-        with tempfile.NamedTemporaryFile(suffix='.opus', delete=False) as temp_opus:
-            temp_opus.write(opus_data)
-            temp_opus_path = temp_opus.name
+        try:
+            # Opus数据经标准输入传给FFmpeg，无需先写临时文件
+            run_ffmpeg_pipe(self._build_decode_command(output_path, self.format), opus_data)
+            return output_path
+        except RuntimeError as e:
+            raise RuntimeError(f"Opus解码失败: {e}")
+    
+    def decode_to_pcm(self, opus_data: bytes, channels: Optional[int] = None) -> bytes:
+        """
+        在内存中解码Opus数据为16bit裸PCM
         
+        Args:
+            opus_data: Opus字节数据
+            channels: 输出声道数，None时使用预设配置
+            
+        Returns:
+            bytes: 小端16bit PCM数据
+        """
         try:
-            cmd = [
-                self.ffmpeg_cmd,
-                "-i", temp_opus_path,
-                "-ar", str(self.sample_rate),
-                "-ac", str(self.channels),
-                "-acodec", "pcm_s16le",  # 16bit PCM编码器
-                "-f", self.format,
-                "-y",
-                output_path
-            ]
+            return run_ffmpeg_pipe(self._build_decode_command("pipe:1", "s16le", channels), opus_data)
+        except RuntimeError as e:
+            raise RuntimeError(f"Opus解码失败: {e}")
+    
+    def decode_to_array(self, opus_data: bytes):
+        """
+        在内存中解码Opus数据为ASR可直接使用的单声道采样数组
+        
+        Args:
+            opus_data: Opus字节数据
             
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            return output_path
+        Returns:
+            numpy.ndarray: float32 单声道采样，取值范围[-1, 1]，采样率为 self.sample_rate
+        """
+        import numpy as np
+        
+        pcm = self.decode_to_pcm(opus_data, channels=1)
+        return np.frombuffer(pcm, dtype='<i2').astype(np.float32) / 32768.0
+    
+    def decode_to_shared(self, opus_data: bytes, pool, refs: int = 1):
+        """
+        在内存中解码Opus数据，单声道PCM直接写入共享内存缓冲池
+
+        ASR在其他进程中运行时只需传递返回的句柄，音频本身不经过序列化
+        
+        Args:
+            opus_data: Opus字节数据
+            pool: PcmBufferPool 共享内存缓冲池
+            refs: 句柄的初始引用数(消费者个数)
             
-        except subprocess.CalledProcessError as e:
-            raise RuntimeError(f"Opus解码失败: {e.stderr}")
-        finally:
-            if os.path.exists(temp_opus_path):
-                os.unlink(temp_opus_path)
+        Returns:
+            PcmHandle: 共享内存中PCM的句柄，消费者用完后需 pool.release(handle)
+            
+        Raises:
+            PoolExhausted: 缓冲池没有空闲槽位或数据超过槽位容量
+        """
+        pcm = self.decode_to_pcm(opus_data, channels=1)
+        return pool.put(pcm, self.sample_rate, refs)
     
     def decode_to_bytes(self, opus_data: bytes) -> bytes:
         """
@@ -518,21 +684,18 @@ class UplinkProcessor:
         """
         print(f"📁 Opus输入: {len(opus_data):,} bytes")
         
-        with tempfile.NamedTemporaryFile(suffix=f'.{self.format}', delete=False) as temp_file:
-            temp_path = temp_file.name
+        if self.format == "wav":
+            # 管道输出的WAV头缺少长度信息，改为解码裸PCM后补文件头
+            pcm = self.decode_to_pcm(opus_data)
+            audio_data = build_wav_header(len(pcm), self.sample_rate, self.channels, self.bit_depth) + pcm
+        else:
+            try:
+                audio_data = run_ffmpeg_pipe(self._build_decode_command("pipe:1", self.format), opus_data)
+            except RuntimeError as e:
+                raise RuntimeError(f"Opus解码失败: {e}")
         
-        try:
-            self._decode_opus_to_audio(opus_data, temp_path)
-            
-            with open(temp_path, 'rb') as f:
-                audio_data = f.read()
-            
-            print(f"📥 解码输出: {len(audio_data):,} bytes")
-            return audio_data
-            
-        finally:
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
+        print(f"📥 解码输出: {len(audio_data):,} bytes")
+        return audio_data
     
     def decode_to_file(self, opus_data: bytes, output_path: str) -> str:
         """
@@ -556,7 +719,7 @@ class UplinkProcessor:
         
         return output_path
     
-    def decode_to_audiosegment(self, opus_data: bytes) -> AudioSegment:
+    def decode_to_audiosegment(self, opus_data: bytes) -> 'AudioSegment':
         """
         解码Opus数据并返回AudioSegment对象
         
@@ -566,6 +729,8 @@ class UplinkProcessor:
         Returns:
             AudioSegment: 音频对象
         """
+        from pydub import AudioSegment
+        
         audio_bytes = self.decode_to_bytes(opus_data)
         
         # 根据格式加载AudioSegment
@@ -574,7 +739,34 @@ class UplinkProcessor:
         else:
             return AudioSegment.from_file(io.BytesIO(audio_bytes), format=self.format)
     
-    def decode_opus(self, opus_data: bytes, output_format: str = "bytes", output_path: Optional[str] = None) -> Union[bytes, str, AudioSegment]:
+    @staticmethod
+    def frames_to_opus(frame_data: bytes) -> bytes:
+        """
+        将设备上传的紧凑传输帧还原为Ogg/Opus数据，之后可交给任意 decode_* 方法
+        
+        Args:
+            frame_data: CONFIG帧 + PACKET帧(+ END帧)，格式见 ai_core.audio.framing
+            
+        Returns:
+            bytes: Ogg/Opus数据
+            
+        Raises:
+            ValueError: 缺少CONFIG帧或帧格式错误时抛出
+        """
+        from .framing import OpusFrameDecoder, FramingError, FRAME_PACKET, frames_to_ogg
+        
+        decoder = OpusFrameDecoder()
+        try:
+            frames = decoder.feed(frame_data)
+        except FramingError as e:
+            raise ValueError(f"紧凑帧格式错误: {e}")
+        if decoder.config is None:
+            raise ValueError("紧凑帧缺少CONFIG帧")
+        if decoder.stats["lost"]:
+            print(f"⚠️ 上行丢包: {decoder.stats['lost']} 包")
+        return frames_to_ogg(decoder.config, [frame.data for frame in frames if frame.type == FRAME_PACKET])
+    
+    def decode_opus(self, opus_data: bytes, output_format: str = "bytes", output_path: Optional[str] = None) -> Union[bytes, str, 'AudioSegment', Any]:
         """
         解码Opus数据为音频 - 主要接口方法
         
@@ -584,10 +776,12 @@ class UplinkProcessor:
                 - "bytes": 返回WAV音频字节数据(默认)
                 - "file": 保存WAV文件并返回文件路径
                 - "audiosegment": 返回AudioSegment对象供进一步处理
+                - "pcm": 返回16bit裸PCM数据
+                - "array": 返回float32单声道采样数组，可直接传给 FunASR.transcribe_audio_data
             output_path (Optional[str]): 当output_format为"file"时的输出路径，None时自动生成
         
         Returns:
-            Union[bytes, str, AudioSegment]: 根据output_format返回相应格式的数据
+            Union[bytes, str, 'AudioSegment', Any]: 根据output_format返回相应格式的数据
             
         Raises:
             ValueError: 输出格式不支持时抛出
@@ -595,6 +789,10 @@ class UplinkProcessor:
         """
         if output_format == "bytes":
             return self.decode_to_bytes(opus_data)
+        elif output_format == "pcm":
+            return self.decode_to_pcm(opus_data)
+        elif output_format == "array":
+            return self.decode_to_array(opus_data)
         elif output_format == "audiosegment":
             return self.decode_to_audiosegment(opus_data)
         elif output_format == "file":
@@ -0,0 +1,213 @@
+"""语音端点检测 - 在服务端根据上行PCM的尾部静音(及可选的ASR中间结果)判断一句话说完"""
+
+import os
+import math
+import array
+import time
+from typing import Optional
+
+# 句末标点：中间识别结果以这些字符结尾时认为语义上已经说完
+_FINAL_PUNCTUATION = "。！？!?.…~～"
+
+# 噪声底初值取开头若干帧能量的最小值
+_SEED_FRAMES = 5
+# 语音帧上噪声底的最大上升速度(dB/秒)：持续的环境噪声被误判为语音时，噪声底仍能逐渐追上
+_SPEECH_FLOOR_RISE_DB_PER_S = 1.0
+
+
+class Endpointer:
+    """
+    句尾检测
+
+    按固定帧长计算短时能量(dBFS)，高于 max(绝对阈值, 噪声底+余量) 的帧视为语音：
+    - 连续语音达到 min_speech_ms 后确认开始说话(过滤按键声等短促噪声)
+    - 开始说话后连续静音达到 silence_ms 即判定说完
+    - 提供了ASR中间结果时，若结果以句末标点结尾或在 partial_stable_ms 内不再变化，
+      只需 partial_silence_ms 的静音即可判定说完
+    - 语音总长超过 max_utterance_ms 时强制结束
+    噪声底以开头几帧的最小能量(不高于绝对阈值)为初值，之后作为慢速最小值跟踪：低于噪声底的帧快速拉低，
+    非语音帧缓慢拉高，语音帧上也以很慢的速度上升，环境底噪高于默认阈值时不会一直被当作语音
+    判定后继续送入的音频若再次出现语音(用户只是停顿)，resumes 加一并重新等待句尾
+    """
+
+    def __init__(self,
+                 sample_rate: int = 16000,
+                 frame_ms: int = 20,
+                 silence_ms: Optional[int] = None,
+                 min_speech_ms: Optional[int] = None,
+                 max_utterance_ms: Optional[int] = None,
+                 threshold_db: Optional[float] = None,
+                 noise_margin_db: Optional[float] = None,
+                 partial_silence_ms: Optional[int] = None,
+                 partial_stable_ms: Optional[int] = None):
+        """
+        初始化端点检测，未指定的阈值读取 ENDPOINT_* 环境变量
+
+        Args:
+            sample_rate: 输入PCM采样率(16bit单声道)
+            frame_ms: 分析帧长(毫秒)
+            silence_ms: 判定说完所需的尾部静音 (ENDPOINT_SILENCE_MS，默认500)
+            min_speech_ms: 确认开始说话所需的连续语音 (ENDPOINT_MIN_SPEECH_MS，默认120)
+            max_utterance_ms: 单句最长时长，超出强制结束 (ENDPOINT_MAX_UTTERANCE_MS，默认15000)
+            threshold_db: 语音能量绝对下限(dBFS) (ENDPOINT_THRESHOLD_DB，默认-45)
+            noise_margin_db: 语音需高出噪声底的分贝数 (ENDPOINT_NOISE_MARGIN_DB，默认10)
+            partial_silence_ms: 中间结果已完整时所需的尾部静音 (ENDPOINT_PARTIAL_SILENCE_MS，默认250)
+            partial_stable_ms: 中间结果不变多久视为完整 (ENDPOINT_PARTIAL_STABLE_MS，默认400)
+        """
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.silence_ms = silence_ms or int(os.getenv('ENDPOINT_SILENCE_MS', '500'))
+        self.min_speech_ms = min_speech_ms or int(os.getenv('ENDPOINT_MIN_SPEECH_MS', '120'))
+        self.max_utterance_ms = max_utterance_ms or int(os.getenv('ENDPOINT_MAX_UTTERANCE_MS', '15000'))
+        self.threshold_db = (threshold_db if threshold_db is not None
+                             else float(os.getenv('ENDPOINT_THRESHOLD_DB', '-45')))
+        self.noise_margin_db = (noise_margin_db if noise_margin_db is not None
+                                else float(os.getenv('ENDPOINT_NOISE_MARGIN_DB', '10')))
+        self.partial_silence_ms = partial_silence_ms or int(os.getenv('ENDPOINT_PARTIAL_SILENCE_MS', '250'))
+        self.partial_stable_ms = partial_stable_ms or int(os.getenv('ENDPOINT_PARTIAL_STABLE_MS', '400'))
+
+        self._frame_bytes = sample_rate * frame_ms // 1000 * 2
+        self._pending = bytearray()
+        self._noise_db = self.threshold_db - self.noise_margin_db
+        self._seed_db: Optional[float] = None
+        self._seed_frames = 0
+        self._partial: Optional[str] = None
+        self._partial_since = 0.0
+        self.reset()
+
+    def reset(self):
+        """清空状态，开始检测新的一句(保留噪声底估计)"""
+        self._pending.clear()
+        self.position_ms = 0
+        self.speech_ms = 0
+        self.silence_run_ms = 0
+        # 确认开始说话、判定说完时在音频中的位置(毫秒)
+        self.speech_start_ms: Optional[int] = None
+        self.endpoint_ms: Optional[int] = None
+        self.reason: Optional[str] = None
+        self.resumes = 0
+        self._partial = None
+
+    @property
+    def speech_started(self) -> bool:
+        """是否已确认开始说话"""
+        return self.speech_start_ms is not None
+
+    @property
+    def fired(self) -> bool:
+        """是否已判定说完(之后又出现语音时为False)"""
+        return self.endpoint_ms is not None
+
+    @staticmethod
+    def frame_db(frame: bytes) -> float:
+        """16bit PCM帧的能量(dBFS)"""
+        samples = array.array('h', frame)
+        if not samples:
+            return -120.0
+        power = sum(s * s for s in samples) / len(samples)
+        return 10 * math.log10(power / (32768.0 * 32768.0)) if power > 0 else -120.0
+
+    def update_partial(self, text: Optional[str]):
+        """
+        提供最新的ASR中间结果
+
+        Args:
+            text: 截至当前音频的识别文本
+        """
+        text = (text or "").strip()
+        if text != self._partial:
+            self._partial = text
+            self._partial_since = time.monotonic()
+
+    def _partial_complete(self) -> bool:
+        if not self._partial:
+            return False
+        if self._partial[-1] in _FINAL_PUNCTUATION:
+            return True
+        return (time.monotonic() - self._partial_since) * 1000 >= self.partial_stable_ms
+
+    def feed(self, pcm: bytes) -> bool:
+        """
+        送入一段PCM(任意长度)
+
+        Returns:
+            bool: 本次送入后是否刚刚判定说完
+        """
+        self._pending.extend(pcm)
+        fired = False
+        size = self._frame_bytes
+        while len(self._pending) >= size:
+            frame = bytes(self._pending[:size])
+            del self._pending[:size]
+            fired = self._on_frame(frame) or fired
+        return fired
+
+    def _on_frame(self, frame: bytes) -> bool:
+        self.position_ms += self.frame_ms
+        db = self.frame_db(frame)
+        if self._seed_frames < _SEED_FRAMES:
+            self._seed_frames += 1
+            self._seed_db = db if self._seed_db is None else min(self._seed_db, db)
+            if self._seed_frames == _SEED_FRAMES:
+                # 不高于语音绝对阈值：用户一开口就说话时开头几帧是语音而不是底噪
+                self._noise_db = min(self._seed_db, self.threshold_db)
+        is_speech = db > max(self.threshold_db, self._noise_db + self.noise_margin_db)
+        if db < self._noise_db:
+            # 下降快：很快回到真实底噪
+            self._noise_db += (db - self._noise_db) * 0.2
+        elif not is_speech:
+            # 上升慢，避免被语音尾音拉高
+            self._noise_db += (db - self._noise_db) * 0.02
+        else:
+            self._noise_db += min(db - self._noise_db, _SPEECH_FLOOR_RISE_DB_PER_S * self.frame_ms / 1000)
+
+        if is_speech:
+            self.speech_ms += self.frame_ms
+            self.silence_run_ms = 0
+            if self.speech_start_ms is None and self.speech_ms >= self.min_speech_ms:
+                self.speech_start_ms = self.position_ms - self.speech_ms
+            if self.fired and self.reason != "max_length" and self.speech_ms >= self.min_speech_ms:
+                # 判定说完后又开口：只是停顿
+                self.endpoint_ms = None
+                self.reason = None
+                self.resumes += 1
+            if (self.speech_start_ms is not None and not self.fired
+                    and self.position_ms - self.speech_start_ms >= self.max_utterance_ms):
+                return self._fire("max_length")
+            return False
+
+        if self.speech_start_ms is None:
+            # 尚未确认开始说话：零星的语音帧不累计
+            self.speech_ms = 0
+            return False
+        self.silence_run_ms += self.frame_ms
+        if self.fired:
+            if self.speech_ms < self.min_speech_ms:
+                self.speech_ms = 0
+            return False
+
+        if self.position_ms - self.speech_start_ms >= self.max_utterance_ms:
+            return self._fire("max_length")
+        if self.silence_run_ms >= self.silence_ms:
+            return self._fire("silence")
+        if self.silence_run_ms >= self.partial_silence_ms and self._partial_complete():
+            return self._fire("partial")
+        return False
+
+    def _fire(self, reason: str) -> bool:
+        self.endpoint_ms = self.position_ms
+        self.reason = reason
+        # 判定之后重新累计语音，用于识别"只是停顿"
+        self.speech_ms = 0
+        return True
+
+    def get_stats(self):
+        """获取检测状态"""
+        return {
+            "position_ms": self.position_ms,
+            "speech_start_ms": self.speech_start_ms,
+            "endpoint_ms": self.endpoint_ms,
+            "reason": self.reason,
+            "resumes": self.resumes,
+            "noise_db": round(self._noise_db, 1),
+        }
@@ -0,0 +1,385 @@
+"""Opus 紧凑传输帧 - 长度前缀的裸Opus包，替代Ogg容器与Base64
+
+帧格式(大端):
+- CONFIG: 类型(1) + 协议版本(1) + 声道数(1) + pre_skip(2) + 原始采样率(4) + 输出增益(2) + 帧长(2，0.1毫秒)
+- PACKET: 类型(1) + 序号(2) + 时间戳(4) + 长度(2) + Opus包
+- END:    类型(1) + 序号(2) + 结束时间戳(4)
+
+时间戳为包起点在48kHz下的采样序号(与Ogg granule 同单位)，序号与时间戳均按位宽回绕。
+每个20ms包只有9字节帧头，而Ogg页头至少28字节，Base64还要再多出1/3；
+设备无需Ogg解析器，按帧头读出包即可交给 libopus 解码
+"""
+
+import struct
+from typing import Iterable, List, Optional
+
+from .ogg import OggPage, OggPageReader, OggPageWriter
+
+# 帧类型
+FRAME_CONFIG = 0x10
+FRAME_PACKET = 0x11
+FRAME_END = 0x12
+
+PROTOCOL_VERSION = 1
+
+_CONFIG = struct.Struct('!BBBHIhH')
+_PACKET = struct.Struct('!BHIH')
+_END = struct.Struct('!BHI')
+
+# Opus 时间戳的固定时钟
+OPUS_CLOCK_RATE = 48000
+
+# TOC 配置号 -> 每帧采样数(48kHz)，见 RFC 6716 3.1
+_SILK_FRAME_SAMPLES = (480, 960, 1920, 2880)
+_HYBRID_FRAME_SAMPLES = (480, 960)
+_CELT_FRAME_SAMPLES = (120, 240, 480, 960)
+
+
+class FramingError(Exception):
+    """帧格式错误"""
+
+
+def opus_packet_samples(packet: bytes) -> int:
+    """
+    根据TOC字节计算Opus包包含的采样数(48kHz)
+
+    Args:
+        packet: Opus包
+
+    Returns:
+        int: 采样数，空包返回0
+    """
+    if not packet:
+        return 0
+    toc = packet[0]
+    config = toc >> 3
+    if config < 12:
+        frame_samples = _SILK_FRAME_SAMPLES[config % 4]
+    elif config < 16:
+        frame_samples = _HYBRID_FRAME_SAMPLES[config % 2]
+    else:
+        frame_samples = _CELT_FRAME_SAMPLES[config % 4]
+    code = toc & 0x03
+    if code == 0:
+        frames = 1
+    elif code in (1, 2):
+        frames = 2
+    else:
+        frames = packet[1] & 0x3f if len(packet) > 1 else 0
+    return frame_samples * frames
+
+
+class OpusConfig:
+    """编解码参数，对应 OpusHead 中设备解码需要的字段"""
+
+    __slots__ = ("channels", "pre_skip", "sample_rate", "output_gain", "frame_duration_ms")
+
+    def __init__(self, channels: int = 1, pre_skip: int = 312, sample_rate: int = 16000,
+                 output_gain: int = 0, frame_duration_ms: float = 20.0):
+        """
+        Args:
+            channels: 声道数
+            pre_skip: 解码后需丢弃的起始采样数(48kHz)
+            sample_rate: 编码前的原始采样率(仅供参考，Opus解码率可自选)
+            output_gain: 输出增益(Q7.8 dB)
+            frame_duration_ms: 每包时长(毫秒)
+        """
+        self.channels = channels
+        self.pre_skip = pre_skip
+        self.sample_rate = sample_rate
+        self.output_gain = output_gain
+        self.frame_duration_ms = frame_duration_ms
+
+    @classmethod
+    def from_opus_head(cls, head: bytes, frame_duration_ms: float = 20.0) -> 'OpusConfig':
+        """
+        从 OpusHead 头包解析
+
+        Raises:
+            FramingError: 不是有效的 OpusHead
+        """
+        if len(head) < 19 or not head.startswith(b'OpusHead'):
+            raise FramingError("无效的OpusHead")
+        channels = head[9]
+        pre_skip, sample_rate, output_gain = struct.unpack_from('<HIh', head, 10)
+        return cls(channels, pre_skip, sample_rate, output_gain, frame_duration_ms)
+
+    def to_opus_head(self) -> bytes:
+        """生成 OpusHead 头包(映射族0，最多2声道)"""
+        return b'OpusHead' + struct.pack('<BBHIhB', 1, self.channels, self.pre_skip,
+                                         self.sample_rate, self.output_gain, 0)
+
+    def __repr__(self):
+        return (f"OpusConfig(channels={self.channels}, pre_skip={self.pre_skip}, "
+                f"sample_rate={self.sample_rate}, frame_duration_ms={self.frame_duration_ms})")
+
+
+class OpusFrame:
+    """解码出的一帧"""
+
+    __slots__ = ("type", "sequence", "timestamp", "data", "config")
+
+    def __init__(self, frame_type: int, sequence: int = 0, timestamp: int = 0,
+                 data: bytes = b"", config: Optional[OpusConfig] = None):
+        self.type = frame_type
+        self.sequence = sequence
+        self.timestamp = timestamp
+        self.data = data
+        self.config = config
+
+
+def encode_config(config: OpusConfig) -> bytes:
+    """编码 CONFIG 帧"""
+    return _CONFIG.pack(FRAME_CONFIG, PROTOCOL_VERSION, config.channels, config.pre_skip,
+                        config.sample_rate, config.output_gain, int(round(config.frame_duration_ms * 10)))
+
+
+def encode_packet(sequence: int, timestamp: int, packet: bytes) -> bytes:
+    """编码 PACKET 帧"""
+    if len(packet) > 0xffff:
+        raise FramingError(f"Opus包过大: {len(packet)} 字节")
+    return _PACKET.pack(FRAME_PACKET, sequence & 0xffff, timestamp & 0xffffffff, len(packet)) + packet
+
+
+def encode_end(sequence: int, timestamp: int) -> bytes:
+    """编码 END 帧"""
+    return _END.pack(FRAME_END, sequence & 0xffff, timestamp & 0xffffffff)
+
+
+class OpusFrameEncoder:
+    """
+    Ogg/Opus → 紧凑帧
+
+    输入编码器输出的Ogg页(或任意切分的Ogg字节流)，从 OpusHead 生成 CONFIG 帧，
+    丢弃 OpusTags，按段表拆出每个Opus包(包括跨页的包)并加上序号和时间戳
+    """
+
+    def __init__(self, frame_duration_ms: float = 20.0):
+        """
+        Args:
+            frame_duration_ms: 编码帧长(毫秒)，写入 CONFIG 帧供设备分配缓冲
+        """
+        self.frame_duration_ms = frame_duration_ms
+        self.config: Optional[OpusConfig] = None
+        self.sequence = 0
+        self.timestamp = 0
+        self._reader = OggPageReader()
+        self._partial = bytearray()
+        self._header_packets = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def feed(self, data: bytes) -> bytes:
+        """
+        喂入Ogg字节流(任意边界)
+
+        Returns:
+            bytes: 已完整的帧，可能为空
+        """
+        return b"".join(self.feed_page(page) for page in self._reader.feed(data))
+
+    def feed_page(self, page: OggPage) -> bytes:
+        """
+        喂入一个完整的Ogg页
+
+        Returns:
+            bytes: 该页产生的帧
+        """
+        self.bytes_in += len(page.data)
+        frames = []
+        body = page.body
+        offset = 0
+        for lacing in page.segments:
+            self._partial.extend(body[offset:offset + lacing])
+            offset += lacing
+            if lacing < 255:
+                # 段长小于255表示包结束
+                frame = self._on_packet(bytes(self._partial))
+                self._partial.clear()
+                if frame:
+                    frames.append(frame)
+        result = b"".join(frames)
+        self.bytes_out += len(result)
+        return result
+
+    def _on_packet(self, packet: bytes) -> bytes:
+        if self._header_packets < 2 and packet.startswith(b'OpusHead'):
+            self._header_packets += 1
+            self.config = OpusConfig.from_opus_head(packet, self.frame_duration_ms)
+            return encode_config(self.config)
+        if self._header_packets < 2 and packet.startswith(b'OpusTags'):
+            # 元数据对设备无用
+            self._header_packets += 1
+            return b""
+        frame = encode_packet(self.sequence, self.timestamp, packet)
+        self.sequence += 1
+        self.timestamp += opus_packet_samples(packet)
+        return frame
+
+    def finish(self) -> bytes:
+        """
+        流结束，返回 END 帧
+
+        Returns:
+            bytes: END 帧
+        """
+        frame = encode_end(self.sequence, self.timestamp)
+        self.bytes_out += len(frame)
+        return frame
+
+    def get_stats(self):
+        """获取转换统计"""
+        return {"packets": self.sequence, "bytes_in": self.bytes_in, "bytes_out": self.bytes_out,
+                "duration_ms": self.timestamp * 1000 // OPUS_CLOCK_RATE}
+
+
+class OpusFrameDecoder:
+    """
+    紧凑帧 → Opus包
+
+    增量解析任意边界到达的字节流，并按序号统计丢包与乱序
+    """
+
+    def __init__(self, max_packet_bytes: int = 4000):
+        """
+        Args:
+            max_packet_bytes: 单个Opus包上限，超出视为数据损坏
+        """
+        self.max_packet_bytes = max_packet_bytes
+        self.config: Optional[OpusConfig] = None
+        self._buffer = bytearray()
+        self._expected: Optional[int] = None
+        self.stats = {"packets": 0, "lost": 0, "reordered": 0, "bytes": 0}
+
+    def feed(self, data: bytes) -> List[OpusFrame]:
+        """
+        喂入字节流
+
+        Returns:
+            List[OpusFrame]: 已完整的帧
+
+        Raises:
+            FramingError: 遇到未知帧类型或超长的包
+        """
+        self._buffer.extend(data)
+        frames = []
+        while True:
+            frame = self._next_frame()
+            if frame is None:
+                return frames
+            frames.append(frame)
+
+    def _next_frame(self) -> Optional[OpusFrame]:
+        buffer = self._buffer
+        if not buffer:
+            return None
+        frame_type = buffer[0]
+        if frame_type == FRAME_PACKET:
+            if len(buffer) < _PACKET.size:
+                return None
+            _, sequence, timestamp, length = _PACKET.unpack_from(buffer)
+            if length > self.max_packet_bytes:
+                raise FramingError(f"Opus包过大: {length} 字节")
+            end = _PACKET.size + length
+            if len(buffer) < end:
+                return None
+            packet = bytes(buffer[_PACKET.size:end])
+            del buffer[:end]
+            self._track(sequence)
+            self.stats["packets"] += 1
+            self.stats["bytes"] += length
+            return OpusFrame(FRAME_PACKET, sequence, timestamp, packet)
+        if frame_type == FRAME_CONFIG:
+            if len(buffer) < _CONFIG.size:
+                return None
+            _, version, channels, pre_skip, sample_rate, gain, duration = _CONFIG.unpack_from(buffer)
+            del buffer[:_CONFIG.size]
+            if version != PROTOCOL_VERSION:
+                raise FramingError(f"不支持的协议版本: {version}")
+            self.config = OpusConfig(channels, pre_skip, sample_rate, gain, duration / 10)
+            self._expected = None
+            return OpusFrame(FRAME_CONFIG, config=self.config)
+        if frame_type == FRAME_END:
+            if len(buffer) < _END.size:
+                return None
+            _, sequence, timestamp = _END.unpack_from(buffer)
+            del buffer[:_END.size]
+            return OpusFrame(FRAME_END, sequence, timestamp)
+        raise FramingError(f"未知帧类型: {frame_type:#04x}")
+
+    def _track(self, sequence: int):
+        if self._expected is not None and sequence != self._expected:
+            gap = (sequence - self._expected) & 0xffff
+            if gap < 0x8000:
+                self.stats["lost"] += gap
+            else:
+                # 比期望的序号小：迟到的包
+                self.stats["reordered"] += 1
+                return
+        self._expected = (sequence + 1) & 0xffff
+
+
+def frames_to_ogg(config: OpusConfig, packets: Iterable[bytes], serial: int = 0) -> bytes:
+    """
+    把裸Opus包还原为Ogg/Opus流，供FFmpeg等只认容器格式的解码器使用
+
+    Args:
+        config: CONFIG 帧中的编解码参数
+        packets: 按顺序排列的Opus包
+        serial: Ogg流序列号
+
+    Returns:
+        bytes: Ogg/Opus数据
+    """
+    writer = OggPageWriter(serial)
+    pages = [writer.page(config.to_opus_head(), 0),
+             writer.page(b'OpusTags' + struct.pack('<I', 0) + struct.pack('<I', 0), 0)]
+    packets = list(packets)
+    granule = 0
+    for index, packet in enumerate(packets):
+        granule += opus_packet_samples(packet)
+        pages.append(writer.page(packet, granule, eos=index == len(packets) - 1))
+    return b"".join(pages)
+
+
+class OggRemuxer:
+    """
+    紧凑帧 → Ogg/Opus 字节流(增量)
+
+    与 frames_to_ogg 相同的封装，但帧到一个转一个，
+    供常驻的流式解码器边接收上行数据边解码
+    """
+
+    def __init__(self, serial: int = 0):
+        """
+        Args:
+            serial: Ogg流序列号
+        """
+        self.decoder = OpusFrameDecoder()
+        self._writer = OggPageWriter(serial)
+        self._granule = 0
+        self._started = False
+
+    def feed(self, data: bytes) -> bytes:
+        """
+        喂入紧凑帧字节流(任意边界)
+
+        Returns:
+            bytes: 已完整的Ogg页，可能为空
+
+        Raises:
+            FramingError: 帧格式错误或第一帧不是 CONFIG
+        """
+        pages = []
+        for frame in self.decoder.feed(data):
+            if frame.type == FRAME_CONFIG:
+                if not self._started:
+                    self._started = True
+                    pages.append(self._writer.page(frame.config.to_opus_head(), 0))
+                    pages.append(self._writer.page(b'OpusTags' + struct.pack('<II', 0, 0), 0))
+            elif frame.type == FRAME_PACKET:
+                if not self._started:
+                    raise FramingError("紧凑帧缺少CONFIG帧")
+                self._granule += opus_packet_samples(frame.data)
+                pages.append(self._writer.page(frame.data, self._granule))
+        return b"".join(pages)
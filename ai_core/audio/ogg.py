@@ -0,0 +1,172 @@
+"""Ogg 页解析 - 从编码器输出的字节流中切分出完整的Ogg页"""
+
+import struct
+from typing import List, Optional
+
+# Ogg 页头: "OggS", 版本, 头类型, granule位置, 流序列号, 页序号, CRC, 段数
+_PAGE_HEADER = struct.Struct('<4sBBqIIIB')
+_CAPTURE_PATTERN = b'OggS'
+
+
+class OggPage:
+    """一个完整的Ogg页"""
+
+    __slots__ = ("header_type", "granule_position", "serial", "sequence", "segments", "data")
+
+    def __init__(self, header_type: int, granule_position: int, serial: int, sequence: int,
+                 segments: bytes, data: bytes):
+        self.header_type = header_type
+        self.granule_position = granule_position
+        self.serial = serial
+        self.sequence = sequence
+        self.segments = segments
+        self.data = data
+
+    @property
+    def body(self) -> bytes:
+        """页内数据(去掉页头和段表)"""
+        return self.data[_PAGE_HEADER.size + len(self.segments):]
+
+    @property
+    def is_header(self) -> bool:
+        """是否为 OpusHead / OpusTags 头页(不含音频)"""
+        body = self.body
+        return body.startswith(b'OpusHead') or body.startswith(b'OpusTags')
+
+
+class OggPageReader:
+    """
+    增量Ogg页切分器
+
+    编码器的标准输出按任意边界到达，feed 后返回其中已完整的页，残余字节留待下次
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> List[OggPage]:
+        """
+        喂入字节流
+
+        Args:
+            data: 新到达的字节
+
+        Returns:
+            List[OggPage]: 已完整的页
+        """
+        self._buffer.extend(data)
+        pages = []
+        while True:
+            page = self._next_page()
+            if page is None:
+                return pages
+            pages.append(page)
+
+    def _next_page(self) -> Optional[OggPage]:
+        start = self._buffer.find(_CAPTURE_PATTERN)
+        if start < 0:
+            # 保留可能是下一个捕获模式开头的尾部字节
+            del self._buffer[:max(0, len(self._buffer) - 3)]
+            return None
+        if start:
+            del self._buffer[:start]
+        if len(self._buffer) < _PAGE_HEADER.size:
+            return None
+
+        (_, _, header_type, granule, serial, sequence, _, segment_count) = \
+            _PAGE_HEADER.unpack_from(self._buffer)
+        header_size = _PAGE_HEADER.size + segment_count
+        if len(self._buffer) < header_size:
+            return None
+        segments = bytes(self._buffer[_PAGE_HEADER.size:header_size])
+        page_size = header_size + sum(segments)
+        if len(self._buffer) < page_size:
+            return None
+
+        data = bytes(self._buffer[:page_size])
+        del self._buffer[:page_size]
+        return OggPage(header_type, granule, serial, sequence, segments, data)
+
+
+def _build_crc_table() -> List[int]:
+    # Ogg 使用多项式 0x04c11db7 的非反射CRC32，与 zlib.crc32 不同
+    table = []
+    for i in range(256):
+        crc = i << 24
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x04c11db7) if crc & 0x80000000 else (crc << 1)
+        table.append(crc & 0xffffffff)
+    return table
+
+
+_CRC_TABLE = _build_crc_table()
+
+
+def ogg_crc(data: bytes) -> int:
+    """计算Ogg页校验和(校验和字段置零后的整页数据)"""
+    crc = 0
+    for byte in data:
+        crc = ((crc << 8) & 0xffffffff) ^ _CRC_TABLE[((crc >> 24) & 0xff) ^ byte]
+    return crc
+
+
+class OggPageWriter:
+    """
+    Ogg页封装
+
+    把逐个到达的数据包封装为Ogg页，每页一个包，用于把设备上传的裸Opus包
+    还原成FFmpeg可以解码的Ogg/Opus流
+    """
+
+    # 头类型标志
+    CONTINUED = 0x01
+    BOS = 0x02
+    EOS = 0x04
+
+    def __init__(self, serial: int = 0):
+        """
+        Args:
+            serial: 流序列号
+        """
+        self.serial = serial
+        self.sequence = 0
+        self._started = False
+
+    def page(self, packet: bytes, granule_position: int, eos: bool = False) -> bytes:
+        """
+        把一个数据包封装为Ogg页(超过255个段时拆成多页)
+
+        Args:
+            packet: 数据包
+            granule_position: 包结束处的granule位置，头包为0
+            eos: 是否为流的最后一页
+
+        Returns:
+            bytes: 一页或多页的字节数据
+        """
+        # 段表: 每段最多255字节，整除时补一个0长度段表示包结束
+        lacing = [255] * (len(packet) // 255) + [len(packet) % 255]
+        pages = []
+        offset = 0
+        first = True
+        while lacing:
+            chunk, lacing = lacing[:255], lacing[255:]
+            size = sum(chunk)
+            header_type = 0 if first else self.CONTINUED
+            if not self._started:
+                header_type |= self.BOS
+                self._started = True
+            last = not lacing
+            if last and eos:
+                header_type |= self.EOS
+            # 包未在本页结束时granule位置为-1
+            granule = granule_position if last else -1
+            header = _PAGE_HEADER.pack(_CAPTURE_PATTERN, 0, header_type, granule,
+                                       self.serial, self.sequence, 0, len(chunk))
+            data = bytearray(header + bytes(chunk) + packet[offset:offset + size])
+            struct.pack_into('<I', data, 22, ogg_crc(data))
+            pages.append(bytes(data))
+            self.sequence += 1
+            offset += size
+            first = False
+        return b"".join(pages)
@@ -0,0 +1,252 @@
+"""共享内存PCM缓冲池 - 解码进程写入一次，ASR工作进程按句柄直接读取，不经过序列化"""
+
+import os
+import sys
+import struct
+import threading
+import multiprocessing
+from multiprocessing import shared_memory
+from typing import Any, Dict, Optional, Tuple
+
+# 每个槽位的头部: 引用计数、代数(每次分配加一，识别过期句柄)、有效字节数
+_SLOT_HEADER = struct.Struct('<III')
+# 数据区按缓存行对齐
+_ALIGN = 64
+
+
+class PoolExhausted(Exception):
+    """缓冲池没有空闲槽位，或数据超过单个槽位的容量"""
+
+
+class PcmHandle:
+    """
+    共享内存中一句PCM的句柄
+
+    只包含定位信息，跨进程传递时只序列化这几个字段而不是音频本身
+    """
+
+    __slots__ = ("pool", "slot", "generation", "length", "sample_rate")
+
+    def __init__(self, pool: str, slot: int, generation: int, length: int, sample_rate: int = 16000):
+        self.pool = pool
+        self.slot = slot
+        self.generation = generation
+        self.length = length
+        self.sample_rate = sample_rate
+
+    def __reduce__(self):
+        return (PcmHandle, (self.pool, self.slot, self.generation, self.length, self.sample_rate))
+
+    @property
+    def duration_ms(self) -> float:
+        """音频时长(16bit单声道)"""
+        return self.length / 2 * 1000 / self.sample_rate
+
+    def __repr__(self):
+        return (f"PcmHandle(pool={self.pool!r}, slot={self.slot}, generation={self.generation}, "
+                f"length={self.length}, sample_rate={self.sample_rate})")
+
+
+def _attach_segment(name: str) -> shared_memory.SharedMemory:
+    """连接已有的共享内存段，且不交给本进程的 resource_tracker 管理(由创建方负责释放)"""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # spawn 启动的子进程与父进程共用同一个 resource_tracker，连接后再 unregister 会删掉创建方的登记，
+    # 因此连接期间跳过登记
+    from multiprocessing import resource_tracker
+    register = resource_tracker.register
+
+    def _skip_shared_memory(name, rtype):
+        if rtype != "shared_memory":
+            register(name, rtype)
+
+    resource_tracker.register = _skip_shared_memory
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class PcmBufferPool:
+    """
+    共享内存PCM缓冲池
+
+    一个共享内存段划分为 slots 个定长槽位，槽位头部保存引用计数：
+    - 解码进程 put() 把PCM写入空闲槽位(唯一一次拷贝)，得到 PcmHandle
+    - 句柄经队列发给ASR工作进程，工作进程 view() 直接读取共享内存，处理完 release()
+    - 引用计数归零的槽位回到空闲状态供下一句复用；需要多个消费者时 put(refs=n) 或 retain()
+    头部读写由跨进程锁保护；工作进程通过 descriptor() 得到的描述连接同一个缓冲池
+    """
+
+    def __init__(self,
+                 slots: Optional[int] = None,
+                 slot_bytes: Optional[int] = None,
+                 lock: Any = None,
+                 _name: Optional[str] = None):
+        """
+        创建缓冲池
+
+        Args:
+            slots: 槽位数，即同时在途的最大句数 (PCM_POOL_SLOTS，默认8)
+            slot_bytes: 每个槽位的字节数 (PCM_POOL_SLOT_BYTES，默认960000，即16kHz单声道30秒)
+            lock: 跨进程锁，默认 multiprocessing.Lock()；使用 spawn 方式启动工作进程时
+                需传入同一上下文创建的锁
+        """
+        self.slots = slots or int(os.getenv('PCM_POOL_SLOTS', '8'))
+        self.slot_bytes = slot_bytes or int(os.getenv('PCM_POOL_SLOT_BYTES', '960000'))
+        self._lock = lock if lock is not None else multiprocessing.Lock()
+        self._data_offset = -(-self.slots * _SLOT_HEADER.size // _ALIGN) * _ALIGN
+        self._stride = -(-self.slot_bytes // _ALIGN) * _ALIGN
+        self._owner = _name is None
+        if self._owner:
+            self._segment = shared_memory.SharedMemory(create=True,
+                                                       size=self._data_offset + self.slots * self._stride)
+            self._segment.buf[:self._data_offset] = bytes(self._data_offset)
+        else:
+            self._segment = _attach_segment(_name)
+        self.name = self._segment.name
+        # 本进程内的统计
+        self._stats_lock = threading.Lock()
+        self.stats = {"puts": 0, "releases": 0, "exhausted": 0, "bytes": 0}
+
+    # ------------------------------------------------------------------
+    # 跨进程共享
+    # ------------------------------------------------------------------
+
+    def descriptor(self) -> Dict[str, Any]:
+        """传给工作进程的连接信息(作为 Process 参数传递)"""
+        return {"name": self.name, "slots": self.slots, "slot_bytes": self.slot_bytes, "lock": self._lock}
+
+    @classmethod
+    def attach(cls, descriptor: Dict[str, Any]) -> 'PcmBufferPool':
+        """
+        在工作进程中连接已创建的缓冲池
+
+        Args:
+            descriptor: 创建方 descriptor() 的返回值
+        """
+        return cls(descriptor["slots"], descriptor["slot_bytes"], descriptor["lock"], _name=descriptor["name"])
+
+    # ------------------------------------------------------------------
+    # 槽位头部(持有锁时调用)
+    # ------------------------------------------------------------------
+
+    def _header(self, slot: int) -> Tuple[int, int, int]:
+        return _SLOT_HEADER.unpack_from(self._segment.buf, slot * _SLOT_HEADER.size)
+
+    def _set_header(self, slot: int, refs: int, generation: int, length: int):
+        _SLOT_HEADER.pack_into(self._segment.buf, slot * _SLOT_HEADER.size, refs, generation, length)
+
+    def _check(self, handle: PcmHandle) -> Tuple[int, int, int]:
+        if handle.pool != self.name:
+            raise ValueError(f"句柄不属于该缓冲池: {handle.pool}")
+        refs, generation, length = self._header(handle.slot)
+        if refs == 0 or generation != handle.generation:
+            raise ValueError(f"句柄已失效: {handle}")
+        return refs, generation, length
+
+    # ------------------------------------------------------------------
+    # 对外接口
+    # ------------------------------------------------------------------
+
+    def put(self, pcm, sample_rate: int = 16000, refs: int = 1) -> PcmHandle:
+        """
+        把PCM写入一个空闲槽位
+
+        Args:
+            pcm: 16bit单声道PCM(bytes / bytearray / memoryview)
+            sample_rate: 采样率
+            refs: 初始引用数(消费者个数)
+
+        Returns:
+            PcmHandle: 句柄
+
+        Raises:
+            PoolExhausted: 没有空闲槽位或数据超过槽位容量
+        """
+        length = len(pcm)
+        if length > self.slot_bytes:
+            with self._stats_lock:
+                self.stats["exhausted"] += 1
+            raise PoolExhausted(f"PCM数据 {length} 字节超过槽位容量 {self.slot_bytes}")
+        with self._lock:
+            for slot in range(self.slots):
+                slot_refs, generation, _ = self._header(slot)
+                if slot_refs == 0:
+                    generation = (generation + 1) & 0xffffffff
+                    self._set_header(slot, refs, generation, length)
+                    break
+            else:
+                slot = None
+        if slot is None:
+            with self._stats_lock:
+                self.stats["exhausted"] += 1
+            raise PoolExhausted(f"缓冲池 {self.slots} 个槽位均在使用中")
+        # 槽位已标记占用，写入数据不需要持有锁
+        offset = self._data_offset + slot * self._stride
+        self._segment.buf[offset:offset + length] = pcm
+        with self._stats_lock:
+            self.stats["puts"] += 1
+            self.stats["bytes"] += length
+        return PcmHandle(self.name, slot, generation, length, sample_rate)
+
+    def view(self, handle: PcmHandle) -> memoryview:
+        """
+        直接读取句柄对应的PCM(零拷贝)
+
+        返回的 memoryview 需在 release() 之后不再使用，且在 close() 之前释放
+
+        Raises:
+            ValueError: 句柄已失效
+        """
+        with self._lock:
+            self._check(handle)
+        offset = self._data_offset + handle.slot * self._stride
+        return self._segment.buf[offset:offset + handle.length]
+
+    def retain(self, handle: PcmHandle, count: int = 1):
+        """增加引用(新增消费者)"""
+        with self._lock:
+            refs, generation, length = self._check(handle)
+            self._set_header(handle.slot, refs + count, generation, length)
+
+    def release(self, handle: PcmHandle):
+        """释放一个引用，归零时槽位回到空闲状态"""
+        with self._lock:
+            refs, generation, length = self._check(handle)
+            self._set_header(handle.slot, refs - 1, generation, length)
+        with self._stats_lock:
+            self.stats["releases"] += 1
+
+    def in_use(self) -> int:
+        """正在使用的槽位数"""
+        with self._lock:
+            return sum(1 for slot in range(self.slots) if self._header(slot)[0])
+
+    def get_stats(self) -> Dict:
+        """获取缓冲池统计(计数为本进程内的操作)"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats.update({"name": self.name, "slots": self.slots, "slot_bytes": self.slot_bytes,
+                      "in_use": self.in_use()})
+        return stats
+
+    def close(self, unlink: Optional[bool] = None):
+        """
+        断开共享内存
+
+        Args:
+            unlink: 是否删除共享内存段，默认仅创建方删除
+        """
+        self._segment.close()
+        if unlink if unlink is not None else self._owner:
+            try:
+                self._segment.unlink()
+            except FileNotFoundError:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
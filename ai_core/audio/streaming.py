@@ -0,0 +1,250 @@
+"""流式Opus编解码 - 常驻FFmpeg进程，边写入边输出(下行编码为Ogg/Opus页，上行解码为PCM)"""
+
+import asyncio
+from typing import AsyncIterator, Dict, Optional
+
+from .audio import DownlinkProcessor, _get_audio_config, get_ffmpeg_executable
+from .ogg import OggPage, OggPageReader
+
+# FFmpeg 命令只检测一次(检测需要启动子进程)
+_ffmpeg_cmd: Optional[str] = None
+
+
+def _get_ffmpeg_cmd() -> str:
+    global _ffmpeg_cmd
+    if _ffmpeg_cmd is None:
+        _ffmpeg_cmd = get_ffmpeg_executable()
+    return _ffmpeg_cmd
+
+
+class StreamingOpusEncoder:
+    """
+    流式Opus编码器
+
+    与 DownlinkProcessor 使用相同的预设参数，但输入输出都走管道：
+    TTS音频块写入 stdin，编码器每凑满一个Ogg页就从 stdout 输出，
+    第一句话的音频不必等整段回复合成完就能开始下发
+    """
+
+    def __init__(self,
+                 preset: str = "low_latency",
+                 input_format: str = "mp3",
+                 input_sample_rate: Optional[int] = None,
+                 input_channels: int = 1,
+                 page_duration_ms: int = 20):
+        """
+        初始化流式编码器
+
+        Args:
+            preset: 下行预设名称 (见 DownlinkProcessor)
+            input_format: 输入格式，"mp3"/"wav" 等可自动识别的容器，或 "s16le" 裸PCM
+            input_sample_rate: 裸PCM输入的采样率
+            input_channels: 裸PCM输入的声道数
+            page_duration_ms: 每个Ogg页包含的最长音频时长(毫秒)，越小首包越快
+        """
+        presets = DownlinkProcessor._get_presets()
+        if preset not in presets:
+            raise ValueError(f"不支持的预设: {preset}. 可用预设: {list(presets.keys())}")
+        config = presets[preset]
+        self.preset = preset
+        self.sample_rate = config["sample_rate"]
+        self.channels = config["channels"]
+        self.bitrate = config["bitrate"]
+        self.frame_duration = config["frame_duration"]
+        self.input_format = input_format
+        self.input_sample_rate = input_sample_rate
+        self.input_channels = input_channels
+        self.page_duration_ms = page_duration_ms
+
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._reader = OggPageReader()
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def _build_command(self):
+        cmd = [_get_ffmpeg_cmd(), "-hide_banner", "-loglevel", "error"]
+        if self.input_format == "s16le":
+            cmd += ["-f", "s16le", "-ar", str(self.input_sample_rate or self.sample_rate),
+                    "-ac", str(self.input_channels)]
+        elif self.input_format:
+            cmd += ["-f", self.input_format]
+        cmd += [
+            "-i", "pipe:0",
+            "-c:a", "libopus",
+            "-b:a", self.bitrate,
+            "-frame_duration", self.frame_duration,
+            "-ar", str(self.sample_rate),
+            "-ac", str(self.channels),
+            "-application", "voip",
+            # 尽快输出每一页，而不是攒满默认的1秒
+            "-page_duration", str(self.page_duration_ms * 1000),
+            "-flush_packets", "1",
+            "-f", "ogg",
+            "pipe:1",
+        ]
+        return cmd
+
+    async def start(self):
+        """启动编码进程"""
+        if self._process is None:
+            self._process = await asyncio.create_subprocess_exec(
+                *self._build_command(),
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+
+    async def write(self, data: bytes):
+        """
+        写入一段输入音频
+
+        Args:
+            data: 输入音频数据
+        """
+        if not data:
+            return
+        await self.start()
+        self._process.stdin.write(data)
+        self.bytes_in += len(data)
+        await self._process.stdin.drain()
+
+    async def close_input(self):
+        """输入结束，编码器会输出剩余的页后退出"""
+        await self.start()
+        if not self._process.stdin.is_closing():
+            self._process.stdin.close()
+
+    async def pages(self) -> AsyncIterator[OggPage]:
+        """
+        逐页读取编码输出，输入结束且编码器退出后结束
+
+        Yields:
+            OggPage: Ogg页(前两页为 OpusHead/OpusTags 头页)
+
+        Raises:
+            RuntimeError: 编码器异常退出
+        """
+        await self.start()
+        while True:
+            data = await self._process.stdout.read(4096)
+            if not data:
+                break
+            self.bytes_out += len(data)
+            for page in self._reader.feed(data):
+                yield page
+
+        returncode = await self._process.wait()
+        if returncode != 0:
+            stderr = (await self._process.stderr.read()).decode("utf-8", "ignore")
+            raise RuntimeError(f"Opus流式编码失败: {stderr.strip()}")
+
+    async def aclose(self):
+        """终止编码进程(中途取消时调用)"""
+        if self._process is not None and self._process.returncode is None:
+            self._process.kill()
+            await self._process.wait()
+
+    def get_stats(self) -> Dict:
+        """获取编码统计"""
+        return {"preset": self.preset, "bytes_in": self.bytes_in, "bytes_out": self.bytes_out}
+
+
+class StreamingOpusDecoder:
+    """
+    流式Opus解码器
+
+    设备上传的Ogg/Opus数据边到达边写入 stdin，解码出的16bit单声道PCM从 stdout 读出，
+    服务端可以在设备说话期间就检测语音起止，而不是等整句上传完再一次性解码
+    """
+
+    def __init__(self, sample_rate: Optional[int] = None, transport: str = "ogg"):
+        """
+        初始化流式解码器
+
+        Args:
+            sample_rate: 输出采样率，默认与 UplinkProcessor 配置一致
+            transport: 输入格式，"ogg" 为Ogg/Opus字节流，"frames" 为紧凑帧(见 ai_core.audio.framing)
+        """
+        self.sample_rate = sample_rate or _get_audio_config()["sample_rate"]
+        self.transport = transport
+        self._remuxer = None
+        if transport == "frames":
+            from .framing import OggRemuxer
+            self._remuxer = OggRemuxer()
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def _build_command(self):
+        return [
+            _get_ffmpeg_cmd(), "-hide_banner", "-loglevel", "error",
+            # 不探测输入，收到第一页就开始解码
+            "-probesize", "32", "-analyzeduration", "0",
+            "-fflags", "nobuffer", "-flags", "low_delay",
+            "-f", "ogg", "-i", "pipe:0",
+            "-f", "s16le", "-ar", str(self.sample_rate), "-ac", "1",
+            "-flush_packets", "1",
+            "pipe:1",
+        ]
+
+    async def start(self):
+        """启动解码进程"""
+        if self._process is None:
+            self._process = await asyncio.create_subprocess_exec(
+                *self._build_command(),
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+
+    async def write(self, data: bytes):
+        """
+        写入一段上行数据(任意边界)
+
+        Raises:
+            FramingError: 紧凑帧格式错误
+        """
+        self.bytes_in += len(data)
+        if self._remuxer is not None:
+            data = self._remuxer.feed(data)
+        if not data:
+            return
+        await self.start()
+        self._process.stdin.write(data)
+        await self._process.stdin.drain()
+
+    async def close_input(self):
+        """输入结束，解码器输出剩余的PCM后退出"""
+        await self.start()
+        if not self._process.stdin.is_closing():
+            self._process.stdin.close()
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        """
+        逐块读取解码出的PCM，输入结束且解码器退出后结束
+
+        Raises:
+            RuntimeError: 解码器异常退出
+        """
+        await self.start()
+        while True:
+            data = await self._process.stdout.read(4096)
+            if not data:
+                break
+            self.bytes_out += len(data)
+            yield data
+
+        returncode = await self._process.wait()
+        if returncode != 0:
+            stderr = (await self._process.stderr.read()).decode("utf-8", "ignore")
+            raise RuntimeError(f"Opus流式解码失败: {stderr.strip()}")
+
+    async def aclose(self):
+        """终止解码进程"""
+        if self._process is not None and self._process.returncode is None:
+            self._process.kill()
+            await self._process.wait()
+
+    def get_stats(self) -> Dict:
+        """获取解码统计"""
+        return {"transport": self.transport, "bytes_in": self.bytes_in, "bytes_out": self.bytes_out}
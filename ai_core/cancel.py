@@ -0,0 +1,128 @@
+"""协作式取消 - 打断(barge-in)时终止上一轮对话的 ASR/LLM/TTS/编码工作"""
+
+import time
+import asyncio
+import threading
+from typing import Callable, List, Optional
+
+
+class TurnCancelled(Exception):
+    """本轮对话已被取消"""
+
+
+class CancelToken:
+    """
+    线程安全的取消令牌
+
+    一轮对话一个令牌，贯穿各阶段：
+    - 事件循环中的阶段注册回调，取消时立即取消对应任务
+    - 线程中的阶段(同步LLM流、ASR)在循环中检查 cancelled，或注册回调关闭底层连接
+    cancel 可在任意线程调用，回调只执行一次
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+        self.reason: Optional[str] = None
+        # 调用 cancel 的时间(perf_counter)，用于统计取消生效耗时
+        self.cancelled_at: Optional[float] = None
+
+    @property
+    def cancelled(self) -> bool:
+        """是否已取消"""
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "cancelled") -> bool:
+        """
+        取消，依次执行已注册的回调
+
+        Args:
+            reason: 取消原因，如 "barge_in"
+
+        Returns:
+            bool: 是否为首次取消
+        """
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self.reason = reason
+            self.cancelled_at = time.perf_counter()
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+        return True
+
+    def add_callback(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        注册取消回调，已取消时立即执行
+
+        Args:
+            callback: 无参回调，在调用 cancel 的线程中执行
+
+        Returns:
+            Callable: 调用后注销该回调
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._remove(callback)
+        callback()
+        return lambda: None
+
+    def _remove(self, callback: Callable[[], None]):
+        with self._lock:
+            try:
+                self._callbacks.remove(callback)
+            except ValueError:
+                pass
+
+    def link(self, parent: Optional['CancelToken']) -> Callable[[], None]:
+        """
+        父令牌取消时一并取消本令牌
+
+        Returns:
+            Callable: 调用后解除关联
+        """
+        if parent is None:
+            return lambda: None
+        return parent.add_callback(lambda: self.cancel(parent.reason or "cancelled"))
+
+    def raise_if_cancelled(self):
+        """已取消时抛出 TurnCancelled"""
+        if self._event.is_set():
+            raise TurnCancelled(self.reason)
+
+    def bind_task(self, task: "asyncio.Future") -> Callable[[], None]:
+        """
+        取消时在任务所属的事件循环中取消该任务
+
+        Returns:
+            Callable: 调用后解除绑定
+        """
+        loop = task.get_loop()
+        return self.add_callback(lambda: loop.call_soon_threadsafe(task.cancel))
+
+    async def wait(self):
+        """等待取消发生"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+        remove = self.add_callback(wake)
+        try:
+            await future
+        finally:
+            remove()
+
+    def elapsed_ms(self) -> Optional[float]:
+        """从取消到现在的毫秒数，未取消时为None"""
+        if self.cancelled_at is None:
+            return None
+        return (time.perf_counter() - self.cancelled_at) * 1000
@@ -0,0 +1,45 @@
+"""
+LLM (大语言模型) 模块
+
+提供同步/异步对话生成功能，以及流式输出的句子切分工具
+
+注意：ChatGLM 依赖 zai-sdk，AsyncChatGLM 依赖 httpx，均采用懒加载，仅在首次访问时导入
+"""
+
+import importlib
+
+# 导出名称 -> 所在子模块
+_LAZY_EXPORTS = {
+    'ChatGLM': '.chatglm',
+    'AsyncChatGLM': '.async_chatglm',
+    'ResponseCache': '.cache',
+    'ConversationHistory': '.history',
+    'HistoryStore': '.history',
+    'estimate_tokens': '.history',
+    'ResilientCaller': '.resilience',
+    'RetryPolicy': '.resilience',
+    'ChatGLMError': '.resilience',
+    'ChatGLMTimeoutError': '.resilience',
+    'SpeechRateEstimator': '.voice',
+    'VoiceReplyPolicy': '.voice',
+    'SentenceSplitter': '.sentence',
+    'split_sentences': '.sentence',
+    'iter_sentences': '.sentence',
+    'aiter_sentences': '.sentence',
+}
+
+__all__ = list(_LAZY_EXPORTS)
+
+
+def __getattr__(name):
+    """按需导入导出对象"""
+    if name in _LAZY_EXPORTS:
+        module = importlib.import_module(_LAZY_EXPORTS[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals().keys()) + __all__)
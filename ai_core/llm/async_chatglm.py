@@ -0,0 +1,444 @@
+"""ChatGLM 异步客户端 - 共享连接池与并发限制"""
+
+import os
+import json
+import asyncio
+import threading
+from typing import List, Dict, Optional, AsyncIterator, Tuple, TYPE_CHECKING
+
+from .cache import ResponseCache
+from .chatglm import build_request_params
+from .coalesce import AsyncSingleFlight, request_fingerprint
+from .resilience import ResilientCaller, ChatGLMError, FIRST_TOKEN, classify_error
+
+if TYPE_CHECKING:
+    import httpx
+
+# 智谱AI OpenAI兼容接口地址
+DEFAULT_BASE_URL = "https://open.bigmodel.cn/api/paas/v4"
+
+
+def _get_async_llm_config() -> Dict[str, float]:
+    """
+    从环境变量读取异步客户端配置
+
+    Returns:
+        Dict[str, float]: 并发上限、连接池大小、超时等配置
+    """
+    return {
+        'max_concurrency': int(os.getenv('LLM_MAX_CONCURRENCY', '64')),
+        'max_connections': int(os.getenv('LLM_MAX_CONNECTIONS', '100')),
+        'max_keepalive_connections': int(os.getenv('LLM_MAX_KEEPALIVE_CONNECTIONS', '20')),
+        'keepalive_expiry': float(os.getenv('LLM_KEEPALIVE_EXPIRY', '60')),
+        'request_timeout': float(os.getenv('LLM_REQUEST_TIMEOUT', '60')),
+        'connect_timeout': float(os.getenv('LLM_CONNECT_TIMEOUT', '5')),
+    }
+
+
+class _LoopClient:
+    """某个事件循环上的连接池与并发信号量"""
+
+    __slots__ = ("client", "semaphore", "closer")
+
+    def __init__(self, client: 'httpx.AsyncClient', semaphore: asyncio.Semaphore):
+        self.client = client
+        self.semaphore = semaphore
+        # 事件循环结束时关闭连接池的常驻任务
+        self.closer: Optional[asyncio.Task] = None
+
+
+class AsyncChatGLM:
+    """
+    ChatGLM 异步客户端
+
+    同一事件循环上的所有会话共享一个 httpx.AsyncClient 连接池(HTTP keep-alive)，
+    并通过信号量限制同时在途的上游请求数，单个事件循环即可服务大量并发对话；
+    在多个事件循环中使用时每个循环各有一份连接池与信号量，循环结束时随之关闭
+    """
+
+    # 类变量用于单例模式
+    _instance = None
+
+    def __init__(self,
+                 api_key: str,
+                 model: str = "glm-4.5",
+                 base_url: Optional[str] = None,
+                 max_concurrency: Optional[int] = None,
+                 request_timeout: Optional[float] = None,
+                 cache: Optional[ResponseCache] = None,
+                 coalesce: Optional[bool] = None,
+                 resilience: Optional[ResilientCaller] = None):
+        """
+        初始化异步ChatGLM客户端
+
+        Args:
+            api_key: 智谱AI的API密钥，必须提供
+            model: 使用的模型名称，默认为glm-4.5
+            base_url: 接口地址，默认读取 ZHIPU_BASE_URL 环境变量或官方地址
+            max_concurrency: 同时在途的最大请求数，默认读取 LLM_MAX_CONCURRENCY
+            request_timeout: 单次请求超时(秒)，默认读取 LLM_REQUEST_TIMEOUT
+            cache: 回复缓存，不指定时根据 LLM_CACHE_ENABLED 环境变量决定是否启用
+            coalesce: 是否合并相同的并发请求，不指定时读取 LLM_COALESCE_ENABLED (默认开启)
+            resilience: 对冲/重试策略，不指定时根据 LLM_* 环境变量创建
+        """
+        if not api_key:
+            raise ValueError("API key不能为空，请提供有效的API密钥")
+        config = _get_async_llm_config()
+
+        self.api_key = api_key
+        self.model = model
+        self.base_url = (base_url or os.getenv('ZHIPU_BASE_URL') or DEFAULT_BASE_URL).rstrip('/')
+        self.max_concurrency = max_concurrency or config['max_concurrency']
+        self.request_timeout = request_timeout or config['request_timeout']
+        self.default_system_message = "你是一个有帮助的AI助手。"
+        self.cache = cache if cache is not None else ResponseCache.from_env()
+        if coalesce is None:
+            coalesce = os.getenv('LLM_COALESCE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+        self.inflight = AsyncSingleFlight() if coalesce else None
+        self.resilience = resilience or ResilientCaller.from_env()
+        self._config = config
+
+        # 连接池和信号量与事件循环绑定，首次请求时在当前循环中创建
+        self._states: Dict[asyncio.AbstractEventLoop, _LoopClient] = {}
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+    @classmethod
+    def get_instance(cls, api_key: str, model: str = "glm-4.5") -> 'AsyncChatGLM':
+        """
+        获取AsyncChatGLM单例实例
+
+        Args:
+            api_key: API密钥，必须提供
+            model: 模型名称，如果已有实例则忽略
+
+        Returns:
+            AsyncChatGLM实例
+        """
+        if cls._instance is None:
+            cls._instance = cls(api_key=api_key, model=model)
+        return cls._instance
+
+    async def __aenter__(self) -> 'AsyncChatGLM':
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    def _ensure_client(self) -> Tuple['httpx.AsyncClient', asyncio.Semaphore]:
+        """
+        获取当前事件循环上的连接池与并发信号量，不存在时创建
+
+        Returns:
+            Tuple[httpx.AsyncClient, asyncio.Semaphore]: 连接池与并发信号量
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            # 清理未经正常结束(未取消剩余任务)就关闭的事件循环，其连接由垃圾回收释放
+            for closed_loop in [l for l in self._states if l.is_closed()]:
+                del self._states[closed_loop]
+            state = self._states.get(loop)
+            if state is None:
+                state = self._states[loop] = self._create_state()
+                state.closer = loop.create_task(self._close_on_loop_exit(loop, state))
+        return state.client, state.semaphore
+
+    def _create_state(self) -> _LoopClient:
+        import httpx
+
+        limits = httpx.Limits(
+            max_connections=self._config['max_connections'],
+            max_keepalive_connections=self._config['max_keepalive_connections'],
+            keepalive_expiry=self._config['keepalive_expiry'],
+        )
+        timeout = httpx.Timeout(self.request_timeout, connect=self._config['connect_timeout'])
+        client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json",
+            },
+            limits=limits,
+            timeout=timeout,
+        )
+        return _LoopClient(client, asyncio.Semaphore(self.max_concurrency))
+
+    async def _close_on_loop_exit(self, loop: asyncio.AbstractEventLoop, state: _LoopClient):
+        """常驻任务：事件循环结束时(asyncio.run 等会取消剩余任务)关闭该循环上的连接池"""
+        try:
+            await loop.create_future()
+        finally:
+            with self._lock:
+                owned = self._states.get(loop) is state
+                if owned:
+                    del self._states[loop]
+            # 已由 aclose() 移除的连接池由 aclose() 负责关闭
+            if owned:
+                await state.client.aclose()
+
+    async def generate_response(self,
+                                user_message: str,
+                                system_message: Optional[str] = None,
+                                temperature: Optional[float] = None,
+                                max_tokens: Optional[int] = None,
+                                conversation_history: Optional[List[Dict]] = None,
+                                timeout: Optional[float] = None) -> str:
+        """
+        异步生成AI回复
+
+        Args:
+            user_message: 用户输入的消息
+            system_message: 系统提示词，可选
+            temperature: 生成温度，控制随机性 (0-1)，可选
+            max_tokens: 最大token数量，可选
+            conversation_history: 对话历史记录，可选
+            timeout: 端到端时间预算(秒)，包含排队、对冲与重试，默认使用 request_timeout
+
+        Returns:
+            AI生成的回复文本
+
+        Raises:
+            ChatGLMTimeoutError: 超出时间预算
+            ChatGLMError: 当API调用失败时抛出异常
+        """
+        if system_message is None:
+            system_message = self.default_system_message
+        cache_key = self.cache.make_key(
+            self.model, user_message, system_message, temperature, max_tokens, conversation_history
+        ) if self.cache else None
+        cached = self.cache.get(cache_key) if self.cache else None
+        if cached is not None:
+            return cached
+
+        request_params = build_request_params(
+            self.model, user_message, system_message,
+            temperature, max_tokens, conversation_history, stream=False
+        )
+        timeout = timeout or self.request_timeout
+
+        if self.inflight:
+            # 相同的并发请求共享同一次上游调用
+            content = await self.inflight.do(
+                request_fingerprint(request_params),
+                lambda: self._post_completion(request_params, timeout)
+            )
+        else:
+            content = await self._post_completion(request_params, timeout)
+
+        if self.cache and content != "响应为空":
+            self.cache.put(cache_key, content)
+        return content
+
+    async def _post_completion(self, request_params: Dict, timeout: float) -> str:
+        """
+        在时间预算内调用非流式接口，慢请求触发对冲，可重试错误按退避重试
+
+        Args:
+            request_params: 请求参数
+            timeout: 端到端时间预算(秒)
+
+        Returns:
+            AI生成的回复文本
+        """
+        return await self.resilience.acall(
+            lambda remaining: self._post_once(request_params, remaining),
+            timeout=timeout
+        )
+
+    async def _post_once(self, request_params: Dict, remaining: Optional[float]) -> str:
+        """
+        单次调用非流式接口并提取回复文本
+
+        Raises:
+            ChatGLMError: 当API调用失败时抛出异常
+        """
+        client, semaphore = self._ensure_client()
+        async with semaphore:
+            self._in_flight += 1
+            try:
+                response = await client.post("/chat/completions", json=request_params,
+                                             **self._timeout_kwargs(remaining))
+                response.raise_for_status()
+                data = response.json()
+            except Exception as e:
+                raise classify_error(e)
+            finally:
+                self._in_flight -= 1
+
+        try:
+            content = data["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError) as parse_error:
+            raise ChatGLMError(f"ChatGLM API调用失败: 解析响应失败: {str(parse_error)}")
+        return content if content else "响应为空"
+
+    async def stream_response(self,
+                              user_message: str,
+                              system_message: Optional[str] = None,
+                              temperature: Optional[float] = None,
+                              max_tokens: Optional[int] = None,
+                              conversation_history: Optional[List[Dict]] = None,
+                              timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """
+        异步流式生成AI回复(SSE)，逐段返回增量文本
+
+        timeout 约束排队与首包到达时间(可触发对冲/重试)，之后每个数据块之间受连接池的读超时约束
+
+        Yields:
+            str: 模型输出的增量文本
+
+        Raises:
+            ChatGLMTimeoutError: 首包超出时间预算
+            ChatGLMError: 当API调用失败时抛出异常
+        """
+        if system_message is None:
+            system_message = self.default_system_message
+        cache_key = self.cache.make_key(
+            self.model, user_message, system_message, temperature, max_tokens, conversation_history
+        ) if self.cache else None
+        cached = self.cache.get(cache_key) if self.cache else None
+        if cached is not None:
+            yield cached
+            return
+
+        request_params = build_request_params(
+            self.model, user_message, system_message,
+            temperature, max_tokens, conversation_history, stream=True
+        )
+        timeout = timeout or self.request_timeout
+
+        handle = await self.resilience.acall(
+            lambda remaining: self._open_stream(request_params, remaining),
+            timeout=timeout,
+            discard=lambda opened: opened.aclose(),
+            kind=FIRST_TOKEN
+        )
+
+        parts = []
+        try:
+            if handle.first_delta:
+                parts.append(handle.first_delta)
+                yield handle.first_delta
+            async for line in handle.lines:
+                delta = self._parse_sse_line(line)
+                if delta is None:
+                    continue
+                if delta is StopAsyncIteration:
+                    break
+                parts.append(delta)
+                yield delta
+            # 仅完整接收的回复写入缓存
+            if self.cache and parts:
+                self.cache.put(cache_key, "".join(parts))
+        except Exception as e:
+            raise ChatGLMError(f"ChatGLM 流式响应中断: {str(e)}")
+        finally:
+            # 提前退出时关闭响应，连接归还连接池
+            await handle.aclose()
+
+    async def _open_stream(self, request_params: Dict, remaining: Optional[float]) -> '_StreamHandle':
+        """
+        单次打开SSE流并读取到首个增量文本，返回的句柄持有一个并发名额
+
+        Raises:
+            ChatGLMError: 当API调用失败时抛出异常
+        """
+        client, semaphore = self._ensure_client()
+        await semaphore.acquire()
+        self._in_flight += 1
+        handle = _StreamHandle(self, semaphore)
+        try:
+            request = client.build_request("POST", "/chat/completions", json=request_params,
+                                           **self._timeout_kwargs(remaining))
+            handle.response = await client.send(request, stream=True)
+            handle.response.raise_for_status()
+            handle.lines = handle.response.aiter_lines()
+            async for line in handle.lines:
+                delta = self._parse_sse_line(line)
+                if delta is StopAsyncIteration:
+                    break
+                if delta:
+                    handle.first_delta = delta
+                    break
+            return handle
+        except BaseException as e:
+            await handle.aclose()
+            if isinstance(e, Exception):
+                raise classify_error(e)
+            raise
+
+    @staticmethod
+    def _timeout_kwargs(remaining: Optional[float]) -> Dict:
+        """剩余预算转换为httpx请求超时参数"""
+        return {} if remaining is None else {"timeout": max(remaining, 0.001)}
+
+    @staticmethod
+    def _parse_sse_line(line: str):
+        """
+        解析一行SSE数据
+
+        Returns:
+            增量文本；流结束时返回 StopAsyncIteration；无内容时返回None
+        """
+        line = line.strip()
+        if not line.startswith("data:"):
+            return None
+        payload = line[len("data:"):].strip()
+        if payload == "[DONE]":
+            return StopAsyncIteration
+        try:
+            chunk = json.loads(payload)
+            return chunk["choices"][0]["delta"].get("content") or None
+        except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+            return None
+
+    def set_default_system_message(self, message: str):
+        """设置默认系统提示词"""
+        self.default_system_message = message
+
+    def get_pool_stats(self) -> Dict:
+        """获取连接池与并发状态"""
+        return {
+            "base_url": self.base_url,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self._in_flight,
+            "loops": len(self._states),
+            "max_connections": self._config['max_connections'],
+            "max_keepalive_connections": self._config['max_keepalive_connections'],
+            "request_timeout": self.request_timeout,
+            "cache": self.cache.get_stats() if self.cache else None,
+            "coalesce": self.inflight.get_stats() if self.inflight else None,
+            "resilience": self.resilience.get_stats(),
+        }
+
+    async def aclose(self):
+        """关闭当前事件循环上的共享连接池"""
+        with self._lock:
+            state = self._states.pop(asyncio.get_running_loop(), None)
+        if state is None:
+            return
+        state.closer.cancel()
+        await state.client.aclose()
+
+
+class _StreamHandle:
+    """已打开的SSE流，关闭时归还连接与并发名额"""
+
+    def __init__(self, owner: AsyncChatGLM, semaphore: asyncio.Semaphore):
+        self._owner = owner
+        # 归还到打开时占用的信号量(所在事件循环的信号量)
+        self._semaphore = semaphore
+        self.response = None
+        self.lines = None
+        self.first_delta: Optional[str] = None
+        self._closed = False
+
+    async def aclose(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            if self.response is not None:
+                await self.response.aclose()
+        finally:
+            self._owner._in_flight -= 1
+            self._semaphore.release()
@@ -0,0 +1,188 @@
+"""LLM 回复缓存 - TTL + LRU，按归一化请求内容命中"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import List, Dict, Optional, Tuple
+
+# 归一化时去除的首尾标点/语气符号
+_TRIM_CHARS = " \t\r\n。，、！？!?,.~～…；;：:\"'“”‘’"
+
+
+def normalize_message(text: str) -> str:
+    """
+    归一化用户消息，使近似相同的问句命中同一缓存项
+
+    处理：全角转半角(NFKC)、转小写、合并空白、去除首尾标点
+    如 "现在几点？"、" 现在几点 " 与 "现在几点" 归一化后相同
+
+    Args:
+        text: 原始消息
+
+    Returns:
+        str: 归一化后的消息
+    """
+    text = unicodedata.normalize("NFKC", text or "")
+    text = " ".join(text.lower().split())
+    return text.strip(_TRIM_CHARS)
+
+
+def fingerprint_history(conversation_history: Optional[List[Dict]]) -> str:
+    """
+    计算对话历史指纹
+
+    Args:
+        conversation_history: 对话历史记录
+
+    Returns:
+        str: 历史内容的SHA-256摘要，无历史时返回空字符串
+    """
+    if not conversation_history:
+        return ""
+    payload = json.dumps(conversation_history, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    LLM 回复缓存
+
+    缓存键由归一化用户消息、系统提示词、对话历史指纹、模型与采样参数组成。
+    条目超过TTL后失效，总数超过上限时淘汰最久未使用的条目。
+    温度高于 max_temperature 的请求视为非确定性输出，不读也不写缓存
+    """
+
+    def __init__(self,
+                 max_entries: int = 1024,
+                 ttl: float = 300.0,
+                 max_temperature: Optional[float] = 0.3):
+        """
+        初始化回复缓存
+
+        Args:
+            max_entries: 最大缓存条目数(LRU淘汰)
+            ttl: 条目有效期(秒)
+            max_temperature: 可缓存的最高温度，None表示不按温度跳过。
+                未指定温度(使用模型默认值)的请求视为可缓存
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_temperature = max_temperature
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "bypassed": 0,
+            "evictions": 0,
+            "expirations": 0,
+        }
+
+    @classmethod
+    def from_env(cls) -> Optional['ResponseCache']:
+        """
+        根据环境变量创建缓存，LLM_CACHE_ENABLED 未开启时返回None
+
+        Returns:
+            Optional[ResponseCache]: 缓存实例
+        """
+        if os.getenv('LLM_CACHE_ENABLED', 'false').lower() not in ('1', 'true', 'yes'):
+            return None
+        max_temperature = os.getenv('LLM_CACHE_MAX_TEMPERATURE', '0.3')
+        return cls(
+            max_entries=int(os.getenv('LLM_CACHE_MAX_ENTRIES', '1024')),
+            ttl=float(os.getenv('LLM_CACHE_TTL', '300')),
+            max_temperature=float(max_temperature) if max_temperature else None,
+        )
+
+    def make_key(self,
+                 model: str,
+                 user_message: str,
+                 system_message: str,
+                 temperature: Optional[float] = None,
+                 max_tokens: Optional[int] = None,
+                 conversation_history: Optional[List[Dict]] = None) -> Optional[str]:
+        """
+        计算缓存键
+
+        Returns:
+            Optional[str]: 缓存键；请求不可缓存(温度过高)时返回None
+        """
+        if (temperature is not None and self.max_temperature is not None
+                and temperature > self.max_temperature):
+            with self._lock:
+                self._stats["bypassed"] += 1
+            return None
+
+        parts = [
+            model,
+            normalize_message(user_message),
+            system_message or "",
+            fingerprint_history(conversation_history),
+            "" if temperature is None else f"{temperature:.3f}",
+            "" if not max_tokens else str(max_tokens),
+        ]
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key: Optional[str]) -> Optional[str]:
+        """
+        查询缓存
+
+        Args:
+            key: make_key 返回的缓存键，None时直接返回None
+
+        Returns:
+            Optional[str]: 命中时返回缓存的回复
+        """
+        if key is None:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return value
+
+    def put(self, key: Optional[str], value: str):
+        """
+        写入缓存
+
+        Args:
+            key: make_key 返回的缓存键，None时忽略
+            value: 回复文本
+        """
+        if key is None or not value:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def clear(self):
+        """清空缓存(保留统计)"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict:
+        """获取缓存命中统计"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
@@ -1,6 +1,72 @@
-import zai
-from zai import ZhipuAiClient
-from typing import List, Dict, Optional
+import os
+import asyncio
+import threading
+from typing import List, Dict, Optional, Iterator, AsyncIterator
+
+from .cache import ResponseCache
+from .coalesce import SingleFlight, request_fingerprint
+from .resilience import ResilientCaller, ChatGLMError, FIRST_TOKEN, classify_error
+from .history import HistoryStore
+from .voice import VoiceReplyPolicy
+from ..cancel import CancelToken, TurnCancelled
+
+
+def build_request_params(model: str,
+                         user_message: str,
+                         system_message: str,
+                         temperature: Optional[float] = None,
+                         max_tokens: Optional[int] = None,
+                         conversation_history: Optional[List[Dict]] = None,
+                         stream: bool = False) -> Dict:
+    """
+    构建 chat/completions 请求参数，同步与异步客户端共用
+    
+    Args:
+        model: 模型名称
+        user_message: 用户输入的消息
+        system_message: 系统提示词
+        temperature: 生成温度，None时使用模型默认值
+        max_tokens: 最大token数量，可选
+        conversation_history: 对话历史记录，可选
+        stream: 是否流式响应
+        
+    Returns:
+        请求参数字典
+    """
+    # 构建消息列表
+    messages = []
+    
+    # 添加系统消息
+    messages.append({
+        "role": "system",
+        "content": system_message
+    })
+    
+    # 添加对话历史
+    if conversation_history:
+        messages.extend(conversation_history)
+    
+    # 添加用户消息
+    messages.append({
+        "role": "user",
+        "content": user_message
+    })
+    
+    request_params = {
+        "model": model,
+        "messages": messages,
+        "stream": stream
+    }
+    
+    # 添加可选参数
+    if temperature is not None:
+        request_params["temperature"] = temperature
+    
+    if max_tokens:
+        request_params["max_tokens"] = max_tokens
+    
+    return request_params
+
 
 class ChatGLM:
     """ChatGLM 智谱AI聊天模型封装类"""
@@ -8,20 +74,50 @@ class ChatGLM:
     # 类变量用于单例模式
     _instance = None
     
-    def __init__(self, api_key: str, model: str = "glm-4.5"):
+    def __init__(self,
+                 api_key: str,
+                 model: str = "glm-4.5",
+                 base_url: Optional[str] = None,
+                 cache: Optional[ResponseCache] = None,
+                 coalesce: Optional[bool] = None,
+                 resilience: Optional[ResilientCaller] = None):
         """
         初始化ChatGLM客户端
         
         Args:
             api_key: 智谱AI的API密钥，必须提供
             model: 使用的模型名称，默认为glm-4.5
+            base_url: 接口地址，不指定时读取 ZHIPU_BASE_URL 环境变量，均未设置时使用官方地址。
+                可指向 scripts/mock_llm_server.py 进行离线压测
+            cache: 回复缓存，不指定时根据 LLM_CACHE_ENABLED 环境变量决定是否启用
+            coalesce: 是否合并相同的并发请求，不指定时读取 LLM_COALESCE_ENABLED (默认开启)
+            resilience: 超时/对冲/重试策略，不指定时根据 LLM_* 环境变量创建
         """
         if not api_key:
             raise ValueError("API key不能为空，请提供有效的API密钥")
         self.api_key = api_key
         self.model = model
-        self.client = ZhipuAiClient(api_key=api_key)
+        # zai-sdk 导入较慢，在创建实例时才加载
+        from zai import ZhipuAiClient
+        self.base_url = base_url or os.getenv('ZHIPU_BASE_URL') or None
+        client_kwargs = {"api_key": api_key, "max_retries": 0}
+        if self.base_url:
+            client_kwargs["base_url"] = self.base_url
+        # 重试由 ResilientCaller 统一按剩余预算控制，关闭SDK内置重试
+        self.client = ZhipuAiClient(**client_kwargs)
         self.default_system_message = "你是一个有帮助的AI助手。"
+        self.cache = cache if cache is not None else ResponseCache.from_env()
+        if coalesce is None:
+            coalesce = os.getenv('LLM_COALESCE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+        self.inflight = SingleFlight() if coalesce else None
+        self.resilience = resilience or ResilientCaller.from_env()
+        
+        # 按会话ID管理的对话历史，LLM_HISTORY_SUMMARIZE 开启时用模型摘要旧轮次
+        summarize = os.getenv('LLM_HISTORY_SUMMARIZE', 'false').lower() in ('1', 'true', 'yes')
+        self.history_store = HistoryStore(summarizer=self.summarize_history if summarize else None)
+        
+        # 语音回复长度策略，语速从TTS输出中学习(见 speech_rate)
+        self.voice_policy = VoiceReplyPolicy()
     
     @classmethod
     def get_instance(cls, api_key: str, model: str = "glm-4.5") -> 'ChatGLM':
@@ -44,7 +140,8 @@ class ChatGLM:
                          system_message: Optional[str] = None,
                          temperature: Optional[float] = None,
                          max_tokens: Optional[int] = None,
-                         conversation_history: Optional[List[Dict]] = None) -> str:
+                         conversation_history: Optional[List[Dict]] = None,
+                         timeout: Optional[float] = None) -> str:
         """
         生成AI回复
         
@@ -54,79 +151,461 @@ class ChatGLM:
             temperature: 生成温度，控制随机性 (0-1)，可选，不指定时使用模型默认值
             max_tokens: 最大token数量，可选
             conversation_history: 对话历史记录，可选
+            timeout: 端到端时间预算(秒)，包含对冲与重试，不指定时使用 LLM_REQUEST_TIMEOUT
             
         Returns:
             AI生成的回复文本
             
         Raises:
-            Exception: 当API调用失败时抛出异常
+            ChatGLMTimeoutError: 超出时间预算
+            ChatGLMError: 当API调用失败时抛出异常
         """
-        try:
-            # 构建消息列表
-            messages = []
+        cache_key = self._cache_key(user_message, system_message, temperature,
+                                    max_tokens, conversation_history)
+        cached = self.cache.get(cache_key) if self.cache else None
+        if cached is not None:
+            return cached
+        
+        # 构建请求参数
+        request_params = self._build_request_params(
+            user_message, system_message, temperature, max_tokens,
+            conversation_history, stream=False  # 确保非流式响应
+        )
+        if self.inflight:
+            # 相同的并发请求共享同一次上游调用
+            content = self.inflight.do(
+                request_fingerprint(request_params),
+                lambda: self._request_completion(request_params, timeout)
+            )
+        else:
+            content = self._request_completion(request_params, timeout)
+        
+        if self.cache and content != "响应为空":
+            self.cache.put(cache_key, content)
+        return content
+    
+    def _request_completion(self, request_params: Dict, timeout: Optional[float] = None) -> str:
+        """
+        在时间预算内调用非流式接口，慢请求触发对冲，可重试错误按退避重试
+        
+        Args:
+            request_params: 请求参数
+            timeout: 端到端时间预算(秒)
             
-            # 添加系统消息
-            if system_message is None:
-                system_message = self.default_system_message
-            messages.append({
-                "role": "system",
-                "content": system_message
-            })
+        Returns:
+            AI生成的回复文本
+        """
+        return self.resilience.call(
+            lambda remaining: self._create_completion(request_params, remaining),
+            timeout=timeout
+        )
+    
+    def _create_completion(self, request_params: Dict, remaining: Optional[float]) -> str:
+        """
+        单次调用非流式接口并提取回复文本
+        
+        Args:
+            request_params: 请求参数
+            remaining: 剩余时间预算(秒)，作为本次HTTP请求超时
             
-            # 添加对话历史
-            if conversation_history:
-                messages.extend(conversation_history)
+        Returns:
+            AI生成的回复文本
             
-            # 添加用户消息
-            messages.append({
-                "role": "user",
-                "content": user_message
-            })
+        Raises:
+            ChatGLMError: 当API调用失败时抛出异常
+        """
+        try:
+            # 调用API
+            response = self.client.chat.completions.create(**request_params, **self._timeout_kwargs(remaining))
+        except Exception as e:
+            raise classify_error(e)
+        
+        # 提取并返回回复文本
+        try:
+            # 根据实际测试结果，response是Completion对象
+            if hasattr(response, 'choices') and len(response.choices) > 0:
+                choice = response.choices[0]
+                if hasattr(choice, 'message') and hasattr(choice.message, 'content'):
+                    content = choice.message.content
+                    return content if content else "响应为空"
             
-            # 构建请求参数
-            request_params = {
-                "model": self.model,
-                "messages": messages,
-                "stream": False  # 确保非流式响应
-            }
+            # 如果上面的方法不行，返回整个响应字符串用于调试
+            return str(response)
             
-            # 添加可选参数
-            if temperature is not None:
-                request_params["temperature"] = temperature
+        except Exception as parse_error:
+            raise ChatGLMError(f"ChatGLM API调用失败: 解析响应失败: {str(parse_error)}")
+    
+    def _open_stream(self, request_params: Dict, remaining: Optional[float],
+                     cancel_token: Optional[CancelToken] = None):
+        """
+        单次打开流式响应并读取到首个增量文本
+        
+        Returns:
+            (response, 块迭代器, 首个增量文本或None)
             
-            if max_tokens:
-                request_params["max_tokens"] = max_tokens
+        Raises:
+            ChatGLMError: 当API调用失败或已取消时抛出异常(取消不可重试)
+        """
+        if cancel_token is not None and cancel_token.cancelled:
+            raise ChatGLMError("ChatGLM 请求已取消", retryable=False)
+        try:
+            response = self.client.chat.completions.create(**request_params, **self._timeout_kwargs(remaining))
+        except Exception as e:
+            raise classify_error(e)
+        
+        # 等待首包期间被取消时关闭响应，阻塞在读取上的线程立即返回
+        remove = (cancel_token.add_callback(lambda: self._close_response(response))
+                  if cancel_token is not None else None)
+        chunks = iter(response)
+        try:
+            for chunk in chunks:
+                delta = self._extract_delta(chunk)
+                if delta:
+                    return response, chunks, delta
+            return response, chunks, None
+        except Exception as e:
+            self._close_response(response)
+            if cancel_token is not None and cancel_token.cancelled:
+                raise ChatGLMError("ChatGLM 请求已取消", retryable=False)
+            raise classify_error(e)
+        finally:
+            if remove is not None:
+                remove()
+    
+    @staticmethod
+    def _timeout_kwargs(remaining: Optional[float]) -> Dict:
+        """剩余预算转换为SDK请求超时参数"""
+        return {} if remaining is None else {"timeout": max(remaining, 0.001)}
+    
+    @staticmethod
+    def _close_response(response):
+        """关闭流式响应，释放底层连接"""
+        close = getattr(response, 'close', None)
+        if callable(close):
+            try:
+                close()
+            except Exception:
+                pass
+    
+    def stream_response(self,
+                        user_message: str,
+                        system_message: Optional[str] = None,
+                        temperature: Optional[float] = None,
+                        max_tokens: Optional[int] = None,
+                        conversation_history: Optional[List[Dict]] = None,
+                        timeout: Optional[float] = None,
+                        cancel_token: Optional[CancelToken] = None) -> Iterator[str]:
+        """
+        流式生成AI回复，逐段返回增量文本
+        
+        参数与 generate_response 相同。下游可配合 ai_core.llm.sentence.iter_sentences
+        按句送入TTS，无需等待完整回复生成。
+        首包前的等待受 timeout 预算约束并可触发对冲/重试，首包之后不再重试。
+        cancel_token 被取消时(可在其他线程)立即关闭底层连接，不再为无人收听的token付费
+        
+        Yields:
+            str: 模型输出的增量文本
             
-            # 调用API
-            response = self.client.chat.completions.create(**request_params)
+        Raises:
+            ChatGLMTimeoutError: 首包超出时间预算
+            ChatGLMError: 当API调用失败时抛出异常
+            TurnCancelled: 已被 cancel_token 取消
+        """
+        cache_key = self._cache_key(user_message, system_message, temperature,
+                                    max_tokens, conversation_history)
+        cached = self.cache.get(cache_key) if self.cache else None
+        if cached is not None:
+            yield cached
+            return
+        
+        request_params = self._build_request_params(
+            user_message, system_message, temperature, max_tokens,
+            conversation_history, stream=True
+        )
+        
+        try:
+            response, chunks, first_delta = self.resilience.call(
+                lambda remaining: self._open_stream(request_params, remaining, cancel_token),
+                timeout=timeout,
+                discard=lambda opened: self._close_response(opened[0]),
+                kind=FIRST_TOKEN
+            )
+        except ChatGLMError:
+            if cancel_token is not None and cancel_token.cancelled:
+                raise TurnCancelled(cancel_token.reason)
+            raise
+        
+        remove = (cancel_token.add_callback(lambda: self._close_response(response))
+                  if cancel_token is not None else None)
+        parts = []
+        try:
+            if first_delta:
+                parts.append(first_delta)
+                yield first_delta
+            for chunk in chunks:
+                delta = self._extract_delta(chunk)
+                if delta:
+                    parts.append(delta)
+                    yield delta
+            if cancel_token is not None and cancel_token.cancelled:
+                raise TurnCancelled(cancel_token.reason)
+            # 仅完整接收的回复写入缓存
+            if self.cache and parts:
+                self.cache.put(cache_key, "".join(parts))
+        except TurnCancelled:
+            raise
+        except Exception as e:
+            if cancel_token is not None and cancel_token.cancelled:
+                raise TurnCancelled(cancel_token.reason)
+            raise ChatGLMError(f"ChatGLM 流式响应中断: {str(e)}", retryable=False)
+        finally:
+            if remove is not None:
+                remove()
+            # 消费方提前停止时关闭底层连接，避免继续接收无用token
+            self._close_response(response)
+    
+    async def astream_response(self,
+                               user_message: str,
+                               system_message: Optional[str] = None,
+                               temperature: Optional[float] = None,
+                               max_tokens: Optional[int] = None,
+                               conversation_history: Optional[List[Dict]] = None,
+                               timeout: Optional[float] = None,
+                               cancel_token: Optional[CancelToken] = None) -> AsyncIterator[str]:
+        """
+        异步流式生成AI回复
+        
+        在后台线程中消费同步流，通过事件循环逐段转发增量文本，不阻塞事件循环。
+        参数与 stream_response 相同；消费方停止迭代(如任务被取消)时同样立即关闭底层连接
+        
+        Yields:
+            str: 模型输出的增量文本
             
-            # 提取并返回回复文本
+        Raises:
+            ChatGLMError: 当API调用失败时抛出异常
+            TurnCancelled: 已被 cancel_token 取消
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        # 本次迭代自己的令牌：外部令牌取消或消费方提前退出都会触发
+        stop = CancelToken()
+        unlink = stop.link(cancel_token)
+        done = object()
+        
+        def produce():
+            stream = self.stream_response(
+                user_message, system_message, temperature, max_tokens, conversation_history, timeout, stop
+            )
             try:
-                # 根据实际测试结果，response是Completion对象
-                if hasattr(response, 'choices') and len(response.choices) > 0:
-                    choice = response.choices[0]
-                    if hasattr(choice, 'message') and hasattr(choice.message, 'content'):
-                        content = choice.message.content
-                        return content if content else "响应为空"
-                
-                # 如果上面的方法不行，返回整个响应字符串用于调试
-                return str(response)
-                
-            except Exception as parse_error:
-                raise Exception(f"解析响应失败: {str(parse_error)}")
+                for delta in stream:
+                    if stop.cancelled:
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, delta)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                stream.close()
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+        
+        worker = threading.Thread(target=produce, name="chatglm-stream", daemon=True)
+        worker.start()
+        
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            unlink()
+            stop.cancel("consumer_closed")
+    
+    def _build_request_params(self,
+                              user_message: str,
+                              system_message: Optional[str],
+                              temperature: Optional[float],
+                              max_tokens: Optional[int],
+                              conversation_history: Optional[List[Dict]],
+                              stream: bool) -> Dict:
+        """
+        构建 chat.completions.create 的请求参数
+        
+        Returns:
+            请求参数字典
+        """
+        if system_message is None:
+            system_message = self.default_system_message
+        return build_request_params(
+            self.model, user_message, system_message, temperature, max_tokens,
+            conversation_history, stream
+        )
+    
+    def _cache_key(self,
+                   user_message: str,
+                   system_message: Optional[str],
+                   temperature: Optional[float],
+                   max_tokens: Optional[int],
+                   conversation_history: Optional[List[Dict]]) -> Optional[str]:
+        """计算回复缓存键，未启用缓存或请求不可缓存时返回None"""
+        if not self.cache:
+            return None
+        return self.cache.make_key(
+            self.model, user_message, system_message or self.default_system_message,
+            temperature, max_tokens, conversation_history
+        )
+    
+    @staticmethod
+    def _extract_delta(chunk) -> Optional[str]:
+        """从流式响应块中提取增量文本"""
+        choices = getattr(chunk, 'choices', None)
+        if not choices:
+            return None
+        delta = getattr(choices[0], 'delta', None)
+        if delta is None:
+            return None
+        return getattr(delta, 'content', None)
+    
+    def chat(self,
+             session_id: str,
+             user_message: str,
+             system_message: Optional[str] = None,
+             temperature: Optional[float] = None,
+             max_tokens: Optional[int] = None,
+             timeout: Optional[float] = None) -> str:
+        """
+        带会话历史的对话，历史由 history_store 按token预算自动裁剪
+        
+        Args:
+            session_id: 会话ID，如设备ID
+            user_message: 用户输入的消息
+            其余参数与 generate_response 相同
             
-        except Exception as e:
-            raise Exception(f"ChatGLM API调用失败: {str(e)}")
+        Returns:
+            AI生成的回复文本
+        """
+        history = self.history_store.get(session_id)
+        response = self.generate_response(
+            user_message, system_message, temperature, max_tokens,
+            conversation_history=history.get_messages(), timeout=timeout
+        )
+        history.add_turn(user_message, response)
+        return response
+    
+    def stream_chat(self,
+                    session_id: str,
+                    user_message: str,
+                    system_message: Optional[str] = None,
+                    temperature: Optional[float] = None,
+                    max_tokens: Optional[int] = None,
+                    timeout: Optional[float] = None) -> Iterator[str]:
+        """
+        带会话历史的流式对话，完整接收回复后写入历史
+        
+        Yields:
+            str: 模型输出的增量文本
+        """
+        history = self.history_store.get(session_id)
+        parts = []
+        for delta in self.stream_response(
+            user_message, system_message, temperature, max_tokens,
+            conversation_history=history.get_messages(), timeout=timeout
+        ):
+            parts.append(delta)
+            yield delta
+        history.add_turn(user_message, "".join(parts))
+    
+    @property
+    def speech_rate(self):
+        """语速估计器，可注册为 EdgeTTS.add_synthesis_listener 的回调: tts.add_synthesis_listener(chatglm.speech_rate.observe)"""
+        return self.voice_policy.estimator
+    
+    def generate_voice_response(self,
+                                user_message: str,
+                                target_seconds: Optional[float] = None,
+                                system_message: Optional[str] = None,
+                                temperature: Optional[float] = None,
+                                conversation_history: Optional[List[Dict]] = None,
+                                timeout: Optional[float] = None) -> str:
+        """
+        生成适合语音播报的回复，长度按目标播报时长控制
+        
+        Args:
+            user_message: 用户输入的消息
+            target_seconds: 目标播报时长(秒)，不指定时使用 VOICE_TARGET_SECONDS
+            其余参数与 generate_response 相同
+            
+        Returns:
+            AI生成的回复文本
+        """
+        params = self.voice_policy.build(system_message or self.default_system_message, target_seconds)
+        return self.generate_response(
+            user_message, params["system_message"], temperature, params["max_tokens"],
+            conversation_history, timeout
+        )
+    
+    def stream_voice_response(self,
+                              user_message: str,
+                              target_seconds: Optional[float] = None,
+                              system_message: Optional[str] = None,
+                              temperature: Optional[float] = None,
+                              conversation_history: Optional[List[Dict]] = None,
+                              timeout: Optional[float] = None) -> Iterator[str]:
+        """
+        流式生成适合语音播报的回复，长度按目标播报时长控制
+        
+        Yields:
+            str: 模型输出的增量文本
+        """
+        params = self.voice_policy.build(system_message or self.default_system_message, target_seconds)
+        yield from self.stream_response(
+            user_message, params["system_message"], temperature, params["max_tokens"],
+            conversation_history, timeout
+        )
+    
+    def summarize_history(self, previous_summary: Optional[str], messages: List[Dict]) -> str:
+        """
+        将旧轮次压缩为摘要，供 ConversationHistory 作为摘要函数使用
+        
+        Args:
+            previous_summary: 已有摘要
+            messages: 待压缩的消息
+            
+        Returns:
+            新摘要文本
+        """
+        role_names = {"user": "用户", "assistant": "助手", "system": "系统"}
+        lines = []
+        if previous_summary:
+            lines.append(f"已有摘要：{previous_summary}")
+        for message in messages:
+            lines.append(f"{role_names.get(message['role'], message['role'])}：{message.get('content', '')}")
+        return self.generate_response(
+            "\n".join(lines),
+            system_message="请将以下对话压缩为一段简短的中文摘要，保留用户的关键信息、偏好和未完成的问题，不超过100字。",
+            temperature=0.1,
+            max_tokens=200
+        )
     
     def set_default_system_message(self, message: str):
         """设置默认系统提示词"""
         self.default_system_message = message
     
+    def set_cache(self, cache: Optional[ResponseCache]):
+        """设置回复缓存，传入None关闭缓存"""
+        self.cache = cache
+    
     def get_model_info(self) -> Dict:
         """获取模型信息"""
+        import zai
         return {
             "model": self.model,
+            "base_url": self.base_url or "默认",
             "api_key_prefix": self.api_key[:10] + "..." if self.api_key else "未设置",
             "zai_version": zai.__version__,
-            "default_system_message": self.default_system_message
+            "default_system_message": self.default_system_message,
+            "cache": self.cache.get_stats() if self.cache else None,
+            "coalesce": self.inflight.get_stats() if self.inflight else None,
+            "resilience": self.resilience.get_stats()
         }
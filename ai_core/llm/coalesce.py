@@ -0,0 +1,164 @@
+"""在途请求合并(single-flight) - 相同的并发请求只向上游发起一次调用"""
+
+import json
+import asyncio
+import hashlib
+import threading
+from typing import Any, Awaitable, Callable, Dict
+
+
+def request_fingerprint(request_params: Dict) -> str:
+    """
+    计算请求参数指纹，消息与参数完全相同的请求指纹相同
+
+    Args:
+        request_params: chat/completions 请求参数
+
+    Returns:
+        str: SHA-256摘要
+    """
+    payload = json.dumps(request_params, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _Call:
+    """一次在途调用，供等待者共享结果"""
+
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    线程版在途请求合并
+
+    第一个到达的调用者(leader)执行真正的请求，
+    同一键上的后续调用者阻塞等待并共享其结果或异常
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "executions": 0, "coalesced": 0}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        执行(或加入)键为key的调用
+
+        Args:
+            key: 请求指纹
+            fn: 实际执行请求的函数
+
+        Returns:
+            fn 的返回值
+
+        Raises:
+            fn 抛出的异常会传递给所有等待者
+        """
+        with self._lock:
+            self._stats["calls"] += 1
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._stats["coalesced"] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._stats["executions"] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result
+
+    def get_stats(self) -> Dict:
+        """获取合并统计"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._calls)
+        return stats
+
+
+class AsyncSingleFlight:
+    """
+    协程版在途请求合并
+
+    真正的请求在独立任务中执行，单个等待者被取消不会影响其他等待者；
+    所有等待者都取消后才取消上游请求
+    """
+
+    def __init__(self):
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, int] = {}
+        self._stats = {"calls": 0, "executions": 0, "coalesced": 0}
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        执行(或加入)键为key的调用
+
+        Args:
+            key: 请求指纹
+            factory: 返回实际请求协程的函数，仅由第一个调用者执行
+
+        Returns:
+            请求结果
+
+        Raises:
+            请求抛出的异常会传递给所有等待者
+        """
+        self._stats["calls"] += 1
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._tasks[key] = task
+            self._waiters[key] = 0
+            self._stats["executions"] += 1
+            task.add_done_callback(lambda t, k=key: self._forget(k, t))
+        else:
+            self._stats["coalesced"] += 1
+
+        self._waiters[key] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done() and self._waiters.get(key) == 1:
+                # 最后一个等待者离开，上游结果已无人需要
+                task.cancel()
+            raise
+        finally:
+            if key in self._waiters and self._tasks.get(key) is task:
+                self._waiters[key] -= 1
+
+    def _forget(self, key: str, task: asyncio.Task):
+        """任务完成后移除登记，后续相同请求重新发起"""
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+            self._waiters.pop(key, None)
+        if not task.cancelled():
+            # 标记异常已被读取，避免无等待者时打印警告
+            task.exception()
+
+    def get_stats(self) -> Dict:
+        """获取合并统计"""
+        stats = dict(self._stats)
+        stats["in_flight"] = len(self._tasks)
+        return stats
@@ -0,0 +1,315 @@
+"""会话历史管理 - 增量计数token，按预算裁剪或摘要旧轮次"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    估算文本token数(无需加载分词器)
+
+    中日韩字符按1个token计，其余字符按约4个字符1个token计，
+    对GLM系列分词器是偏保守的估计
+
+    Args:
+        text: 文本内容
+
+    Returns:
+        int: 估算的token数
+    """
+    if not text:
+        return 0
+    cjk = 0
+    other = 0
+    for ch in text:
+        code = ord(ch)
+        if (0x4E00 <= code <= 0x9FFF or 0x3400 <= code <= 0x4DBF
+                or 0x3000 <= code <= 0x30FF or 0xAC00 <= code <= 0xD7AF or 0xFF00 <= code <= 0xFFEF):
+            cjk += 1
+        else:
+            other += 1
+    return cjk + (other + 3) // 4
+
+
+# 每条消息的角色/格式开销
+_MESSAGE_OVERHEAD = 4
+
+# 所有会话共用的摘要线程池，首次需要摘要时创建
+_summary_executor: Optional[ThreadPoolExecutor] = None
+_summary_executor_lock = threading.Lock()
+
+
+def _get_summary_executor() -> ThreadPoolExecutor:
+    global _summary_executor
+    if _summary_executor is None:
+        with _summary_executor_lock:
+            if _summary_executor is None:
+                _summary_executor = ThreadPoolExecutor(
+                    max_workers=int(os.getenv('LLM_HISTORY_SUMMARY_WORKERS', '4')),
+                    thread_name_prefix="history-summary"
+                )
+    return _summary_executor
+
+
+class ConversationHistory:
+    """
+    单个会话的对话历史
+
+    每条消息写入时计算一次token数并累计，裁剪时无需重新计数。
+    超出预算时，优先将最旧的轮次交给摘要函数压缩为一条摘要消息；
+    未配置摘要函数或摘要失败时直接丢弃最旧轮次。
+    摘要(通常是一次LLM请求)在后台线程池中生成，写入历史的调用不等待；
+    生成期间历史暂时保留原文，完成后替换旧轮次，下一轮对话即使用新摘要
+    """
+
+    def __init__(self,
+                 max_tokens: int = 2000,
+                 summarizer: Optional[Callable[[Optional[str], List[Dict]], str]] = None,
+                 keep_recent_turns: int = 2,
+                 token_counter: Callable[[str], int] = estimate_tokens):
+        """
+        初始化会话历史
+
+        Args:
+            max_tokens: 历史部分(含摘要)的token预算
+            summarizer: 摘要函数，参数为(已有摘要, 待压缩消息)，返回新摘要；None时直接丢弃旧轮次
+            keep_recent_turns: 始终保留原文的最近轮次数
+            token_counter: token计数函数
+        """
+        self.max_tokens = max_tokens
+        self.summarizer = summarizer
+        self.keep_recent_turns = keep_recent_turns
+        self.token_counter = token_counter
+        self.last_active = time.monotonic()
+
+        self._messages: List[Dict] = []
+        self._message_tokens: List[int] = []
+        self._total_tokens = 0
+        self._summary: Optional[str] = None
+        self._summary_tokens = 0
+        # 正在后台生成的摘要，同一会话同时只有一个
+        self._pending: Optional[Future] = None
+        self._lock = threading.Lock()
+        self._stats = {"dropped_messages": 0, "summarized_messages": 0,
+                       "summaries": 0, "summary_failures": 0}
+
+    def _count(self, message: Dict) -> int:
+        return self.token_counter(message.get("content") or "") + _MESSAGE_OVERHEAD
+
+    def append(self, role: str, content: str):
+        """
+        追加一条消息并在超出预算时裁剪
+
+        Args:
+            role: 角色(user/assistant)
+            content: 消息内容
+        """
+        self._extend([{"role": role, "content": content}])
+
+    def add_turn(self, user_message: str, assistant_message: str):
+        """追加一轮完整对话(两条消息一并写入后再裁剪，不会留下只有user的半轮)"""
+        self._extend([{"role": "user", "content": user_message},
+                      {"role": "assistant", "content": assistant_message}])
+
+    def _extend(self, messages: List[Dict]):
+        with self._lock:
+            for message in messages:
+                tokens = self._count(message)
+                self._messages.append(message)
+                self._message_tokens.append(tokens)
+                self._total_tokens += tokens
+            self.last_active = time.monotonic()
+            if self._pending is not None:
+                # 上一次摘要尚未完成，完成后的下一轮再裁剪
+                return
+            evicted = self._plan_eviction()
+            if not evicted:
+                return
+            if self.summarizer is not None:
+                self._pending = _get_summary_executor().submit(self._summarize, self._summary, evicted)
+                return
+        self._evict(evicted, None, False)
+
+    def _turn_end(self, start: int) -> int:
+        """返回从start开始的一轮(user + 随后的assistant)的结束位置"""
+        end = start + 1
+        while end < len(self._messages) and self._messages[end]["role"] != "user":
+            end += 1
+        return end
+
+    def _count_turns(self) -> int:
+        return sum(1 for m in self._messages if m["role"] == "user") or (1 if self._messages else 0)
+
+    def _plan_eviction(self) -> List[Dict]:
+        """
+        超出预算时计算需要移出的最旧轮次(持有锁时调用)
+
+        Returns:
+            List[Dict]: 待移出的消息，保留最近 keep_recent_turns 轮原文；无需移出时为空
+        """
+        if self._total_tokens + self._summary_tokens <= self.max_tokens:
+            return []
+
+        cut = 0
+        turns = self._count_turns()
+        removed_tokens = 0
+        while (self._total_tokens - removed_tokens + self._summary_tokens > self.max_tokens
+               and turns > self.keep_recent_turns and cut < len(self._messages)):
+            end = self._turn_end(cut)
+            removed_tokens += sum(self._message_tokens[cut:end])
+            cut = end
+            turns -= 1
+
+        if cut == 0:
+            # 最近轮次本身已超预算，只能丢弃摘要
+            if self._summary is not None:
+                self._set_summary(None)
+        return self._messages[:cut]
+
+    def _summarize(self, previous: Optional[str], evicted: List[Dict]):
+        """后台生成摘要(可能是一次网络请求)，失败时退回到直接丢弃"""
+        summary = None
+        failed = False
+        try:
+            summary = self.summarizer(previous, evicted) or None
+        except Exception as e:
+            print(f"⚠️ 历史摘要失败，直接丢弃旧轮次: {e}")
+            failed = True
+        finally:
+            self._evict(evicted, summary, failed)
+            with self._lock:
+                self._pending = None
+
+    def _evict(self, evicted: List[Dict], summary: Optional[str], failed: bool):
+        """用摘要(None表示直接丢弃)替换最旧轮次"""
+        with self._lock:
+            cut = len(evicted)
+            # 摘要期间其他调用可能已裁剪或清空历史，此时放弃本次结果
+            if len(self._messages) < cut or any(a is not b for a, b in zip(self._messages, evicted)):
+                return
+            del self._messages[:cut]
+            self._total_tokens -= sum(self._message_tokens[:cut])
+            del self._message_tokens[:cut]
+
+            if summary is None:
+                self._stats["dropped_messages"] += cut
+                self._stats["summary_failures"] += failed
+            else:
+                self._set_summary(summary)
+                self._stats["summaries"] += 1
+                self._stats["summarized_messages"] += cut
+            # 摘要期间新增的轮次或过长的摘要留给下一轮裁剪(最近轮次本身超预算时丢弃摘要)
+
+    def _set_summary(self, summary: Optional[str]):
+        self._summary = summary
+        self._summary_tokens = self.token_counter(summary) + _MESSAGE_OVERHEAD if summary else 0
+
+    def get_messages(self) -> List[Dict]:
+        """
+        获取可直接作为 conversation_history 传入的消息列表
+
+        Returns:
+            List[Dict]: [摘要消息(如有)] + 最近的原文消息
+        """
+        with self._lock:
+            messages = []
+            if self._summary:
+                messages.append({"role": "system", "content": f"此前对话摘要：{self._summary}"})
+            messages.extend(dict(m) for m in self._messages)
+            return messages
+
+    @property
+    def token_count(self) -> int:
+        """当前历史(含摘要)的token数"""
+        with self._lock:
+            return self._total_tokens + self._summary_tokens
+
+    def clear(self):
+        """清空历史"""
+        with self._lock:
+            self._messages.clear()
+            self._message_tokens.clear()
+            self._total_tokens = 0
+            self._set_summary(None)
+
+    def get_stats(self) -> Dict:
+        """获取裁剪/摘要统计"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["messages"] = len(self._messages)
+            stats["tokens"] = self._total_tokens + self._summary_tokens
+            stats["has_summary"] = self._summary is not None
+        return stats
+
+
+class HistoryStore:
+    """
+    按会话ID管理对话历史
+
+    会话数超过上限或空闲超时后淘汰最久未活动的会话
+    """
+
+    def __init__(self,
+                 max_tokens: Optional[int] = None,
+                 summarizer: Optional[Callable[[Optional[str], List[Dict]], str]] = None,
+                 keep_recent_turns: Optional[int] = None,
+                 max_sessions: Optional[int] = None,
+                 idle_timeout: Optional[float] = None):
+        """
+        初始化会话历史存储，未指定的参数读取 LLM_HISTORY_* 环境变量
+
+        Args:
+            max_tokens: 每个会话的历史token预算
+            summarizer: 摘要函数，None时直接丢弃旧轮次
+            keep_recent_turns: 始终保留原文的最近轮次数
+            max_sessions: 最大会话数
+            idle_timeout: 会话空闲超时(秒)
+        """
+        self.max_tokens = max_tokens or int(os.getenv('LLM_HISTORY_MAX_TOKENS', '2000'))
+        self.keep_recent_turns = (keep_recent_turns if keep_recent_turns is not None
+                                  else int(os.getenv('LLM_HISTORY_KEEP_RECENT_TURNS', '2')))
+        self.max_sessions = max_sessions or int(os.getenv('LLM_HISTORY_MAX_SESSIONS', '10000'))
+        self.idle_timeout = idle_timeout or float(os.getenv('LLM_HISTORY_IDLE_TIMEOUT', '1800'))
+        self.summarizer = summarizer
+        self._sessions: "OrderedDict[str, ConversationHistory]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> ConversationHistory:
+        """
+        获取(或创建)会话历史
+
+        Args:
+            session_id: 会话ID，如设备ID
+
+        Returns:
+            ConversationHistory: 会话历史
+        """
+        now = time.monotonic()
+        with self._lock:
+            history = self._sessions.get(session_id)
+            if history is not None and now - history.last_active > self.idle_timeout:
+                history = None
+            if history is None:
+                history = ConversationHistory(
+                    max_tokens=self.max_tokens,
+                    summarizer=self.summarizer,
+                    keep_recent_turns=self.keep_recent_turns,
+                )
+                self._sessions[session_id] = history
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            return history
+
+    def drop(self, session_id: str):
+        """删除会话历史"""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
@@ -0,0 +1,480 @@
+"""LLM 调用弹性策略 - 端到端时间预算、对冲请求与抖动退避重试"""
+
+import os
+import time
+import random
+import asyncio
+import inspect
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class ChatGLMError(Exception):
+    """ChatGLM 调用失败"""
+
+    def __init__(self, message: str, retryable: bool = False, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.status_code = status_code
+
+
+class ChatGLMTimeoutError(ChatGLMError):
+    """ChatGLM 调用超出时间预算"""
+
+    def __init__(self, message: str):
+        super().__init__(message, retryable=True)
+
+
+# 可重试的HTTP状态码：限流与服务端错误
+_RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+def classify_error(error: BaseException, prefix: str = "ChatGLM API调用失败") -> ChatGLMError:
+    """
+    将底层异常转换为 ChatGLMError 并判断是否可重试
+
+    Args:
+        error: 原始异常
+        prefix: 错误信息前缀
+
+    Returns:
+        ChatGLMError: 带有 retryable 标记的异常
+    """
+    if isinstance(error, ChatGLMError):
+        return error
+
+    status_code = getattr(error, 'status_code', None)
+    if status_code is None:
+        response = getattr(error, 'response', None)
+        status_code = getattr(response, 'status_code', None)
+
+    if isinstance(status_code, int):
+        retryable = status_code in _RETRYABLE_STATUS
+    else:
+        # 无状态码时按异常类型判断：超时与连接类错误可重试
+        name = type(error).__name__.lower()
+        retryable = (isinstance(error, (TimeoutError, ConnectionError))
+                     or 'timeout' in name or 'connect' in name or 'network' in name)
+
+    if isinstance(error, TimeoutError) or 'timeout' in type(error).__name__.lower():
+        return ChatGLMTimeoutError(f"{prefix}: 请求超时 ({error})")
+    return ChatGLMError(f"{prefix}: {str(error)}", retryable=retryable,
+                        status_code=status_code if isinstance(status_code, int) else None)
+
+
+class Deadline:
+    """端到端时间预算"""
+
+    def __init__(self, timeout: Optional[float]):
+        """
+        Args:
+            timeout: 总预算(秒)，None表示不限制
+        """
+        self.expires_at = None if timeout is None else time.monotonic() + timeout
+
+    def remaining(self) -> Optional[float]:
+        """剩余时间(秒)，不限制时返回None"""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        """预算是否已耗尽"""
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+
+# 延迟样本的类别：非流式调用为完整响应耗时，流式调用为首包耗时，两者分布不同，分开统计
+COMPLETION = "completion"
+FIRST_TOKEN = "first_token"
+
+
+class LatencyTracker:
+    """滑动窗口延迟统计"""
+
+    def __init__(self, window: int = 200):
+        """
+        Args:
+            window: 保留的最近样本数
+        """
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        """记录一次延迟"""
+        with self._lock:
+            self._samples.append(seconds)
+
+    def count(self) -> int:
+        """样本数"""
+        with self._lock:
+            return len(self._samples)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """
+        计算延迟分位数
+
+        Args:
+            p: 分位数(0-100)
+
+        Returns:
+            Optional[float]: 分位延迟(秒)，无样本时返回None
+        """
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, max(0, int(round(p / 100.0 * (len(samples) - 1)))))
+        return samples[index]
+
+
+class RetryPolicy:
+    """带完全抖动(full jitter)的指数退避重试策略"""
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.2, max_delay: float = 2.0):
+        """
+        Args:
+            max_attempts: 最大尝试次数(含首次)
+            base_delay: 退避基准时长(秒)
+            max_delay: 单次退避上限(秒)
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, retry: int) -> float:
+        """
+        计算第retry次重试前的等待时长
+
+        Args:
+            retry: 重试序号(从1开始)
+
+        Returns:
+            float: 等待秒数，在 [0, min(max_delay, base_delay * 2^(retry-1))] 内均匀随机
+        """
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (retry - 1)))
+        return random.uniform(0, ceiling)
+
+
+class ResilientCaller:
+    """
+    带时间预算的对冲+重试调用器
+
+    每轮调用先发出主请求；若在同类调用(完整响应/首包)最近延迟的指定分位数内仍未返回，
+    再发出一份相同的对冲请求，取先成功者，另一份结果被丢弃。
+    可重试错误按抖动退避重试，每次等待与请求都受剩余端到端预算约束
+    """
+
+    def __init__(self,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 timeout: Optional[float] = None,
+                 hedge_percentile: Optional[float] = 95.0,
+                 hedge_min_samples: int = 20,
+                 hedge_min_delay: float = 0.05,
+                 max_workers: int = 32):
+        """
+        Args:
+            retry_policy: 重试策略，默认 RetryPolicy()
+            timeout: 默认端到端预算(秒)，None表示不限制
+            hedge_percentile: 触发对冲的延迟分位数，None表示不对冲
+            hedge_min_samples: 同类调用的样本数达到该值后才启用对冲
+            hedge_min_delay: 对冲等待的下限(秒)
+            max_workers: 同步调用使用的线程池大小
+        """
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.timeout = timeout
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_min_delay = hedge_min_delay
+        self.latencies = {COMPLETION: LatencyTracker(), FIRST_TOKEN: LatencyTracker()}
+        self._max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "attempts": 0, "hedges": 0, "hedge_wins": 0,
+                       "retries": 0, "timeouts": 0, "failures": 0}
+
+    @classmethod
+    def from_env(cls) -> 'ResilientCaller':
+        """根据 LLM_* 环境变量创建调用器"""
+        timeout = os.getenv('LLM_REQUEST_TIMEOUT', '60')
+        hedge_percentile = float(os.getenv('LLM_HEDGE_PERCENTILE', '95') or 0)
+        return cls(
+            retry_policy=RetryPolicy(
+                max_attempts=int(os.getenv('LLM_MAX_ATTEMPTS', '3')),
+                base_delay=float(os.getenv('LLM_RETRY_BASE_DELAY', '0.2')),
+                max_delay=float(os.getenv('LLM_RETRY_MAX_DELAY', '2.0')),
+            ),
+            timeout=float(timeout) if timeout else None,
+            hedge_percentile=hedge_percentile if hedge_percentile > 0 else None,
+            hedge_min_samples=int(os.getenv('LLM_HEDGE_MIN_SAMPLES', '20')),
+            hedge_min_delay=float(os.getenv('LLM_HEDGE_MIN_DELAY', '0.05')),
+        )
+
+    def hedge_delay(self, kind: str = COMPLETION) -> Optional[float]:
+        """
+        当前的对冲等待时长，样本不足或未启用时返回None
+
+        Args:
+            kind: 调用类别，COMPLETION(完整响应) 或 FIRST_TOKEN(流式首包)
+        """
+        latency = self.latencies[kind]
+        if self.hedge_percentile is None or latency.count() < self.hedge_min_samples:
+            return None
+        return max(self.hedge_min_delay, latency.percentile(self.hedge_percentile))
+
+    def _bump(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def get_stats(self) -> Dict:
+        """获取调用统计"""
+        with self._lock:
+            stats = dict(self._stats)
+        for kind, latency in self.latencies.items():
+            stats[kind] = {
+                "latency_samples": latency.count(),
+                "latency_p50": latency.percentile(50),
+                "latency_p95": latency.percentile(95),
+                "hedge_delay": self.hedge_delay(kind),
+            }
+        return stats
+
+    # ------------------------------------------------------------------
+    # 同步调用
+    # ------------------------------------------------------------------
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self._max_workers, thread_name_prefix="chatglm-attempt"
+                    )
+        return self._executor
+
+    def call(self,
+             attempt: Callable[[Optional[float]], Any],
+             timeout: Optional[float] = None,
+             discard: Optional[Callable[[Any], None]] = None,
+             kind: str = COMPLETION) -> Any:
+        """
+        同步执行带对冲与重试的调用
+
+        Args:
+            attempt: 单次请求函数，参数为剩余预算(秒)，返回首包结果
+            timeout: 端到端预算(秒)，None时使用默认预算
+            discard: 处理被丢弃的对冲结果(如关闭流)，可选
+            kind: 延迟统计类别，返回完整响应为 COMPLETION，返回流的首包为 FIRST_TOKEN
+
+        Returns:
+            最先成功的请求结果
+
+        Raises:
+            ChatGLMTimeoutError: 预算耗尽
+            ChatGLMError: 不可重试错误或重试次数用尽
+        """
+        deadline = Deadline(timeout if timeout is not None else self.timeout)
+        self._bump("calls")
+        last_error: Optional[ChatGLMError] = None
+
+        for retry in range(self.retry_policy.max_attempts):
+            if retry > 0:
+                delay = self.retry_policy.backoff(retry)
+                remaining = deadline.remaining()
+                if remaining is not None and remaining <= delay:
+                    break
+                self._bump("retries")
+                time.sleep(delay)
+            try:
+                return self._hedged_once(attempt, deadline, discard, kind)
+            except ChatGLMError as e:
+                last_error = e
+                if not e.retryable or deadline.expired():
+                    break
+
+        self._bump("failures")
+        if deadline.expired():
+            self._bump("timeouts")
+            raise ChatGLMTimeoutError("ChatGLM API调用超时: 超出时间预算") from last_error
+        raise last_error or ChatGLMError("ChatGLM API调用失败")
+
+    def _hedged_once(self, attempt, deadline: Deadline, discard, kind: str) -> Any:
+        """执行一轮(主请求 + 可能的对冲请求)"""
+        executor = self._get_executor()
+        started = {}
+
+        def submit():
+            self._bump("attempts")
+            future = executor.submit(attempt, deadline.remaining())
+            started[future] = time.monotonic()
+            return future
+
+        primary = submit()
+        pending = {primary}
+        hedge_delay = self.hedge_delay(kind)
+        hedged = hedge_delay is None
+        round_start = time.monotonic()
+        last_error: Optional[ChatGLMError] = None
+
+        while pending:
+            remaining = deadline.remaining()
+            wait_for = remaining
+            if not hedged:
+                until_hedge = max(0.0, hedge_delay - (time.monotonic() - round_start))
+                wait_for = until_hedge if remaining is None else min(remaining, until_hedge)
+
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                error = future.exception()
+                if error is None:
+                    self.latencies[kind].record(time.monotonic() - started[future])
+                    if future is not primary:
+                        self._bump("hedge_wins")
+                    self._abandon(pending, discard)
+                    return future.result()
+                last_error = classify_error(error)
+
+            if not pending:
+                break
+            if deadline.expired():
+                self._abandon(pending, discard)
+                raise ChatGLMTimeoutError("ChatGLM API调用超时: 超出时间预算")
+            if not hedged and time.monotonic() - round_start >= hedge_delay:
+                # 主请求迟迟没有首包，发出对冲请求
+                hedged = True
+                self._bump("hedges")
+                pending.add(submit())
+
+        raise last_error or ChatGLMError("ChatGLM API调用失败")
+
+    @staticmethod
+    def _abandon(pending, discard):
+        """放弃仍在进行的请求，其结果到达后交给discard释放"""
+        for future in pending:
+            def release(f):
+                if discard is not None and not f.cancelled() and f.exception() is None:
+                    try:
+                        discard(f.result())
+                    except Exception:
+                        pass
+            if not future.cancel():
+                future.add_done_callback(release)
+
+    # ------------------------------------------------------------------
+    # 异步调用
+    # ------------------------------------------------------------------
+
+    async def acall(self,
+                    attempt: Callable[[Optional[float]], Awaitable[Any]],
+                    timeout: Optional[float] = None,
+                    discard: Optional[Callable[[Any], Any]] = None,
+                    kind: str = COMPLETION) -> Any:
+        """
+        异步执行带对冲与重试的调用，落败的请求会被直接取消
+
+        Args:
+            attempt: 单次请求协程函数，参数为剩余预算(秒)，返回首包结果
+            timeout: 端到端预算(秒)，None时使用默认预算
+            discard: 处理被丢弃的对冲结果(可为协程函数)，可选
+            kind: 延迟统计类别，返回完整响应为 COMPLETION，返回流的首包为 FIRST_TOKEN
+
+        Returns:
+            最先成功的请求结果
+
+        Raises:
+            ChatGLMTimeoutError: 预算耗尽
+            ChatGLMError: 不可重试错误或重试次数用尽
+        """
+        deadline = Deadline(timeout if timeout is not None else self.timeout)
+        self._bump("calls")
+        last_error: Optional[ChatGLMError] = None
+
+        for retry in range(self.retry_policy.max_attempts):
+            if retry > 0:
+                delay = self.retry_policy.backoff(retry)
+                remaining = deadline.remaining()
+                if remaining is not None and remaining <= delay:
+                    break
+                self._bump("retries")
+                await asyncio.sleep(delay)
+            try:
+                return await self._ahedged_once(attempt, deadline, discard, kind)
+            except ChatGLMError as e:
+                last_error = e
+                if not e.retryable or deadline.expired():
+                    break
+
+        self._bump("failures")
+        if deadline.expired():
+            self._bump("timeouts")
+            raise ChatGLMTimeoutError("ChatGLM API调用超时: 超出时间预算") from last_error
+        raise last_error or ChatGLMError("ChatGLM API调用失败")
+
+    async def _ahedged_once(self, attempt, deadline: Deadline, discard, kind: str) -> Any:
+        """异步执行一轮(主请求 + 可能的对冲请求)"""
+        started = {}
+
+        def submit():
+            self._bump("attempts")
+            task = asyncio.ensure_future(attempt(deadline.remaining()))
+            started[task] = time.monotonic()
+            return task
+
+        primary = submit()
+        pending = {primary}
+        hedge_delay = self.hedge_delay(kind)
+        hedged = hedge_delay is None
+        round_start = time.monotonic()
+        last_error: Optional[ChatGLMError] = None
+
+        try:
+            while pending:
+                remaining = deadline.remaining()
+                wait_for = remaining
+                if not hedged:
+                    until_hedge = max(0.0, hedge_delay - (time.monotonic() - round_start))
+                    wait_for = until_hedge if remaining is None else min(remaining, until_hedge)
+
+                done, pending = await asyncio.wait(pending, timeout=wait_for,
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.cancelled():
+                        continue
+                    error = task.exception()
+                    if error is None:
+                        self.latencies[kind].record(time.monotonic() - started[task])
+                        if task is not primary:
+                            self._bump("hedge_wins")
+                        # 其余已完成的成功结果同样需要释放
+                        for other in done:
+                            if other is not task and not other.cancelled() and other.exception() is None:
+                                await self._adiscard(discard, other.result())
+                        return task.result()
+                    last_error = classify_error(error)
+
+                if not pending:
+                    break
+                if deadline.expired():
+                    raise ChatGLMTimeoutError("ChatGLM API调用超时: 超出时间预算")
+                if not hedged and time.monotonic() - round_start >= hedge_delay:
+                    # 主请求迟迟没有首包，发出对冲请求
+                    hedged = True
+                    self._bump("hedges")
+                    pending.add(submit())
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise last_error or ChatGLMError("ChatGLM API调用失败")
+
+    @staticmethod
+    async def _adiscard(discard, result):
+        if discard is None:
+            return
+        try:
+            outcome = discard(result)
+            if inspect.isawaitable(outcome):
+                await outcome
+        except Exception:
+            pass
@@ -0,0 +1,222 @@
+"""句子边界切分工具 - 将流式LLM输出切分为可送入TTS的完整句子"""
+
+from typing import Iterable, Iterator, AsyncIterable, AsyncIterator, List, Optional
+
+# 中文句末标点，出现即为句子边界
+CJK_TERMINATORS = "。！？；…"
+
+# 英文句末标点，后接空白或文本结束时才视为边界（避免切开 3.14 等）
+ASCII_TERMINATORS = ".!?;"
+
+# 以句点结尾的常见英文缩写(小写、不含末尾句点)，其后的句点不视为边界
+ABBREVIATIONS = frozenset({"e.g", "i.e", "mr", "mrs", "ms", "dr", "prof", "vs", "fig", "approx"})
+
+# 紧跟在句末标点后的闭合符号，归入前一句
+CLOSING_MARKS = "”’」』）】》)]\"'"
+
+# 句子过长时允许切分的次级标点
+SOFT_BREAKS = "，,、：:"
+
+
+class SentenceSplitter:
+    """
+    增量句子切分器
+
+    逐段喂入LLM增量文本，每当凑齐完整句子时立即返回，
+    使TTS可以在LLM仍在生成时就开始合成第一句
+    """
+
+    def __init__(self, min_chars: int = 2, max_chars: Optional[int] = None):
+        """
+        初始化句子切分器
+
+        Args:
+            min_chars: 句子最少字符数，过短的句子并入下一句（如"好。"）
+            max_chars: 句子最大字符数，超出后在逗号等次级标点处提前切分，None表示不限制
+        """
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self._buffer = ""
+
+    def feed(self, delta: str) -> List[str]:
+        """
+        喂入一段增量文本
+
+        Args:
+            delta: LLM输出的增量文本
+
+        Returns:
+            List[str]: 本次凑齐的完整句子列表（可能为空）
+        """
+        if delta:
+            self._buffer += delta
+        return self._drain(final=False)
+
+    def flush(self) -> Optional[str]:
+        """
+        结束输入，返回缓冲区中剩余的文本
+
+        Returns:
+            Optional[str]: 剩余文本，为空时返回None
+        """
+        # 可切分的句子已在feed时取出，残余部分不再受min_chars限制，整体作为最后一句
+        rest = self._buffer.strip()
+        self._buffer = ""
+        return rest or None
+
+    def reset(self):
+        """清空缓冲区"""
+        self._buffer = ""
+
+    def _find_boundary(self, text: str, final: bool) -> int:
+        """
+        查找第一个句子边界
+
+        Returns:
+            int: 句子结束位置（不含），未找到返回-1
+        """
+        i = 0
+        length = len(text)
+        while i < length:
+            ch = text[i]
+            if ch in CJK_TERMINATORS or ch == "\n":
+                end = i + 1
+            elif ch in ASCII_TERMINATORS:
+                # 需要看到下一个字符才能判断是否为句末
+                if i + 1 >= length:
+                    return length if final else -1
+                nxt = text[i + 1]
+                if not (nxt.isspace() or nxt in CLOSING_MARKS or nxt in ASCII_TERMINATORS):
+                    i += 1
+                    continue
+                if ch == "." and self._is_abbreviation(text, i):
+                    i += 1
+                    continue
+                end = i + 1
+            else:
+                i += 1
+                continue
+
+            # 吞掉连续的句末标点和闭合符号，如 "？！"、"。」"
+            while end < length and (text[end] in CJK_TERMINATORS or text[end] in ASCII_TERMINATORS
+                                    or text[end] in CLOSING_MARKS):
+                end += 1
+            if end >= length and not final and text[end - 1] != "\n":
+                # 句末标点位于缓冲区末尾时，后续的闭合符号可能还未到齐
+                return -1
+            return end
+        return -1
+
+    @staticmethod
+    def _is_abbreviation(text: str, dot: int) -> bool:
+        """dot 位置的句点是否属于 ABBREVIATIONS 中的缩写，如 "e.g."、"Mr." """
+        start = dot
+        while start > 0 and (text[start - 1].isalpha() or text[start - 1] == "."):
+            start -= 1
+        return text[start:dot].lower() in ABBREVIATIONS
+
+    def _find_soft_break(self, text: str) -> int:
+        """在超长文本中查找次级标点作为切分点，优先取max_chars以内的最后一个"""
+        limit = min(len(text), self.max_chars)
+        for i in range(limit - 1, 0, -1):
+            if text[i] in SOFT_BREAKS:
+                return i + 1
+        for i in range(limit, len(text)):
+            if text[i] in SOFT_BREAKS:
+                return i + 1
+        return -1
+
+    def _drain(self, final: bool) -> List[str]:
+        """从缓冲区提取所有完整句子"""
+        sentences = []
+        search_from = 0
+        while True:
+            end = self._find_boundary(self._buffer[search_from:], final)
+            if end < 0:
+                if self.max_chars and len(self._buffer) > self.max_chars:
+                    cut = self._find_soft_break(self._buffer)
+                    if cut > 0:
+                        sentence = self._buffer[:cut].strip()
+                        self._buffer = self._buffer[cut:]
+                        search_from = 0
+                        if sentence:
+                            sentences.append(sentence)
+                        continue
+                break
+            end += search_from
+            sentence = self._buffer[:end].strip()
+            if len(sentence) < self.min_chars and end < len(self._buffer):
+                # 句子过短，继续向后寻找边界
+                search_from = end
+                continue
+            if len(sentence) < self.min_chars and not final:
+                break
+            self._buffer = self._buffer[end:]
+            search_from = 0
+            if sentence:
+                sentences.append(sentence)
+        return sentences
+
+
+def split_sentences(text: str, min_chars: int = 2, max_chars: Optional[int] = None) -> List[str]:
+    """
+    将完整文本切分为句子列表
+
+    Args:
+        text: 要切分的文本
+        min_chars: 句子最少字符数
+        max_chars: 句子最大字符数，None表示不限制
+
+    Returns:
+        List[str]: 句子列表
+    """
+    splitter = SentenceSplitter(min_chars=min_chars, max_chars=max_chars)
+    sentences = splitter.feed(text)
+    rest = splitter.flush()
+    if rest:
+        sentences.append(rest)
+    return sentences
+
+
+def iter_sentences(deltas: Iterable[str], min_chars: int = 2,
+                   max_chars: Optional[int] = None) -> Iterator[str]:
+    """
+    将增量文本流转换为句子流
+
+    Args:
+        deltas: 增量文本迭代器，如 ChatGLM.stream_response() 的输出
+        min_chars: 句子最少字符数
+        max_chars: 句子最大字符数，None表示不限制
+
+    Yields:
+        str: 完整句子
+    """
+    splitter = SentenceSplitter(min_chars=min_chars, max_chars=max_chars)
+    for delta in deltas:
+        for sentence in splitter.feed(delta):
+            yield sentence
+    rest = splitter.flush()
+    if rest:
+        yield rest
+
+
+async def aiter_sentences(deltas: AsyncIterable[str], min_chars: int = 2,
+                          max_chars: Optional[int] = None) -> AsyncIterator[str]:
+    """
+    将异步增量文本流转换为句子流
+
+    Args:
+        deltas: 异步增量文本迭代器，如 ChatGLM.astream_response() 的输出
+        min_chars: 句子最少字符数
+        max_chars: 句子最大字符数，None表示不限制
+
+    Yields:
+        str: 完整句子
+    """
+    splitter = SentenceSplitter(min_chars=min_chars, max_chars=max_chars)
+    async for delta in deltas:
+        for sentence in splitter.feed(delta):
+            yield sentence
+    rest = splitter.flush()
+    if rest:
+        yield rest
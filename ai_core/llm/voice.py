@@ -0,0 +1,120 @@
+"""语音回复长度控制 - 按目标播报时长推导 max_tokens 与简洁风格提示词"""
+
+import os
+import math
+import threading
+from typing import Callable, Dict, Optional
+
+from .history import estimate_tokens
+
+
+class SpeechRateEstimator:
+    """
+    语速估计器：每秒语音对应的token数
+
+    以指数滑动平均从历次TTS输出(文本, 音频时长)中学习，
+    语速、音色变化后会逐步收敛到新的值
+    """
+
+    def __init__(self,
+                 initial_tokens_per_second: Optional[float] = None,
+                 smoothing: float = 0.2,
+                 token_counter: Callable[[str], int] = estimate_tokens):
+        """
+        初始化语速估计器
+
+        Args:
+            initial_tokens_per_second: 初始语速，默认读取 VOICE_TOKENS_PER_SECOND (中文约4.5)
+            smoothing: 滑动平均系数(0-1)，越大越偏向最近的样本
+            token_counter: token计数函数，需与LLM侧计数口径一致
+        """
+        if initial_tokens_per_second is None:
+            initial_tokens_per_second = float(os.getenv('VOICE_TOKENS_PER_SECOND', '4.5'))
+        self.tokens_per_second = initial_tokens_per_second
+        self.smoothing = smoothing
+        self.token_counter = token_counter
+        self.samples = 0
+        self._lock = threading.Lock()
+
+    def observe(self, text: str, audio_seconds: float):
+        """
+        记录一次TTS输出
+
+        可直接注册为 EdgeTTS.add_synthesis_listener 的回调
+
+        Args:
+            text: 合成的文本
+            audio_seconds: 生成的音频时长(秒)
+        """
+        tokens = self.token_counter(text)
+        # 过短的样本受首尾静音影响大，不参与学习
+        if tokens < 4 or audio_seconds < 0.5:
+            return
+        rate = tokens / audio_seconds
+        with self._lock:
+            if self.samples == 0:
+                self.tokens_per_second = rate
+            else:
+                self.tokens_per_second += self.smoothing * (rate - self.tokens_per_second)
+            self.samples += 1
+
+    def tokens_for(self, seconds: float) -> int:
+        """目标时长可容纳的token数"""
+        with self._lock:
+            return int(math.ceil(self.tokens_per_second * seconds))
+
+    def seconds_for(self, text: str) -> float:
+        """估算文本的播报时长(秒)"""
+        with self._lock:
+            rate = self.tokens_per_second
+        return self.token_counter(text) / rate if rate > 0 else 0.0
+
+
+class VoiceReplyPolicy:
+    """
+    语音回复策略
+
+    根据目标播报时长给出 max_tokens 上限与简洁风格的系统提示词，
+    回复越短，LLM生成、TTS合成与下行传输的耗时都越短
+    """
+
+    def __init__(self,
+                 estimator: Optional[SpeechRateEstimator] = None,
+                 target_seconds: Optional[float] = None,
+                 headroom: float = 1.3,
+                 min_tokens: int = 16):
+        """
+        初始化语音回复策略
+
+        Args:
+            estimator: 语速估计器
+            target_seconds: 默认目标播报时长(秒)，默认读取 VOICE_TARGET_SECONDS
+            headroom: max_tokens 相对目标长度的余量，避免句子被截断
+            min_tokens: max_tokens 下限
+        """
+        self.estimator = estimator or SpeechRateEstimator()
+        self.target_seconds = target_seconds or float(os.getenv('VOICE_TARGET_SECONDS', '15'))
+        self.headroom = headroom
+        self.min_tokens = min_tokens
+
+    def build(self, base_system_message: str, target_seconds: Optional[float] = None) -> Dict:
+        """
+        生成语音回复的请求参数
+
+        Args:
+            base_system_message: 基础系统提示词
+            target_seconds: 目标播报时长(秒)，None时使用默认值
+
+        Returns:
+            Dict: 包含 system_message 与 max_tokens，可直接传给 generate_response
+        """
+        seconds = target_seconds or self.target_seconds
+        target_tokens = self.estimator.tokens_for(seconds)
+        max_tokens = max(self.min_tokens, int(math.ceil(target_tokens * self.headroom)))
+        style = (f"这是语音对话，回答会被直接朗读。请用口语化的简洁中文回答，"
+                 f"控制在约{target_tokens}字以内(约{seconds:.0f}秒)，"
+                 f"先给结论，不要使用列表、Markdown、表情符号或代码。")
+        return {
+            "system_message": f"{base_system_message}\n{style}",
+            "max_tokens": max_tokens,
+        }
@@ -0,0 +1,43 @@
+"""
+流式语音对话流水线
+
+ASR定稿 → 流式LLM → 分句 → 流式TTS → 流式Opus编码，各阶段重叠执行，
+并记录首个音频字节时间等阶段耗时；需要留档的产物由 ArtifactWriter 在后台写入；
+用户打断时通过 CancelToken 立即取消本轮各阶段的工作；
+AdmissionController 在共享的 ASR/LLM/TTS 前分级排队，过载时快速拒绝；
+speculate() 按稳定的中间识别结果提前请求LLM，最终结果一致时直接沿用
+
+注意：导出对象采用懒加载，仅在首次访问时导入
+"""
+
+import importlib
+
+# 导出名称 -> 所在子模块
+_LAZY_EXPORTS = {
+    'VoicePipeline': '.voice',    # 流式语音流水线
+    'PipelineMetrics': '.voice',  # 阶段耗时
+    'ArtifactWriter': '.artifacts',  # 产物异步落盘
+    'CancelToken': '..cancel',    # 协作式取消令牌(打断)，定义在 ai_core.cancel
+    'TurnCancelled': '..cancel',  # 本轮已取消
+    'AdmissionController': '.admission',  # 各阶段准入控制
+    'StageLimiter': '.admission',  # 单阶段容量、优先级与截止时间调度
+    'Overloaded': '.admission',   # 过载快速拒绝
+    'Speculation': '.speculative',  # 按中间识别结果提前发起的LLM请求
+    'SpeculationStats': '.speculative',  # 推测命中率与节省的时间
+}
+
+__all__ = list(_LAZY_EXPORTS)
+
+
+def __getattr__(name):
+    """按需导入导出对象"""
+    if name in _LAZY_EXPORTS:
+        module = importlib.import_module(_LAZY_EXPORTS[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals().keys()) + __all__)
@@ -0,0 +1,337 @@
+"""准入控制 - 共享模型资源(ASR/LLM/TTS)的分级排队、按截止时间调度与快速拒绝"""
+
+import os
+import time
+import heapq
+import asyncio
+import itertools
+import threading
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+# 优先级类别，数值越小越优先
+INTERACTIVE = "interactive"
+BATCH = "batch"
+PRIORITIES = {INTERACTIVE: 0, BATCH: 1}
+
+# 各阶段默认容量(同时执行数)
+_DEFAULT_CAPACITY = {"asr": 2, "llm": 32, "tts": 16}
+
+
+class Overloaded(Exception):
+    """资源过载，请求被快速拒绝"""
+
+    def __init__(self, stage: str, reason: str):
+        super().__init__(f"{stage} 过载: {reason}")
+        self.stage = stage
+        self.reason = reason
+
+
+class _Waiter:
+    """排队中的请求"""
+
+    __slots__ = ("priority", "deadline", "loop", "future", "granted", "dequeued")
+
+    def __init__(self, priority: str, deadline: Optional[float], loop: asyncio.AbstractEventLoop):
+        self.priority = priority
+        self.deadline = deadline
+        self.loop = loop
+        self.future = loop.create_future()
+        self.granted = False
+        # 已移出排队计数(分配名额、过期或取消)，保证 _queued 只减一次
+        self.dequeued = False
+
+
+class StageLimiter:
+    """
+    单个阶段的准入控制
+
+    - 容量：同时执行数不超过 capacity，其中 interactive_reserve 个名额只给交互请求，
+      批量任务只能使用剩余的空闲容量
+    - 排队：交互请求总在批量请求之前；同类请求按截止时间先到先服务(EDF)
+    - 快速拒绝：队列已满、预计等待超过截止时间、或排队期间截止时间已过，
+      立即抛出 Overloaded，不让所有请求一起变慢
+    内部状态由线程锁保护，可同时服务多个事件循环
+    """
+
+    def __init__(self,
+                 name: str,
+                 capacity: int,
+                 max_queue: Optional[Dict[str, int]] = None,
+                 max_wait: Optional[Dict[str, float]] = None,
+                 interactive_reserve: int = 0):
+        """
+        初始化阶段限流器
+
+        Args:
+            name: 阶段名称，如 "asr"
+            capacity: 最大同时执行数
+            max_queue: 各优先级最多排队数，默认交互64、批量256
+            max_wait: 未指定截止时间时各优先级的最长排队秒数，默认交互2秒、批量60秒
+            interactive_reserve: 为交互请求保留的名额数
+        """
+        self.name = name
+        self.capacity = max(1, capacity)
+        self.max_queue = {INTERACTIVE: 64, BATCH: 256, **(max_queue or {})}
+        self.max_wait = {INTERACTIVE: 2.0, BATCH: 60.0, **(max_wait or {})}
+        self.interactive_reserve = min(max(0, interactive_reserve), self.capacity - 1)
+
+        self._active = {INTERACTIVE: 0, BATCH: 0}
+        self._queue: List = []
+        self._queued = {INTERACTIVE: 0, BATCH: 0}
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+        # 单次占用时长的滑动平均(秒)，用于估算排队等待
+        self._service_time: Optional[float] = None
+        self._stats = {"admitted": 0, "queued": 0, "rejected_queue_full": 0,
+                       "rejected_deadline": 0, "expired": 0, "cancelled": 0}
+
+    # ------------------------------------------------------------------
+    # 内部状态(持有锁时调用)
+    # ------------------------------------------------------------------
+
+    def _total_active(self) -> int:
+        return self._active[INTERACTIVE] + self._active[BATCH]
+
+    def _can_run(self, priority: str) -> bool:
+        if priority == INTERACTIVE:
+            return self._total_active() < self.capacity
+        return self._total_active() < self.capacity - self.interactive_reserve
+
+    def _estimated_wait(self, priority: str) -> float:
+        """排在该请求之前的请求处理完所需的大致时间"""
+        if self._service_time is None:
+            return 0.0
+        ahead = self._queued[INTERACTIVE] if priority == INTERACTIVE else sum(self._queued.values())
+        return (ahead + 1) * self._service_time / self.capacity
+
+    def _grant(self, priority: str):
+        self._active[priority] += 1
+        self._stats["admitted"] += 1
+
+    def _dequeue(self, waiter: _Waiter):
+        if not waiter.dequeued:
+            waiter.dequeued = True
+            self._queued[waiter.priority] -= 1
+
+    def _dispatch(self):
+        """把空闲名额按 (优先级, 截止时间, 到达顺序) 分给排队请求，丢弃已过期的请求"""
+        now = time.monotonic()
+        while self._queue:
+            _, deadline, _, waiter = self._queue[0]
+            if waiter.dequeued:
+                # 已取消的请求
+                heapq.heappop(self._queue)
+                continue
+            if deadline is not None and deadline <= now:
+                heapq.heappop(self._queue)
+                self._dequeue(waiter)
+                self._stats["expired"] += 1
+                waiter.loop.call_soon_threadsafe(self._fail, waiter, Overloaded(self.name, "排队超过截止时间"))
+                continue
+            if not self._can_run(waiter.priority):
+                return
+            heapq.heappop(self._queue)
+            self._dequeue(waiter)
+            waiter.granted = True
+            self._grant(waiter.priority)
+            waiter.loop.call_soon_threadsafe(self._wake, waiter)
+
+    @staticmethod
+    def _wake(waiter: _Waiter):
+        if not waiter.future.done():
+            waiter.future.set_result(None)
+
+    @staticmethod
+    def _fail(waiter: _Waiter, error: Exception):
+        if not waiter.future.done():
+            waiter.future.set_exception(error)
+
+    # ------------------------------------------------------------------
+    # 对外接口
+    # ------------------------------------------------------------------
+
+    async def acquire(self, priority: str = INTERACTIVE, deadline: Optional[float] = None):
+        """
+        获取执行名额
+
+        Args:
+            priority: "interactive" 或 "batch"
+            deadline: 最晚开始执行的时间点(time.monotonic())，None时使用该优先级的 max_wait
+
+        Raises:
+            Overloaded: 队列已满或无法在截止时间前开始
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"不支持的优先级: {priority}")
+        now = time.monotonic()
+        if deadline is None:
+            deadline = now + self.max_wait[priority]
+
+        with self._lock:
+            if not self._queued[INTERACTIVE] and (priority == INTERACTIVE or not self._queued[BATCH]) \
+                    and self._can_run(priority):
+                self._grant(priority)
+                return
+            if self._queued[priority] >= self.max_queue[priority]:
+                self._stats["rejected_queue_full"] += 1
+                raise Overloaded(self.name, "排队已满")
+            if now + self._estimated_wait(priority) > deadline:
+                self._stats["rejected_deadline"] += 1
+                raise Overloaded(self.name, "预计等待超过截止时间")
+            waiter = _Waiter(priority, deadline, asyncio.get_running_loop())
+            heapq.heappush(self._queue, (PRIORITIES[priority], deadline, next(self._order), waiter))
+            self._queued[priority] += 1
+            self._stats["queued"] += 1
+
+        try:
+            # 截止时间到了仍未轮到时由超时触发一次调度，把过期请求清出队列
+            timeout = max(0.0, deadline - time.monotonic())
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+            except asyncio.TimeoutError:
+                with self._lock:
+                    if not waiter.granted:
+                        self._dispatch()
+                # 等待分配结果或过期异常送达
+                await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                self._stats["cancelled"] += 1
+                if not waiter.granted:
+                    self._dequeue(waiter)
+                    waiter.future.cancel()
+                    self._dispatch()
+                    raise
+            # 名额已分配但调用方被取消，转交给下一个请求
+            self.release(priority)
+            raise
+
+    def release(self, priority: str = INTERACTIVE, service_time: Optional[float] = None):
+        """
+        归还名额并唤醒下一个排队请求
+
+        Args:
+            priority: 获取名额时的优先级
+            service_time: 本次占用时长(秒)，用于估算后续排队等待
+        """
+        with self._lock:
+            self._active[priority] -= 1
+            if service_time is not None:
+                self._service_time = (service_time if self._service_time is None
+                                      else self._service_time * 0.8 + service_time * 0.2)
+            self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, priority: str = INTERACTIVE, deadline: Optional[float] = None):
+        """
+        获取一个执行名额，退出上下文时归还
+
+        Args:
+            priority: "interactive" 或 "batch"
+            deadline: 最晚开始执行的时间点(time.monotonic())
+        """
+        await self.acquire(priority, deadline)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(priority, time.monotonic() - started)
+
+    def get_stats(self) -> Dict:
+        """获取阶段统计"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["capacity"] = self.capacity
+            stats["active"] = dict(self._active)
+            stats["waiting"] = dict(self._queued)
+            stats["service_time_ms"] = (round(self._service_time * 1000, 1)
+                                        if self._service_time is not None else None)
+        return stats
+
+
+class AdmissionController:
+    """
+    各共享阶段的准入控制集合
+
+    所有会话共用同一组 FunASR 单例、ChatGLM 客户端和 EdgeTTS 实例，
+    在这些资源前面分别设置 StageLimiter：过载时交互请求保持延迟，
+    批量任务吸收剩余容量，超出部分快速拒绝
+    """
+
+    _default: Optional['AdmissionController'] = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, stages: Optional[Dict[str, StageLimiter]] = None):
+        """
+        初始化准入控制，未指定 stages 时按 ADMISSION_* 环境变量创建 asr/llm/tts 三个阶段
+
+        环境变量(以 ASR 为例，LLM/TTS 同理):
+            ADMISSION_ASR_CAPACITY: 同时执行数 (默认 asr=2, llm=32, tts=16)
+            ADMISSION_ASR_RESERVE: 为交互请求保留的名额数 (默认容量的1/4)
+            ADMISSION_INTERACTIVE_MAX_QUEUE / ADMISSION_BATCH_MAX_QUEUE: 每阶段各优先级最多排队数
+            ADMISSION_INTERACTIVE_MAX_WAIT / ADMISSION_BATCH_MAX_WAIT: 默认最长排队秒数
+        """
+        if stages is None:
+            max_queue = {
+                INTERACTIVE: int(os.getenv('ADMISSION_INTERACTIVE_MAX_QUEUE', '64')),
+                BATCH: int(os.getenv('ADMISSION_BATCH_MAX_QUEUE', '256')),
+            }
+            max_wait = {
+                INTERACTIVE: float(os.getenv('ADMISSION_INTERACTIVE_MAX_WAIT', '2')),
+                BATCH: float(os.getenv('ADMISSION_BATCH_MAX_WAIT', '60')),
+            }
+            stages = {}
+            for name, default in _DEFAULT_CAPACITY.items():
+                capacity = int(os.getenv(f'ADMISSION_{name.upper()}_CAPACITY', str(default)))
+                reserve = int(os.getenv(f'ADMISSION_{name.upper()}_RESERVE', str(capacity // 4)))
+                stages[name] = StageLimiter(name, capacity, max_queue, max_wait, reserve)
+        self.stages = stages
+
+    @classmethod
+    def get_default(cls) -> 'AdmissionController':
+        """获取进程内共享的准入控制"""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+
+    async def acquire(self, stage: str, priority: str = INTERACTIVE, deadline: Optional[float] = None):
+        """
+        获取某阶段的执行名额，需配对调用 release；未配置的阶段不限流
+
+        适用于名额要持有到线程池任务结束的场景(如不可中断的ASR推理)
+        """
+        limiter = self.stages.get(stage)
+        if limiter is not None:
+            await limiter.acquire(priority, deadline)
+
+    def release(self, stage: str, priority: str = INTERACTIVE, service_time: Optional[float] = None):
+        """归还某阶段的执行名额，可在任意线程调用"""
+        limiter = self.stages.get(stage)
+        if limiter is not None:
+            limiter.release(priority, service_time)
+
+    def slot(self, stage: str, priority: str = INTERACTIVE, deadline: Optional[float] = None):
+        """
+        获取某阶段的执行名额(异步上下文管理器)，未配置的阶段不限流
+
+        Args:
+            stage: 阶段名称 "asr"/"llm"/"tts"
+            priority: "interactive" 或 "batch"
+            deadline: 最晚开始执行的时间点(time.monotonic())
+        """
+        limiter = self.stages.get(stage)
+        if limiter is None:
+            return unlimited()
+        return limiter.slot(priority, deadline)
+
+    def get_stats(self) -> Dict:
+        """获取各阶段统计"""
+        return {name: limiter.get_stats() for name, limiter in self.stages.items()}
+
+
+@asynccontextmanager
+async def unlimited():
+    """不限流的名额(未配置准入控制或阶段时使用)"""
+    yield
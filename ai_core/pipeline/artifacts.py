@@ -0,0 +1,123 @@
+"""中间产物持久化 - 后台线程异步落盘，不占用请求的关键路径"""
+
+import os
+import queue
+import threading
+import time
+from typing import Dict, Optional, Union
+
+# 停止后台线程的哨兵
+_STOP = object()
+
+
+class ArtifactWriter:
+    """
+    异步产物写入器
+
+    流水线各阶段的数据在内存中传递，需要留档的音频/文本通过 save 投递到后台线程写入，
+    调用方不等待磁盘IO。队列满时丢弃新产物(计入统计)，而不是阻塞请求
+    """
+
+    def __init__(self, root_dir: str, max_pending: int = 64):
+        """
+        初始化写入器
+
+        Args:
+            root_dir: 产物根目录，save 的名称相对于该目录
+            max_pending: 最多排队的未写入产物数
+        """
+        self.root_dir = root_dir
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._stats = {"saved": 0, "dropped": 0, "failed": 0, "bytes": 0}
+        self._thread = threading.Thread(target=self._run, name="ArtifactWriter", daemon=True)
+        self._thread.start()
+
+    def save(self, name: str, data: Union[bytes, str]) -> bool:
+        """
+        投递一个产物，立即返回
+
+        Args:
+            name: 相对路径，如 "user_question.mp3"
+            data: 字节数据或文本(按UTF-8写入)
+
+        Returns:
+            bool: 是否已入队(队列已满时返回False)
+        """
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        try:
+            self._queue.put_nowait((name, bytes(data)))
+            return True
+        except queue.Full:
+            self._bump("dropped")
+            print(f"⚠️ 产物写入队列已满，丢弃: {name}")
+            return False
+
+    def path_of(self, name: str) -> str:
+        """产物的完整路径"""
+        return os.path.join(self.root_dir, name)
+
+    def _bump(self, key: str, amount: int = 1):
+        with self._lock:
+            self._stats[key] += amount
+
+    def _write(self, name: str, data: bytes):
+        path = self.path_of(name)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    return
+                name, data = item
+                try:
+                    self._write(name, data)
+                    self._bump("saved")
+                    self._bump("bytes", len(data))
+                except OSError as e:
+                    self._bump("failed")
+                    print(f"⚠️ 产物写入失败 {name}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待已投递的产物写完
+
+        Args:
+            timeout: 最长等待秒数，None表示一直等待
+
+        Returns:
+            bool: 是否全部写完
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout: Optional[float] = None):
+        """写完剩余产物并停止后台线程"""
+        self.flush(timeout)
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def get_stats(self) -> Dict:
+        """获取写入统计"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["pending"] = self._queue.qsize()
+        return stats
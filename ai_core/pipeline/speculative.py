@@ -0,0 +1,190 @@
+"""推测式LLM调用 - 中间识别结果稳定后提前请求回复，最终识别结果一致时直接沿用"""
+
+import re
+import time
+import hashlib
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from ..cancel import CancelToken, TurnCancelled
+from .admission import BATCH
+
+# 比较识别结果时忽略的字符：空白与中英文标点
+_IGNORED = re.compile(r"[\s\u3000-\u303f\uff00-\uff0f\uff1a-\uff20\uff3b-\uff40\uff5b-\uff65!-/:-@\[-`{-~…—·]+")
+
+
+def normalize_transcript(text: Optional[str]) -> str:
+    """去掉空白和标点并转小写，ASR只在标点上有出入时仍视为同一句话"""
+    return _IGNORED.sub("", text or "").lower()
+
+
+def history_fingerprint(conversation_history: Optional[List[Dict]]) -> str:
+    """对话历史内容的指纹：按预算裁剪的历史长度不变时，内容变化仍能区分"""
+    digest = hashlib.sha256()
+    for message in conversation_history or []:
+        digest.update(str(message.get("role", "")).encode("utf-8") + b"\x1f"
+                      + str(message.get("content") or "").encode("utf-8") + b"\x1e")
+    return digest.hexdigest()
+
+
+class SpeculationStats:
+    """推测调用的统计：命中率与节省的时间，衡量多花的token换来的延迟收益"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.attempts = 0
+        self.committed = 0
+        self.mispredicted = 0
+        self.saved_ms = 0.0
+        self.wasted_chars = 0
+
+    def record_attempt(self):
+        with self._lock:
+            self.attempts += 1
+
+    def record_commit(self, saved_ms: float):
+        with self._lock:
+            self.committed += 1
+            self.saved_ms += saved_ms
+
+    def record_miss(self, wasted_chars: int):
+        with self._lock:
+            self.mispredicted += 1
+            self.wasted_chars += wasted_chars
+
+    def to_dict(self) -> Dict:
+        """统计快照"""
+        with self._lock:
+            resolved = self.committed + self.mispredicted
+            return {
+                "attempts": self.attempts,
+                "committed": self.committed,
+                "mispredicted": self.mispredicted,
+                "misspeculation_rate": round(self.mispredicted / resolved, 3) if resolved else None,
+                "saved_ms_total": round(self.saved_ms, 1),
+                "saved_ms_avg": round(self.saved_ms / self.committed, 1) if self.committed else None,
+                "wasted_chars": self.wasted_chars,
+            }
+
+
+class Speculation:
+    """
+    一次推测调用
+
+    创建即在后台开始流式请求LLM，增量文本先缓存起来；
+    最终识别结果与推测所用的文本一致时 commit，流水线从 stream() 继续读取(已缓存的部分立即可用)，
+    否则 cancel 放弃，由流水线按最终结果重新请求
+    推测请求以批量优先级占用LLM名额，过载时直接放弃推测
+    """
+
+    def __init__(self, pipeline: Any, text: str, conversation_history: Optional[List[Dict]] = None,
+                 stats: Optional[SpeculationStats] = None):
+        """
+        Args:
+            pipeline: VoicePipeline(使用其 slot / llm_stream)
+            text: 稳定的中间识别结果
+            conversation_history: 对话历史(需与正式请求时相同)
+            stats: 统计对象
+        """
+        self.text = text
+        self.key = normalize_transcript(text)
+        self.history_key = history_fingerprint(conversation_history)
+        self.token = CancelToken()
+        self.stats = stats
+        self.deltas: List[str] = []
+        self.error: Optional[BaseException] = None
+        self.done = False
+        # 请求正常结束(区别于被取消或失败)
+        self.completed = False
+        self.committed = False
+        self.started_at = time.perf_counter()
+        self.first_token_at: Optional[float] = None
+        self._resolved = False
+        self._changed = asyncio.Event()
+        if stats is not None:
+            stats.record_attempt()
+        self._task = asyncio.ensure_future(self._run(pipeline, conversation_history))
+
+    async def _run(self, pipeline: Any, conversation_history: Optional[List[Dict]]):
+        try:
+            async with pipeline.slot("llm", BATCH):
+                async for delta in pipeline.llm_stream(self.text, conversation_history, self.token):
+                    if self.first_token_at is None:
+                        self.first_token_at = time.perf_counter()
+                    self.deltas.append(delta)
+                    self._changed.set()
+            self.completed = True
+        except (TurnCancelled, asyncio.CancelledError):
+            pass
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self._changed.set()
+
+    def matches(self, text: str, conversation_history: Optional[List[Dict]] = None) -> bool:
+        """最终识别结果与推测所用文本一致、对话历史未变且推测仍可用"""
+        if self.token.cancelled or self._resolved:
+            return False
+        if self.done and self.error is not None and not self.deltas:
+            # 推测请求失败或被拒绝，没有可沿用的内容
+            return False
+        return (normalize_transcript(text) == self.key
+                and history_fingerprint(conversation_history) == self.history_key)
+
+    def commit(self, cancel_token: Optional[CancelToken] = None) -> float:
+        """
+        采用推测结果
+
+        Args:
+            cancel_token: 本轮的取消令牌，取消时一并停止推测请求
+
+        Returns:
+            float: 推测比正式请求提前开始的毫秒数
+        """
+        self.committed = True
+        self._resolved = True
+        if cancel_token is not None:
+            self.token.link(cancel_token)
+        saved_ms = (time.perf_counter() - self.started_at) * 1000
+        if self.stats is not None:
+            self.stats.record_commit(saved_ms)
+        return saved_ms
+
+    def cancel(self, reason: str = "mispredicted"):
+        """放弃推测(已 commit 的推测不受影响，由本轮的取消令牌控制)"""
+        if self._resolved:
+            return
+        self._resolved = True
+        self.stop(reason)
+        if self.stats is not None:
+            self.stats.record_miss(sum(len(delta) for delta in self.deltas))
+
+    def stop(self, reason: str = "cancelled"):
+        """停止推测请求，不计入统计"""
+        self.token.cancel(reason)
+        if not self._task.done():
+            self._task.cancel()
+
+    async def stream(self) -> AsyncIterator[str]:
+        """
+        读取推测请求的增量文本：先返回已缓存的部分，再跟随后续输出
+
+        Raises:
+            TurnCancelled: 推测被取消
+            Exception: 推测请求失败
+        """
+        index = 0
+        while True:
+            self._changed.clear()
+            while index < len(self.deltas):
+                yield self.deltas[index]
+                index += 1
+            if self.done:
+                if self.completed:
+                    return
+                if self.error is not None:
+                    raise self.error
+                raise TurnCancelled(self.token.reason)
+            await self._changed.wait()
@@ -0,0 +1,465 @@
+"""流式语音流水线 - ASR定稿 → 流式LLM → 分句 → 流式TTS → Opus分页，各阶段重叠执行"""
+
+import time
+import asyncio
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from ..llm.sentence import aiter_sentences
+from ..cancel import CancelToken, TurnCancelled
+from .admission import BATCH, INTERACTIVE, unlimited
+from .speculative import Speculation, SpeculationStats
+
+
+class PipelineMetrics:
+    """
+    单次对话的阶段耗时
+
+    所有时间点都相对流水线开始(收到完整用户语音或文本)计，单位毫秒；
+    首个音频字节时间(time_to_first_audio)是核心指标
+    """
+
+    def __init__(self):
+        self._start = time.perf_counter()
+        self.marks: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {"sentences": 0, "tts_bytes": 0, "audio_bytes": 0, "pages": 0}
+
+    def mark(self, name: str):
+        """记录阶段时间点(只记录第一次)"""
+        if name not in self.marks:
+            self.marks[name] = (time.perf_counter() - self._start) * 1000
+
+    def add(self, name: str, amount: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    @property
+    def time_to_first_audio(self) -> Optional[float]:
+        """首个音频字节的时间(毫秒)"""
+        return self.marks.get("first_audio")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """导出为字典"""
+        result: Dict[str, Any] = {f"{name}_ms": round(value, 1) for name, value in self.marks.items()}
+        result.update(self.counters)
+        result["time_to_first_audio_ms"] = (round(self.time_to_first_audio, 1)
+                                            if self.time_to_first_audio is not None else None)
+        return result
+
+
+class VoicePipeline:
+    """
+    流式语音对话流水线
+
+    各阶段不再等待上一阶段整体完成：
+    - LLM 输出按句切分，每凑齐一句立即送去合成
+    - 各句合成并发进行(受 tts_parallelism 限制)，第一句边合成边送入编码器
+    - 编码器为常驻FFmpeg进程，每输出一个Ogg页就下发
+    """
+
+    def __init__(self,
+                 llm: Any,
+                 tts: Any = None,
+                 asr: Any = None,
+                 preset: str = "low_latency",
+                 encode: bool = True,
+                 tts_parallelism: int = 2,
+                 target_seconds: Optional[float] = None,
+                 page_duration_ms: int = 20,
+                 artifacts: Any = None,
+                 admission: Any = None):
+        """
+        初始化流水线
+
+        Args:
+            llm: ChatGLM / AsyncChatGLM 实例，或 (用户文本) -> 异步增量文本迭代器 的函数
+            tts: TTS后端(TTSBackend)，默认 EdgeTTS 单例
+            asr: 语音识别，默认 FunASR 单例(仅传入音频时使用)
+            preset: 下行Opus预设
+            encode: 是否编码为Opus，False时直接输出TTS音频块
+            tts_parallelism: 同时合成的最大句数
+            target_seconds: 语音回复目标时长(秒)，仅对 ChatGLM 生效
+            page_duration_ms: 每个Ogg页的最长音频时长(毫秒)
+            artifacts: ArtifactWriter，设置后每轮对话的文本与输出音频在后台留档
+            admission: AdmissionController，设置后 ASR/LLM/每句TTS 先取得对应阶段的名额，
+                过载时抛出 Overloaded；多个流水线可共用 AdmissionController.get_default()
+        """
+        if tts is None:
+            from ..tts.edge import EdgeTTS
+            tts = EdgeTTS.get_instance()
+        self.llm = llm
+        self.tts = tts
+        self.asr = asr
+        self.preset = preset
+        self.encode = encode
+        self.tts_parallelism = max(1, tts_parallelism)
+        self.target_seconds = target_seconds
+        self.page_duration_ms = page_duration_ms
+        self.artifacts = artifacts
+        self.admission = admission
+        self.speculation_stats = SpeculationStats()
+
+    # ------------------------------------------------------------------
+    # 各阶段
+    # ------------------------------------------------------------------
+
+    def slot(self, stage: str, priority: str, deadline: Optional[float] = None):
+        """取得阶段名额(异步上下文管理器)，未配置准入控制时不限流"""
+        if self.admission is None:
+            return unlimited()
+        return self.admission.slot(stage, priority, deadline)
+
+    async def _transcribe(self, audio: Any, cancel_token: Optional[CancelToken] = None,
+                          priority: str = INTERACTIVE, deadline: Optional[float] = None) -> str:
+        """ASR定稿：在线程池中识别完整的用户语音"""
+        if self.asr is None:
+            from ..asr.funasr_wrapper import FunASR
+            self.asr = FunASR.get_instance()
+        if isinstance(audio, str):
+            recognize = lambda: self.asr.transcribe_file(audio)  # noqa: E731
+        elif cancel_token is not None:
+            recognize = lambda: self.asr.transcribe_audio_data(audio, cancel_token=cancel_token)  # noqa: E731
+        else:
+            recognize = lambda: self.asr.transcribe_audio_data(audio)  # noqa: E731
+
+        admission = self.admission
+        if admission is not None:
+            await admission.acquire("asr", priority, deadline)
+
+        def work():
+            # 推理无法中途打断：名额在线程中归还，本轮被取消后仍计入占用直到推理结束
+            started = time.monotonic()
+            try:
+                if cancel_token is not None and cancel_token.cancelled:
+                    return None
+                return recognize()
+            finally:
+                if admission is not None:
+                    admission.release("asr", priority, time.monotonic() - started)
+
+        loop = asyncio.get_running_loop()
+        text = await asyncio.shield(loop.run_in_executor(None, work))
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        if not text:
+            raise Exception("语音识别失败")
+        return text
+
+    async def transcribe_partial(self, audio: Any, deadline: Optional[float] = None) -> str:
+        """
+        识别说话过程中已收到的部分音频，得到中间结果
+
+        以批量优先级占用ASR的空闲容量，不挤占正式识别
+
+        Args:
+            audio: 截至当前的音频数据
+            deadline: 最晚开始识别的时间点(time.monotonic())，赶不上时抛出 Overloaded
+        """
+        return await self._transcribe(audio, priority=BATCH, deadline=deadline)
+
+    def speculate(self, text: str, conversation_history: Optional[List[Dict]] = None) -> Speculation:
+        """
+        按稳定的中间识别结果提前开始LLM请求，结果交给 run(speculation=...) 决定采用或放弃
+
+        Args:
+            text: 中间识别结果
+            conversation_history: 对话历史，需与随后 run 时传入的相同
+        """
+        return Speculation(self, text, conversation_history, self.speculation_stats)
+
+    @staticmethod
+    async def _until_cancelled(coro, cancel_token: Optional[CancelToken]):
+        """执行协程，令牌被取消时立即放弃(不等待线程池中的推理结束)"""
+        if cancel_token is None:
+            return await coro
+        task = asyncio.ensure_future(coro)
+        waiter = asyncio.ensure_future(cancel_token.wait())
+        try:
+            await asyncio.wait([task, waiter], return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            waiter.cancel()
+        if not task.done():
+            task.cancel()
+            raise TurnCancelled(cancel_token.reason)
+        return task.result()
+
+    def llm_stream(self, text: str, conversation_history: Optional[List[Dict]],
+                   cancel_token: Optional[CancelToken] = None) -> AsyncIterator[str]:
+        """按LLM类型选择流式接口"""
+        llm = self.llm
+        if hasattr(llm, "voice_policy"):
+            # ChatGLM：按目标播报时长限制回复长度
+            params = llm.voice_policy.build(llm.default_system_message, self.target_seconds)
+            return llm.astream_response(text, params["system_message"], max_tokens=params["max_tokens"],
+                                        conversation_history=conversation_history, cancel_token=cancel_token)
+        if hasattr(llm, "astream_response"):
+            return llm.astream_response(text, conversation_history=conversation_history, cancel_token=cancel_token)
+        if hasattr(llm, "stream_response"):
+            # AsyncChatGLM
+            return llm.stream_response(text, conversation_history=conversation_history)
+        return llm(text)
+
+    async def _synthesize_sentence(self, sentence: str, queue: asyncio.Queue,
+                                   limit: asyncio.Semaphore, tenant: str, priority: str = INTERACTIVE):
+        """合成一句，音频块写入该句的队列，None表示结束，异常对象表示失败"""
+        try:
+            async with limit, self.slot("tts", priority):
+                async for event in self.tts.stream_speech(sentence, word_boundaries=False, tenant=tenant):
+                    await queue.put(event)
+        except Exception as e:
+            await queue.put(e)
+        finally:
+            await queue.put(None)
+
+    async def _produce_sentences(self, text: str, conversation_history: Optional[List[Dict]],
+                                 sentence_queues: asyncio.Queue, metrics: PipelineMetrics,
+                                 reply: List[str], tenant: str, cancel_token: Optional[CancelToken],
+                                 priority: str = INTERACTIVE, deadline: Optional[float] = None,
+                                 speculation: Optional[Speculation] = None):
+        """LLM流式输出 → 分句 → 逐句启动合成"""
+        limit = asyncio.Semaphore(self.tts_parallelism)
+        tasks = []
+
+        async def deltas():
+            if speculation is not None:
+                # 采用推测请求：已缓存的输出立即可用，名额由推测请求持有
+                async for delta in speculation.stream():
+                    metrics.mark("llm_first_token")
+                    reply.append(delta)
+                    yield delta
+                return
+            async with self.slot("llm", priority, deadline):
+                async for delta in self.llm_stream(text, conversation_history, cancel_token):
+                    metrics.mark("llm_first_token")
+                    reply.append(delta)
+                    yield delta
+
+        try:
+            async for sentence in aiter_sentences(deltas()):
+                metrics.mark("first_sentence")
+                metrics.add("sentences")
+                queue: asyncio.Queue = asyncio.Queue()
+                tasks.append(asyncio.ensure_future(
+                    self._synthesize_sentence(sentence, queue, limit, tenant, priority)))
+                await sentence_queues.put((sentence, queue))
+            metrics.mark("llm_done")
+            await sentence_queues.put(None)
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+    async def _feed_encoder(self, sentence_queues: asyncio.Queue, output: asyncio.Queue,
+                            metrics: PipelineMetrics, encoder_holder: List, encoder_ready: asyncio.Event):
+        """按句子顺序取出合成音频，写入编码器(或直接输出)"""
+        audio_format = getattr(self.tts, "audio_format", "mp3")
+        try:
+            while True:
+                item = await sentence_queues.get()
+                if item is None:
+                    break
+                sentence, queue = item
+                await output.put({"type": "sentence", "text": sentence})
+                header_pending = audio_format == "wav"
+                while True:
+                    event = await queue.get()
+                    if event is None:
+                        break
+                    if isinstance(event, Exception):
+                        raise event
+                    if event["type"] == "backend":
+                        audio_format = event["format"]
+                        header_pending = audio_format == "wav"
+                        continue
+                    if event["type"] != "audio":
+                        continue
+                    data = event["data"]
+                    metrics.mark("tts_first_audio")
+                    metrics.add("tts_bytes", len(data))
+                    if not self.encode:
+                        metrics.mark("first_audio")
+                        metrics.add("audio_bytes", len(data))
+                        await output.put({"type": "audio", "data": data, "format": audio_format})
+                        continue
+                    if header_pending:
+                        # 每句WAV都带44字节文件头，编码器输入为连续裸PCM
+                        header, data, header_pending = data[:44], data[44:], False
+                        if not encoder_holder:
+                            encoder_holder.append(self._create_encoder("s16le", header))
+                    elif not encoder_holder:
+                        encoder_holder.append(self._create_encoder(audio_format))
+                    encoder_ready.set()
+                    await encoder_holder[0].write(data)
+            if encoder_holder:
+                await encoder_holder[0].close_input()
+        finally:
+            encoder_ready.set()
+
+    def _create_encoder(self, audio_format: str, wav_header: Optional[bytes] = None):
+        from ..audio.streaming import StreamingOpusEncoder
+        sample_rate = int.from_bytes(wav_header[24:28], "little") if wav_header else None
+        channels = int.from_bytes(wav_header[22:24], "little") if wav_header else 1
+        return StreamingOpusEncoder(self.preset, audio_format, sample_rate, channels, self.page_duration_ms)
+
+    # ------------------------------------------------------------------
+    # 对外接口
+    # ------------------------------------------------------------------
+
+    async def run(self,
+                  audio: Any = None,
+                  text: Optional[str] = None,
+                  conversation_history: Optional[List[Dict]] = None,
+                  tenant: str = "default",
+                  artifact_name: Optional[str] = None,
+                  on_metrics: Optional[Callable[[PipelineMetrics], None]] = None,
+                  cancel_token: Optional[CancelToken] = None,
+                  priority: str = INTERACTIVE,
+                  deadline: Optional[float] = None,
+                  speculation: Optional[Speculation] = None) -> AsyncIterator[Dict]:
+        """
+        执行一轮语音对话
+
+        Args:
+            audio: 用户语音(文件路径或音频数据)，与 text 二选一
+            text: 用户文本(跳过ASR)
+            conversation_history: 对话历史
+            tenant: 租户标识(如设备ID)，用于TTS公平调度
+            artifact_name: 本轮产物的文件名前缀，默认由租户与时间戳生成
+            on_metrics: 结束时回调阶段耗时
+            cancel_token: CancelToken，被取消时(如用户打断，可在任意线程调用)立即取消
+                ASR等待、LLM流、各句合成和编码进程，并以 cancelled 事件结束
+            priority: 准入优先级，"interactive"(设备实时对话) 或 "batch"(离线批量任务)
+            deadline: 本轮入口阶段(ASR，文本输入时为LLM)最晚开始的时间点(time.monotonic())，
+                无法按时开始时抛出 Overloaded；后续阶段使用各优先级的默认排队上限
+            speculation: speculate() 提前发起的LLM请求，最终识别结果一致时直接沿用，否则取消后重新请求
+
+        Yields:
+            Dict: {"type": "transcript", "text"}、{"type": "sentence", "text"}、
+                  {"type": "audio", "data", ...}(Ogg页或TTS音频块)、
+                  最后为 {"type": "metrics", ...}，被取消时为 {"type": "cancelled", ...}
+        """
+        metrics = PipelineMetrics()
+        reply: List[str] = []
+        if text is None:
+            try:
+                text = await self._until_cancelled(
+                    self._transcribe(audio, cancel_token, priority, deadline), cancel_token)
+            except TurnCancelled:
+                if speculation is not None:
+                    speculation.cancel("cancelled")
+                yield self._cancelled_event(metrics, reply, cancel_token)
+                return
+            except BaseException:
+                if speculation is not None:
+                    speculation.cancel("failed")
+                raise
+            # 入口截止时间只约束第一个阶段
+            deadline = None
+        if cancel_token is not None and cancel_token.cancelled:
+            if speculation is not None:
+                speculation.cancel("cancelled")
+            yield self._cancelled_event(metrics, reply, cancel_token)
+            return
+        metrics.mark("asr_final")
+        yield {"type": "transcript", "text": text}
+
+        speculation_info = None
+        if speculation is not None:
+            if speculation.matches(text, conversation_history):
+                saved_ms = speculation.commit(cancel_token)
+                speculation_info = {"speculation": "hit", "speculation_saved_ms": round(saved_ms, 1)}
+            else:
+                speculation.cancel("mispredicted")
+                speculation_info = {"speculation": "miss", "speculation_text": speculation.text}
+                speculation = None
+
+        sentence_queues: asyncio.Queue = asyncio.Queue()
+        output: asyncio.Queue = asyncio.Queue()
+        encoder_holder: List = []
+        encoder_ready = asyncio.Event()
+        done = object()
+
+        producer = asyncio.ensure_future(
+            self._produce_sentences(text, conversation_history, sentence_queues, metrics, reply, tenant,
+                                    cancel_token, priority, deadline, speculation))
+        feeder = asyncio.ensure_future(
+            self._feed_encoder(sentence_queues, output, metrics, encoder_holder, encoder_ready))
+
+        async def forward_pages():
+            # 编码器在写入第一块音频时创建，此后输出页与后续句子的合成并行进行
+            await encoder_ready.wait()
+            if encoder_holder:
+                async for page in encoder_holder[0].pages():
+                    if not page.is_header:
+                        metrics.mark("first_audio")
+                        metrics.add("pages")
+                    metrics.add("audio_bytes", len(page.data))
+                    await output.put({"type": "audio", "data": page.data, "header": page.is_header,
+                                      "granule": page.granule_position})
+
+        async def finish():
+            try:
+                await asyncio.gather(feeder, forward_pages(), producer)
+            finally:
+                await output.put(done)
+
+        finisher = asyncio.ensure_future(finish())
+        audio_chunks: List[bytes] = []
+        cancelled = object()
+        remove_callback = None
+        if cancel_token is not None:
+            # 取消时唤醒输出循环，由下面的 finally 取消全部阶段
+            loop = asyncio.get_running_loop()
+            remove_callback = cancel_token.add_callback(
+                lambda: loop.call_soon_threadsafe(output.put_nowait, cancelled))
+        was_cancelled = False
+        try:
+            while True:
+                item = await output.get()
+                if item is done:
+                    break
+                if item is cancelled:
+                    was_cancelled = True
+                    break
+                if self.artifacts is not None and item["type"] == "audio":
+                    audio_chunks.append(item["data"])
+                yield item
+            # 传播各阶段的异常
+            if not was_cancelled:
+                await finisher
+        except TurnCancelled:
+            was_cancelled = True
+        finally:
+            if remove_callback is not None:
+                remove_callback()
+            if speculation is not None and not speculation.done:
+                # 本轮异常结束时停止仍在进行的推测请求
+                speculation.stop("finished")
+            for task in (finisher, feeder, producer):
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(finisher, feeder, producer, return_exceptions=True)
+            if encoder_holder:
+                await encoder_holder[0].aclose()
+
+        if was_cancelled:
+            yield self._cancelled_event(metrics, reply, cancel_token)
+            return
+
+        metrics.mark("done")
+        if self.artifacts is not None:
+            name = artifact_name or f"{tenant}_{time.time_ns()}"
+            suffix = "opus" if self.encode else getattr(self.tts, "audio_format", "mp3")
+            self.artifacts.save(f"{name}.{suffix}", b"".join(audio_chunks))
+            self.artifacts.save(f"{name}.txt", f"用户: {text}\n回复: {''.join(reply)}\n")
+        if on_metrics is not None:
+            on_metrics(metrics)
+        yield {"type": "metrics", "reply": "".join(reply), **metrics.to_dict(), **(speculation_info or {})}
+
+    @staticmethod
+    def _cancelled_event(metrics: PipelineMetrics, reply: List[str], cancel_token: CancelToken) -> Dict:
+        """本轮被取消时的结束事件，cancel_latency_ms 为从 cancel() 到各阶段资源释放完毕的耗时"""
+        metrics.mark("cancelled")
+        latency = cancel_token.elapsed_ms()
+        return {"type": "cancelled", "reason": cancel_token.reason, "reply": "".join(reply),
+                "cancel_latency_ms": round(latency, 1) if latency is not None else None,
+                **metrics.to_dict()}
@@ -0,0 +1,36 @@
+"""
+设备接入服务
+
+asyncio TCP服务，每台设备一个会话：接收上行Opus语音，经流式语音流水线处理后
+把下行Opus页推回设备。帧格式见 protocol 模块；
+上行语音边接收边解码，服务端检测到句尾即开始识别
+
+注意：导出对象采用懒加载，仅在首次访问时导入
+"""
+
+import importlib
+
+# 导出名称 -> 所在子模块
+_LAZY_EXPORTS = {
+    'DeviceServer': '.device',    # 设备接入服务
+    'DeviceSession': '.device',   # 单设备会话
+    'ServerConfig': '.device',    # 服务配置
+    'UplinkStream': '.uplink',    # 上行流式解码与句尾检测
+    'ProtocolError': '.protocol',  # 帧格式错误
+}
+
+__all__ = list(_LAZY_EXPORTS)
+
+
+def __getattr__(name):
+    """按需导入导出对象"""
+    if name in _LAZY_EXPORTS:
+        module = importlib.import_module(_LAZY_EXPORTS[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals().keys()) + __all__)
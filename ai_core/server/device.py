@@ -0,0 +1,728 @@
+"""设备接入服务 - asyncio TCP服务，每台设备一个会话
+
+设备上传Opus语音，服务端完成 ASR → LLM → TTS 后把下行Opus页推回设备。
+收发两侧都是有界队列：处理跟不上时停止读取上行数据(由TCP把压力传回设备)，
+设备接收慢时流水线在投递下行帧处等待，单个慢设备不会拖垮整个进程
+"""
+
+import os
+import time
+import asyncio
+import itertools
+from typing import Any, Dict, Optional
+
+from ..cancel import CancelToken
+from ..pipeline.admission import INTERACTIVE, PRIORITIES, Overloaded
+from ..audio.endpoint import Endpointer
+from .uplink import UplinkStream
+from .protocol import (
+    HELLO, AUDIO, END, EVENT, ERROR, PING, PONG, BYE, FRAME_NAMES,
+    ProtocolError, encode_frame, encode_json, decode_json, read_frame,
+)
+
+# 支持的音频传输格式
+TRANSPORTS = ("ogg", "frames")
+
+# 会话ID序号
+_session_ids = itertools.count(1)
+
+
+class ServerConfig:
+    """设备服务配置"""
+
+    def __init__(self,
+                 host: Optional[str] = None,
+                 port: Optional[int] = None,
+                 max_connections: Optional[int] = None,
+                 max_frame_bytes: Optional[int] = None,
+                 max_utterance_bytes: Optional[int] = None,
+                 send_queue_size: Optional[int] = None,
+                 pending_turns: Optional[int] = None,
+                 hello_timeout: Optional[float] = None,
+                 idle_timeout: Optional[float] = None,
+                 shutdown_timeout: Optional[float] = None,
+                 barge_in: Optional[bool] = None,
+                 turn_deadline: Optional[float] = None,
+                 endpointing: Optional[bool] = None,
+                 partial_interval_ms: Optional[int] = None,
+                 speculate_stable_ms: Optional[int] = None):
+        """
+        初始化配置，未指定的参数读取 SERVER_* 环境变量
+
+        Args:
+            host: 监听地址 (SERVER_HOST，默认0.0.0.0)
+            port: 监听端口 (SERVER_PORT，默认8900)
+            max_connections: 最大同时连接数，超出时直接拒绝 (SERVER_MAX_CONNECTIONS，默认256)
+            max_frame_bytes: 单帧最大负载 (SERVER_MAX_FRAME_BYTES，默认64KB)
+            max_utterance_bytes: 单句上行Opus数据上限 (SERVER_MAX_UTTERANCE_BYTES，默认1MB)
+            send_queue_size: 每个会话待发送的最大帧数 (SERVER_SEND_QUEUE_SIZE，默认64)
+            pending_turns: 每个会话排队等待处理的最大轮数 (SERVER_PENDING_TURNS，默认2)
+            hello_timeout: 连接后等待 HELLO 的秒数 (SERVER_HELLO_TIMEOUT，默认10)
+            idle_timeout: 无任何帧时断开的秒数 (SERVER_IDLE_TIMEOUT，默认300)
+            shutdown_timeout: 优雅关闭时等待进行中对话的秒数 (SERVER_SHUTDOWN_TIMEOUT，默认10)
+            barge_in: 设备开始说新的一句时是否打断正在进行的回复 (SERVER_BARGE_IN，默认true)
+            turn_deadline: 一句话说完后识别最晚开始的秒数，流水线配置了准入控制时生效，
+                过载无法按时开始则快速拒绝 (SERVER_TURN_DEADLINE，默认3)
+            endpointing: 是否在服务端边接收边解码上行语音并检测句尾，检测到即开始识别，
+                不等设备发 END (SERVER_ENDPOINTING，默认true；阈值见 ENDPOINT_* 环境变量)
+            partial_interval_ms: 端点检测期间对已收到的语音做中间识别的间隔，
+                中间结果完整时更早判定句尾，0为关闭 (SERVER_PARTIAL_INTERVAL_MS，默认0)
+            speculate_stable_ms: 中间结果保持不变多久后推测式地提前请求LLM，最终识别结果一致时直接沿用，
+                0为关闭；需要开启中间识别 (SERVER_SPECULATE_STABLE_MS，默认0)
+        """
+        self.host = host or os.getenv('SERVER_HOST', '0.0.0.0')
+        self.port = port if port is not None else int(os.getenv('SERVER_PORT', '8900'))
+        self.max_connections = max_connections or int(os.getenv('SERVER_MAX_CONNECTIONS', '256'))
+        self.max_frame_bytes = max_frame_bytes or int(os.getenv('SERVER_MAX_FRAME_BYTES', '65536'))
+        self.max_utterance_bytes = max_utterance_bytes or int(os.getenv('SERVER_MAX_UTTERANCE_BYTES', '1048576'))
+        self.send_queue_size = send_queue_size or int(os.getenv('SERVER_SEND_QUEUE_SIZE', '64'))
+        self.pending_turns = pending_turns or int(os.getenv('SERVER_PENDING_TURNS', '2'))
+        self.hello_timeout = hello_timeout or float(os.getenv('SERVER_HELLO_TIMEOUT', '10'))
+        self.idle_timeout = idle_timeout or float(os.getenv('SERVER_IDLE_TIMEOUT', '300'))
+        self.shutdown_timeout = (shutdown_timeout if shutdown_timeout is not None
+                                 else float(os.getenv('SERVER_SHUTDOWN_TIMEOUT', '10')))
+        if barge_in is None:
+            barge_in = os.getenv('SERVER_BARGE_IN', 'true').lower() in ('1', 'true', 'yes')
+        self.barge_in = barge_in
+        self.turn_deadline = turn_deadline or float(os.getenv('SERVER_TURN_DEADLINE', '3'))
+        if endpointing is None:
+            endpointing = os.getenv('SERVER_ENDPOINTING', 'true').lower() in ('1', 'true', 'yes')
+        self.endpointing = endpointing
+        self.partial_interval_ms = (partial_interval_ms if partial_interval_ms is not None
+                                    else int(os.getenv('SERVER_PARTIAL_INTERVAL_MS', '0')))
+        self.speculate_stable_ms = (speculate_stable_ms if speculate_stable_ms is not None
+                                    else int(os.getenv('SERVER_SPECULATE_STABLE_MS', '0')))
+
+
+class DeviceSession:
+    """
+    单台设备的会话
+
+    三个任务协作：
+    - 读取：解析上行帧，AUDIO 累积到一句话，END 时把这一轮放入待处理队列
+    - 处理：按顺序执行每一轮对话，产生的事件和音频写入发送队列
+    - 发送：从发送队列取帧写入连接，等待内核缓冲区腾出空间(drain)
+
+    每一轮对话带一个 CancelToken；设备开始说新的一句(打断)时取消进行中和排队的轮次，
+    发送队列里属于这些轮次的音频直接丢弃
+    """
+
+    def __init__(self, server: 'DeviceServer', reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.server = server
+        self.config = server.config
+        self.reader = reader
+        self.writer = writer
+        self.session_id = next(_session_ids)
+        self.peer = writer.get_extra_info("peername")
+        self.device_id: Optional[str] = None
+        # 音频传输格式: "ogg" 为Ogg/Opus页，"frames" 为紧凑帧(见 ai_core.audio.framing)
+        self.transport = "ogg"
+        self.barge_in = self.config.barge_in
+        # 准入优先级: 设备实时对话为 "interactive"，离线批量任务可声明 "batch"
+        self.priority = INTERACTIVE
+        self.endpointing = self.config.endpointing
+        # 端点检测中的当前一句，及检测到句尾后提交的那一轮的令牌
+        self._stream: Optional[UplinkStream] = None
+        self._stream_token: Optional[CancelToken] = None
+        # 按稳定的中间结果提前发起的LLM请求，及等待结果稳定的定时任务
+        self._speculation = None
+        self._speculate_task: Optional[asyncio.Task] = None
+        self._turn_token: Optional[CancelToken] = None
+        self.created_at = time.monotonic()
+
+        self._outbound: asyncio.Queue = asyncio.Queue(maxsize=self.config.send_queue_size)
+        self._turns: asyncio.Queue = asyncio.Queue(maxsize=self.config.pending_turns)
+        self._uplink = bytearray()
+        self._draining = False
+        self._reader_task: Optional[asyncio.Task] = None
+        self._worker_task: Optional[asyncio.Task] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self.stats = {"turns": 0, "failed_turns": 0, "cancelled_turns": 0, "rejected_turns": 0, "barge_ins": 0,
+                      "endpoints": 0, "resumes": 0, "hangover_saved_ms": 0, "speculations": 0, "history_errors": 0,
+                      "frames_in": 0, "frames_out": 0, "frames_dropped": 0, "bytes_in": 0, "bytes_out": 0}
+
+    # ------------------------------------------------------------------
+    # 发送
+    # ------------------------------------------------------------------
+
+    async def send(self, frame: bytes, token: Optional[CancelToken] = None):
+        """
+        投递一帧，发送队列已满时等待(背压)
+
+        Args:
+            frame: 帧数据
+            token: 所属轮次的令牌，轮次被取消后尚未发出的帧会被丢弃
+        """
+        if self._writer_task is not None and self._writer_task.done():
+            raise ConnectionError("连接已关闭")
+        await self._outbound.put((frame, token))
+
+    async def _write_loop(self):
+        try:
+            while True:
+                item = await self._outbound.get()
+                if item is None:
+                    break
+                frame, token = item
+                if token is not None and token.cancelled:
+                    self.stats["frames_dropped"] += 1
+                    continue
+                self.writer.write(frame)
+                await self.writer.drain()
+                self.stats["frames_out"] += 1
+                self.stats["bytes_out"] += len(frame)
+        except (ConnectionError, OSError):
+            # 设备已断开，后续工作没有意义
+            self._cancel(self._reader_task, self._worker_task)
+
+    # ------------------------------------------------------------------
+    # 接收
+    # ------------------------------------------------------------------
+
+    async def _read(self, timeout: float):
+        frame = await asyncio.wait_for(read_frame(self.reader, self.config.max_frame_bytes), timeout)
+        if frame is not None:
+            self.stats["frames_in"] += 1
+            self.stats["bytes_in"] += len(frame[1])
+        return frame
+
+    async def _handshake(self) -> bool:
+        frame = await self._read(self.config.hello_timeout)
+        if frame is None:
+            return False
+        frame_type, payload = frame
+        if frame_type != HELLO:
+            raise ProtocolError(f"第一帧必须是 HELLO，收到 {FRAME_NAMES[frame_type]}")
+        hello = decode_json(payload)
+        self.device_id = str(hello.get("device_id") or f"session-{self.session_id}")
+        transport = hello.get("transport", "ogg")
+        if transport not in TRANSPORTS:
+            raise ProtocolError(f"不支持的音频传输格式: {transport}")
+        self.transport = transport
+        self.barge_in = bool(hello.get("barge_in", self.config.barge_in))
+        priority = hello.get("priority", INTERACTIVE)
+        if priority not in PRIORITIES:
+            raise ProtocolError(f"不支持的优先级: {priority}")
+        self.priority = priority
+        self.endpointing = bool(hello.get("endpointing", self.config.endpointing))
+        self.server._register(self)
+        await self.send(encode_json(HELLO, {
+            "session_id": self.session_id,
+            "device_id": self.device_id,
+            "transport": self.transport,
+            "barge_in": self.barge_in,
+            "priority": self.priority,
+            "endpointing": self.endpointing,
+            "max_frame_bytes": self.config.max_frame_bytes,
+            **self.server.session_params(),
+        }))
+        return True
+
+    async def _read_loop(self):
+        if not await self._handshake():
+            return
+        while True:
+            frame = await self._read(self.config.idle_timeout)
+            if frame is None:
+                return
+            frame_type, payload = frame
+            if frame_type == AUDIO:
+                if not self._uplink and self.barge_in and not self.endpointing:
+                    # 新的一句开始：打断上一轮(端点检测时改为检测到说话才打断)
+                    self._interrupt()
+                if len(self._uplink) + len(payload) > self.config.max_utterance_bytes:
+                    raise ProtocolError(f"单句语音超过 {self.config.max_utterance_bytes} 字节")
+                self._uplink.extend(payload)
+                if self.endpointing:
+                    try:
+                        if self._stream is None:
+                            self._stream = self._open_stream()
+                        await self._stream.feed(payload)
+                    except Exception as e:
+                        # 无法流式解码(如缺少FFmpeg或数据损坏)：本会话退回到收到 END 再整句解码
+                        print(f"⚠️ 端点检测不可用，改为等待 END: {e}")
+                        self.endpointing = False
+                        if self._stream is not None:
+                            await self._stream.aclose()
+                            self._stream = None
+            elif frame_type == END:
+                if self._stream is not None:
+                    await self._finish_stream()
+                elif self._uplink:
+                    # 待处理队列已满时在此等待，不再读取上行数据
+                    await self._turns.put(("audio", bytes(self._uplink), CancelToken(), time.monotonic(), None))
+                self._uplink.clear()
+            elif frame_type == EVENT:
+                text = decode_json(payload).get("text")
+                if text:
+                    if self.barge_in:
+                        self._interrupt()
+                    await self._turns.put(("text", str(text), CancelToken(), time.monotonic(), None))
+            elif frame_type == PING:
+                await self.send(encode_frame(PONG, payload))
+            elif frame_type == BYE:
+                return
+            else:
+                raise ProtocolError(f"设备不应发送 {FRAME_NAMES[frame_type]} 帧")
+
+    # ------------------------------------------------------------------
+    # 服务端端点检测
+    # ------------------------------------------------------------------
+
+    def _open_stream(self) -> UplinkStream:
+        from ..audio.streaming import StreamingOpusDecoder
+        decoder = StreamingOpusDecoder(transport=self.transport)
+        recognizer = None
+        if self.config.partial_interval_ms > 0 and hasattr(self.server.pipeline, "transcribe_partial"):
+            interval = self.config.partial_interval_ms / 1000
+
+            async def recognizer(wav: bytes):
+                # 中间识别只用ASR的空闲容量，赶不上下一次间隔就放弃
+                return await self.server.pipeline.transcribe_partial(wav, time.monotonic() + interval)
+        on_partial = None
+        if recognizer is not None and self.config.speculate_stable_ms > 0 \
+                and hasattr(self.server.pipeline, "speculate"):
+            on_partial = self._on_partial
+        return UplinkStream(decoder, Endpointer(decoder.sample_rate), self._on_endpoint,
+                            on_speech=self._on_speech, on_resume=self._on_resume,
+                            recognizer=recognizer, partial_interval_ms=self.config.partial_interval_ms,
+                            on_partial=on_partial)
+
+    def _on_speech(self):
+        if self.barge_in:
+            # 确认开始说话：打断上一轮
+            self._interrupt()
+
+    async def _on_endpoint(self, wav: bytes):
+        # 检测到句尾：不等设备的静音拖尾和 END，立即开始识别
+        token = CancelToken()
+        self._stream_token = token
+        self.stats["endpoints"] += 1
+        await self._turns.put(("pcm", wav, token, time.monotonic(), self._take_speculation()))
+
+    def _on_partial(self, text: str):
+        # 中间结果变了：之前的推测作废，重新等待结果稳定
+        self._drop_speculation("partial_changed")
+        self._speculate_task = asyncio.ensure_future(self._speculate_when_stable(text))
+
+    async def _speculate_when_stable(self, text: str):
+        await asyncio.sleep(self.config.speculate_stable_ms / 1000)
+        stream = self._stream
+        if stream is None or stream.fired or stream.partial != text:
+            return
+        history = self.server.history_for(self.device_id)
+        self._speculation = self.server.pipeline.speculate(
+            text, history.get_messages() if history is not None else None)
+        self.stats["speculations"] += 1
+
+    def _take_speculation(self):
+        """提交一轮时带上当前的推测请求(由流水线按最终识别结果决定采用或放弃)"""
+        if self._speculate_task is not None:
+            self._speculate_task.cancel()
+            self._speculate_task = None
+        speculation, self._speculation = self._speculation, None
+        return speculation
+
+    def _drop_speculation(self, reason: str):
+        if self._speculate_task is not None:
+            self._speculate_task.cancel()
+            self._speculate_task = None
+        if self._speculation is not None:
+            self._speculation.cancel(reason)
+            self._speculation = None
+
+    def _on_resume(self):
+        # 用户只是停顿：放弃按前半句开始的一轮，之后按整句重新提交
+        if self._stream_token is not None:
+            self._stream_token.cancel("resumed")
+            self._stream_token = None
+        self.stats["resumes"] += 1
+
+    async def _finish_stream(self):
+        """设备发来 END：已检测到句尾时丢弃拖尾，否则以整句提交"""
+        stream, self._stream = self._stream, None
+        if stream.fired:
+            self.stats["hangover_saved_ms"] += int((time.monotonic() - stream.fired_at) * 1000)
+            await stream.aclose()
+        else:
+            try:
+                wav = await stream.finish()
+            except Exception as e:
+                print(f"⚠️ 流式解码失败，改为整句解码: {e}")
+                wav = None
+            if not stream.fired:
+                # 未检测到句尾(如一直有噪声)：与关闭端点检测时一样按整句处理
+                if wav is not None and stream.pcm:
+                    await self._turns.put(("pcm", wav, CancelToken(), time.monotonic(), self._take_speculation()))
+                elif self._uplink:
+                    await self._turns.put(("audio", bytes(self._uplink), CancelToken(), time.monotonic(), None))
+        self._stream_token = None
+        self._drop_speculation("utterance_end")
+
+    # ------------------------------------------------------------------
+    # 对话处理
+    # ------------------------------------------------------------------
+
+    def _interrupt(self):
+        """打断：取消进行中的一轮以及排队中的轮次"""
+        interrupted = False
+        while not self._turns.empty():
+            turn = self._turns.get_nowait()
+            if turn is not None:
+                turn[2].cancel("barge_in")
+                interrupted = True
+            else:
+                # 停止标记放回去
+                self._turns.put_nowait(None)
+                break
+        if self._turn_token is not None and self._turn_token.cancel("barge_in"):
+            interrupted = True
+        if interrupted:
+            self.stats["barge_ins"] += 1
+
+    async def _turn_loop(self):
+        while True:
+            turn = await self._turns.get()
+            if turn is None:
+                return
+            kind, data, token, received_at, speculation = turn
+            if token.cancelled:
+                if speculation is not None:
+                    speculation.cancel("cancelled")
+                self.stats["cancelled_turns"] += 1
+                continue
+            self._turn_token = token
+            try:
+                if await self._run_turn(kind, data, token, received_at + self.config.turn_deadline, speculation):
+                    self.stats["turns"] += 1
+                else:
+                    self.stats["cancelled_turns"] += 1
+            except (ConnectionError, OSError):
+                return
+            except Overloaded as e:
+                # 快速拒绝：设备可提示稍后再试，而不是长时间等待
+                self.stats["rejected_turns"] += 1
+                await self.send(encode_json(ERROR, {"code": "overloaded", "stage": e.stage, "message": str(e)}))
+            except Exception as e:
+                self.stats["failed_turns"] += 1
+                await self.send(encode_json(ERROR, {"code": "turn_failed", "message": str(e)}))
+            finally:
+                self._turn_token = None
+                if speculation is not None:
+                    # 流水线未来得及处理(如过载被拒绝)的推测请求
+                    speculation.cancel("discarded")
+
+    async def _run_turn(self, kind: str, data: Any, token: CancelToken, deadline: float,
+                        speculation: Any = None) -> bool:
+        """执行一轮对话，返回是否完整结束(被打断时为False)；deadline 为入口阶段最晚开始的时间点"""
+        audio = text = None
+        if kind == "audio":
+            loop = asyncio.get_running_loop()
+            audio = await loop.run_in_executor(None, self.server.decode_uplink, data, self.transport)
+            if token.cancelled:
+                return False
+        elif kind == "pcm":
+            # 端点检测时已边接收边解码
+            audio = data
+        else:
+            text = data
+
+        framer = None
+        if self.transport == "frames" and getattr(self.server.pipeline, "encode", True):
+            # 下行Ogg页拆成裸Opus包，去掉页头开销
+            from ..audio.framing import OpusFrameEncoder
+            framer = OpusFrameEncoder(self.server.frame_duration_ms)
+
+        history = self.server.history_for(self.device_id)
+        transcript = text
+        reply = None
+        async for event in self.server.pipeline.run(
+                audio=audio, text=text,
+                conversation_history=history.get_messages() if history is not None else None,
+                tenant=self.device_id,
+                cancel_token=token,
+                priority=self.priority,
+                deadline=deadline,
+                speculation=speculation):
+            event_type = event["type"]
+            if event_type == "audio":
+                data = framer.feed(event["data"]) if framer is not None else event["data"]
+                if data:
+                    await self.send(encode_frame(AUDIO, data), token)
+            elif event_type == "metrics":
+                if framer is not None:
+                    await self.send(encode_frame(AUDIO, framer.finish()), token)
+                reply = event.get("reply")
+                await self.send(encode_json(END, event), token)
+            elif event_type == "cancelled":
+                # 不随本轮丢弃：设备据此停止播放已收到的音频
+                await self.send(encode_json(EVENT, event))
+                return False
+            else:
+                if event_type == "transcript":
+                    transcript = event["text"]
+                await self.send(encode_json(EVENT, event), token)
+        if history is not None and reply:
+            self._record_history(history, transcript, reply)
+        return True
+
+    def _record_history(self, history: Any, transcript: str, reply: str):
+        """
+        本轮写入会话历史：设备已收到END，这里只影响下一轮的上下文
+
+        超出预算时的摘要由 ConversationHistory 在后台生成，不阻塞事件循环；
+        写入失败不影响本轮结果
+        """
+        try:
+            history.add_turn(transcript, reply)
+        except Exception as e:
+            self.stats["history_errors"] += 1
+            print(f"⚠️ 设备 {self.device_id} 会话历史写入失败: {e}")
+
+    # ------------------------------------------------------------------
+    # 生命周期
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _cancel(*tasks: Optional[asyncio.Task]):
+        for task in tasks:
+            if task is not None and not task.done():
+                task.cancel()
+
+    def _send_error(self, code: str, message: str):
+        try:
+            self._outbound.put_nowait((encode_json(ERROR, {"code": code, "message": message}), None))
+        except asyncio.QueueFull:
+            pass
+
+    async def run(self):
+        """运行会话直到设备断开、会话被替换或服务关闭"""
+        self._writer_task = asyncio.ensure_future(self._write_loop())
+        self._worker_task = asyncio.ensure_future(self._turn_loop())
+        self._reader_task = asyncio.ensure_future(self._read_loop())
+        try:
+            await asyncio.wait([self._reader_task])
+            error = None if self._reader_task.cancelled() else self._reader_task.exception()
+            if isinstance(error, ProtocolError):
+                self._send_error("protocol_error", str(error))
+            elif isinstance(error, asyncio.TimeoutError):
+                self._send_error("timeout", "等待设备数据超时")
+
+            if self._draining and not self._worker_task.done():
+                # 服务关闭：不再接收新的一轮，已收到的对话在期限内处理完
+                async def finish_turns():
+                    await self._turns.put(None)
+                    await self._worker_task
+                try:
+                    await asyncio.wait_for(finish_turns(), self.config.shutdown_timeout)
+                except asyncio.TimeoutError:
+                    pass
+            self._cancel(self._worker_task)
+            await asyncio.gather(self._worker_task, return_exceptions=True)
+
+            if not self._writer_task.done():
+                try:
+                    self._outbound.put_nowait((encode_frame(BYE), None))
+                    self._outbound.put_nowait(None)
+                except asyncio.QueueFull:
+                    self._cancel(self._writer_task)
+                await asyncio.wait([self._writer_task], timeout=self.config.shutdown_timeout)
+        finally:
+            if self._stream is not None:
+                await self._stream.aclose()
+                self._stream = None
+            self._drop_speculation("disconnected")
+            if self._turn_token is not None:
+                # 连接已断开：线程中的LLM流等也立即停止
+                self._turn_token.cancel("disconnected")
+            self._cancel(self._reader_task, self._worker_task, self._writer_task)
+            await asyncio.gather(self._reader_task, self._worker_task, self._writer_task,
+                                 return_exceptions=True)
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+    def drain(self):
+        """优雅结束：停止读取，处理完已收到的对话后断开"""
+        self._draining = True
+        self._cancel(self._reader_task)
+
+    def abort(self):
+        """立即结束会话，丢弃进行中的对话"""
+        self._cancel(self._reader_task, self._worker_task)
+
+    def get_stats(self) -> Dict:
+        """获取会话统计"""
+        return {
+            "session_id": self.session_id,
+            "device_id": self.device_id,
+            "peer": str(self.peer),
+            "uptime": round(time.monotonic() - self.created_at, 1),
+            "pending_turns": self._turns.qsize(),
+            "send_queue": self._outbound.qsize(),
+            **self.stats,
+        }
+
+
+class DeviceServer:
+    """
+    设备接入服务
+
+    同一个进程内的所有会话共享流水线(及其背后的 ASR/LLM/TTS 单例)，
+    同一设备ID重复连接时新连接替换旧会话
+    """
+
+    def __init__(self, pipeline: Any, config: Optional[ServerConfig] = None, history_store: Any = None):
+        """
+        初始化服务
+
+        Args:
+            pipeline: VoicePipeline 实例
+            config: 服务配置，默认读取环境变量
+            history_store: 按设备管理对话历史的 HistoryStore，默认使用 pipeline.llm.history_store(若有)
+        """
+        self.pipeline = pipeline
+        self.config = config or ServerConfig()
+        if history_store is None:
+            history_store = getattr(pipeline.llm, "history_store", None)
+        self.history_store = history_store
+
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._sessions: Dict[DeviceSession, asyncio.Task] = {}
+        self._devices: Dict[str, DeviceSession] = {}
+        self._uplink = None
+        self._closing = False
+        self._stats = {"accepted": 0, "rejected": 0, "replaced": 0}
+
+    # ------------------------------------------------------------------
+    # 会话使用的共享资源
+    # ------------------------------------------------------------------
+
+    def session_params(self) -> Dict:
+        """HELLO 回复中告知设备的会话参数"""
+        params: Dict[str, Any] = {"preset": getattr(self.pipeline, "preset", None)}
+        if getattr(self.pipeline, "encode", True):
+            params["codec"] = "opus"
+        else:
+            params["codec"] = getattr(self.pipeline.tts, "audio_format", "mp3")
+        return params
+
+    @property
+    def frame_duration_ms(self) -> float:
+        """下行Opus帧长(毫秒)，写入紧凑帧的 CONFIG"""
+        from ..audio.audio import DownlinkProcessor
+        presets = DownlinkProcessor._get_presets()
+        config = presets.get(getattr(self.pipeline, "preset", None)) or presets["balanced"]
+        return float(config["frame_duration"])
+
+    def decode_uplink(self, opus_data: bytes, transport: str = "ogg") -> bytes:
+        """将一句上行Opus数据解码为单声道WAV(阻塞，在线程池中调用)"""
+        from ..audio.audio import UplinkProcessor, build_wav_header
+        if self._uplink is None:
+            self._uplink = UplinkProcessor()
+        if transport == "frames":
+            opus_data = UplinkProcessor.frames_to_opus(opus_data)
+        pcm = self._uplink.decode_to_pcm(opus_data, channels=1)
+        return build_wav_header(len(pcm), self._uplink.sample_rate, 1, self._uplink.bit_depth) + pcm
+
+    def history_for(self, device_id: str):
+        """获取设备的对话历史，未配置历史存储时返回None"""
+        if self.history_store is None:
+            return None
+        return self.history_store.get(device_id)
+
+    def _register(self, session: DeviceSession):
+        previous = self._devices.get(session.device_id)
+        if previous is not None and previous is not session:
+            self._stats["replaced"] += 1
+            previous.abort()
+        self._devices[session.device_id] = session
+
+    # ------------------------------------------------------------------
+    # 连接处理
+    # ------------------------------------------------------------------
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        if self._closing or len(self._sessions) >= self.config.max_connections:
+            self._stats["rejected"] += 1
+            writer.write(encode_json(ERROR, {"code": "busy", "message": "服务连接数已满"}))
+            try:
+                await writer.drain()
+            except (ConnectionError, OSError):
+                pass
+            writer.close()
+            return
+
+        session = DeviceSession(self, reader, writer)
+        self._sessions[session] = asyncio.current_task()
+        self._stats["accepted"] += 1
+        try:
+            await session.run()
+        finally:
+            self._sessions.pop(session, None)
+            if self._devices.get(session.device_id) is session:
+                del self._devices[session.device_id]
+
+    async def start(self):
+        """开始监听"""
+        if self._server is None:
+            self._server = await asyncio.start_server(self._handle, self.config.host, self.config.port)
+            print(f"🛰️ 设备服务已启动: {self.address}")
+            print(f"   最大连接数: {self.config.max_connections}")
+
+    @property
+    def address(self):
+        """实际监听地址(端口为0时可从这里获得随机端口)"""
+        if self._server is None or not self._server.sockets:
+            return None
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self):
+        """启动并一直运行，直到被取消或调用 shutdown"""
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+
+    async def shutdown(self, timeout: Optional[float] = None):
+        """
+        优雅关闭：停止接受新连接，各会话处理完已收到的对话后断开
+
+        Args:
+            timeout: 最长等待秒数，默认为 shutdown_timeout 加上发送余量
+        """
+        self._closing = True
+        if self._server is not None:
+            self._server.close()
+        sessions = list(self._sessions.items())
+        for session, _ in sessions:
+            session.drain()
+        if sessions:
+            if timeout is None:
+                timeout = self.config.shutdown_timeout * 2 + 1
+            _, pending = await asyncio.wait([task for _, task in sessions], timeout=timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+        print("🛑 设备服务已关闭")
+
+    def get_stats(self) -> Dict:
+        """获取服务统计"""
+        stats = {
+            **self._stats,
+            "active": len(self._sessions),
+            "devices": len(self._devices),
+            "sessions": [session.get_stats() for session in self._sessions],
+        }
+        admission = getattr(self.pipeline, "admission", None)
+        if admission is not None:
+            stats["admission"] = admission.get_stats()
+        speculation_stats = getattr(self.pipeline, "speculation_stats", None)
+        if speculation_stats is not None and speculation_stats.attempts:
+            stats["speculation"] = speculation_stats.to_dict()
+        return stats
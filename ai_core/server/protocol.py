@@ -0,0 +1,102 @@
+"""设备通信协议 - 基于TCP的长度前缀帧
+
+每帧格式: 1字节帧类型 + 4字节大端负载长度 + 负载
+控制类帧的负载为UTF-8 JSON，音频帧的负载为原始字节
+"""
+
+import json
+import struct
+import asyncio
+from typing import Any, Dict, Optional, Tuple
+
+# 帧头: 类型(1字节) + 负载长度(4字节，大端)
+HEADER = struct.Struct("!BI")
+
+# 帧类型
+HELLO = 0x01   # 设备→服务: {"device_id", "transport"}；服务→设备: 会话参数
+AUDIO = 0x02   # 上行/下行音频: transport 为 "ogg" 时是Ogg/Opus数据，为 "frames" 时是紧凑帧
+END = 0x03     # 设备→服务: 一句话说完；服务→设备: 本轮回复结束(附阶段耗时)
+EVENT = 0x04   # 设备→服务: {"text"} 跳过ASR；服务→设备: 识别结果/分句等事件
+ERROR = 0x05   # 错误 {"code", "message"}
+PING = 0x06    # 心跳，服务原样回复 PONG
+PONG = 0x07
+BYE = 0x08     # 任一方主动结束会话
+
+FRAME_NAMES = {
+    HELLO: "HELLO", AUDIO: "AUDIO", END: "END", EVENT: "EVENT",
+    ERROR: "ERROR", PING: "PING", PONG: "PONG", BYE: "BYE",
+}
+
+
+class ProtocolError(Exception):
+    """帧格式错误或超出限制"""
+
+
+def encode_frame(frame_type: int, payload: bytes = b"") -> bytes:
+    """
+    编码一帧
+
+    Args:
+        frame_type: 帧类型
+        payload: 负载数据
+
+    Returns:
+        bytes: 帧头+负载
+    """
+    return HEADER.pack(frame_type, len(payload)) + payload
+
+
+def encode_json(frame_type: int, message: Optional[Dict[str, Any]] = None) -> bytes:
+    """编码JSON负载的控制帧"""
+    payload = json.dumps(message or {}, ensure_ascii=False).encode("utf-8")
+    return encode_frame(frame_type, payload)
+
+
+def decode_json(payload: bytes) -> Dict[str, Any]:
+    """
+    解析控制帧的JSON负载
+
+    Raises:
+        ProtocolError: 负载不是JSON对象时抛出
+    """
+    if not payload:
+        return {}
+    try:
+        message = json.loads(payload.decode("utf-8"))
+    except (UnicodeDecodeError, ValueError) as e:
+        raise ProtocolError(f"无效的JSON负载: {e}")
+    if not isinstance(message, dict):
+        raise ProtocolError("JSON负载必须是对象")
+    return message
+
+
+async def read_frame(reader: asyncio.StreamReader, max_payload: int) -> Optional[Tuple[int, bytes]]:
+    """
+    读取一帧
+
+    Args:
+        reader: 连接的读取端
+        max_payload: 允许的最大负载字节数
+
+    Returns:
+        Optional[Tuple[int, bytes]]: (帧类型, 负载)，对端正常关闭连接时返回None
+
+    Raises:
+        ProtocolError: 帧类型未知、负载超限或连接在帧中途断开
+    """
+    try:
+        header = await reader.readexactly(HEADER.size)
+    except asyncio.IncompleteReadError as e:
+        if not e.partial:
+            return None
+        raise ProtocolError("连接在帧头中途断开")
+    frame_type, length = HEADER.unpack(header)
+    if frame_type not in FRAME_NAMES:
+        raise ProtocolError(f"未知帧类型: {frame_type:#04x}")
+    if length > max_payload:
+        raise ProtocolError(f"帧负载过大: {length} > {max_payload}")
+    try:
+        payload = await reader.readexactly(length) if length else b""
+    except asyncio.IncompleteReadError:
+        raise ProtocolError("连接在帧负载中途断开")
+    return frame_type, payload
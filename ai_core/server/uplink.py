@@ -0,0 +1,157 @@
+"""上行语音流 - 设备说话期间边接收边解码，服务端检测句尾后立即开始识别"""
+
+import time
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from ..audio.endpoint import Endpointer
+
+
+class UplinkStream:
+    """
+    一句上行语音的流式解码与端点检测
+
+    AUDIO 帧到达即写入常驻解码器，解码出的PCM送入 Endpointer：
+    - 确认开始说话时回调 on_speech(用于打断上一轮回复)
+    - 判定说完时回调 on_endpoint(已累计的WAV)，不必等设备端静音拖尾结束再发 END
+    - 判定后用户又开口(只是停顿)时回调 on_resume，之后再次判定说完时以完整音频再回调 on_endpoint
+    可选地在说话期间定时对已累计的音频做一次识别，中间结果交给 Endpointer 缩短判定所需的静音，
+    结果变化时回调 on_partial(可据此提前发起推测式LLM请求)
+    """
+
+    def __init__(self,
+                 decoder: Any,
+                 endpointer: Endpointer,
+                 on_endpoint: Callable[[bytes], Awaitable[None]],
+                 on_speech: Optional[Callable[[], None]] = None,
+                 on_resume: Optional[Callable[[], None]] = None,
+                 recognizer: Optional[Callable[[bytes], Awaitable[Optional[str]]]] = None,
+                 partial_interval_ms: int = 0,
+                 on_partial: Optional[Callable[[str], None]] = None):
+        """
+        初始化上行语音流
+
+        Args:
+            decoder: StreamingOpusDecoder，输出16bit单声道PCM
+            endpointer: 端点检测，采样率需与解码输出一致
+            on_endpoint: 判定说完时调用，参数为截至当前的WAV数据
+            on_speech: 确认开始说话时调用
+            on_resume: 判定说完后又出现语音时调用
+            recognizer: 识别WAV数据的协程函数，用于生成中间结果
+            partial_interval_ms: 中间结果的识别间隔(毫秒)，0表示不做中间识别
+            on_partial: 中间结果变化时调用
+        """
+        self.decoder = decoder
+        self.endpointer = endpointer
+        self.on_endpoint = on_endpoint
+        self.on_speech = on_speech
+        self.on_resume = on_resume
+        self.recognizer = recognizer
+        self.partial_interval_ms = partial_interval_ms
+        self.on_partial = on_partial
+
+        self.pcm = bytearray()
+        self.partial: Optional[str] = None
+        # 最近一次判定说完的时间(monotonic)，设备随后发 END 时据此统计省下的拖尾时间
+        self.fired_at: Optional[float] = None
+        self.endpoints = 0
+        self.partials = 0
+        self._reader_task: Optional[asyncio.Task] = None
+        self._partial_task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """启动解码输出的读取(及中间识别)"""
+        if self._reader_task is None:
+            self._reader_task = asyncio.ensure_future(self._read_loop())
+            if self.recognizer is not None and self.partial_interval_ms > 0:
+                self._partial_task = asyncio.ensure_future(self._partial_loop())
+
+    async def feed(self, data: bytes):
+        """写入一帧上行音频数据"""
+        self.start()
+        await self.decoder.write(data)
+
+    def wav(self) -> bytes:
+        """截至当前解码出的音频(WAV)"""
+        from ..audio.audio import build_wav_header
+        return build_wav_header(len(self.pcm), self.endpointer.sample_rate, 1) + bytes(self.pcm)
+
+    @property
+    def speech_started(self) -> bool:
+        """是否检测到说话"""
+        return self.endpointer.speech_started
+
+    @property
+    def fired(self) -> bool:
+        """当前是否处于已判定说完的状态"""
+        return self.endpointer.fired
+
+    async def _read_loop(self):
+        endpointer = self.endpointer
+        async for chunk in self.decoder.chunks():
+            self.pcm.extend(chunk)
+            had_speech = endpointer.speech_started
+            resumes = endpointer.resumes
+            fired = endpointer.feed(chunk)
+            if not had_speech and endpointer.speech_started and self.on_speech is not None:
+                self.on_speech()
+            if endpointer.resumes != resumes:
+                self.fired_at = None
+                if self.on_resume is not None:
+                    self.on_resume()
+            if fired and endpointer.fired:
+                self.fired_at = time.monotonic()
+                self.endpoints += 1
+                await self.on_endpoint(self.wav())
+
+    async def _partial_loop(self):
+        interval = self.partial_interval_ms / 1000
+        recognized = 0
+        while True:
+            await asyncio.sleep(interval)
+            if not self.speech_started or self.fired or len(self.pcm) == recognized:
+                continue
+            recognized = len(self.pcm)
+            try:
+                text = await self.recognizer(self.wav())
+            except Exception:
+                # 中间结果只是辅助，识别失败或被拒绝时沿用静音判定
+                continue
+            if text:
+                changed = text != self.partial
+                self.partial = text
+                self.partials += 1
+                self.endpointer.update_partial(text)
+                if changed and self.on_partial is not None:
+                    self.on_partial(text)
+
+    async def finish(self) -> bytes:
+        """
+        设备发来 END：输入结束，等待剩余PCM解码完
+
+        Returns:
+            bytes: 整句音频(WAV)
+        """
+        self.start()
+        if self._partial_task is not None:
+            self._partial_task.cancel()
+        await self.decoder.close_input()
+        try:
+            await self._reader_task
+        finally:
+            await self.aclose()
+        return self.wav()
+
+    async def aclose(self):
+        """终止解码与中间识别"""
+        for task in (self._partial_task, self._reader_task):
+            if task is not None and not task.done():
+                task.cancel()
+        tasks = [task for task in (self._partial_task, self._reader_task) if task is not None]
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.decoder.aclose()
+
+    def get_stats(self) -> Dict:
+        """获取本句的检测统计"""
+        return {"pcm_bytes": len(self.pcm), "endpoints": self.endpoints, "partials": self.partials,
+                **self.endpointer.get_stats()}
@@ -0,0 +1,39 @@
+"""
+TTS (语音合成) 模块
+
+提供文本转语音功能：EdgeTTS(在线)、LocalTTS(本地离线)，均实现 TTSBackend 接口，
+TTSRouter 可将短提示路由到本地引擎
+
+注意：EdgeTTS 依赖 edge-tts，采用懒加载，仅在首次访问时导入
+"""
+
+import importlib
+
+# 导出名称 -> 所在子模块
+_LAZY_EXPORTS = {
+    'EdgeTTS': '.edge',
+    'LocalTTS': '.local',
+    'TTSBackend': '.base',
+    'TTSRouter': '.router',
+    'EventLoopThread': '.loop',
+    'SynthesisParams': '.edge',
+    'FairScheduler': '.scheduler',
+    'PhraseCache': '.phrase_cache',
+    'ConnectionManager': '.connection',
+}
+
+__all__ = list(_LAZY_EXPORTS)
+
+
+def __getattr__(name):
+    """按需导入导出对象"""
+    if name in _LAZY_EXPORTS:
+        module = importlib.import_module(_LAZY_EXPORTS[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals().keys()) + __all__)
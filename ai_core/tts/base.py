@@ -0,0 +1,73 @@
+"""TTS 后端接口 - 各合成引擎(EdgeTTS、本地引擎)的统一抽象"""
+
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Dict, Optional
+
+
+class TTSBackend(ABC):
+    """
+    TTS 合成后端
+
+    子类实现 stream_speech 流式产出音频块与词边界事件，
+    整段合成、路由与流水线都只依赖这一接口
+    """
+
+    # 后端名称，用于统计与路由
+    name: str = "base"
+
+    # stream_speech 产出的音频容器格式 ("mp3"、"wav")
+    audio_format: str = "mp3"
+
+    @abstractmethod
+    def stream_speech(self,
+                      text: str,
+                      voice: Optional[str] = None,
+                      rate: Optional[str] = None,
+                      volume: Optional[str] = None,
+                      word_boundaries: bool = True,
+                      tenant: str = "default") -> AsyncIterator[Dict]:
+        """
+        流式合成语音(异步生成器)
+
+        Args:
+            text: 要转换的文本内容
+            voice: 语音角色，不指定则使用默认
+            rate: 语速调节，如 "+20%"
+            volume: 音量调节，如 "-10%"
+            word_boundaries: 是否产出词边界事件
+            tenant: 租户标识(如设备ID)
+
+        Yields:
+            Dict: 音频块 {"type": "audio", "data": bytes}，
+                  或词边界 {"type": "WordBoundary", "offset": 秒, "duration": 秒, "text": str}
+        """
+
+    async def synthesize_async(self,
+                               text: str,
+                               voice: Optional[str] = None,
+                               rate: Optional[str] = None,
+                               volume: Optional[str] = None,
+                               tenant: str = "default") -> bytes:
+        """
+        合成完整音频数据
+
+        Args:
+            text: 要转换的文本内容
+            voice: 语音角色，不指定则使用默认
+            rate: 语速调节
+            volume: 音量调节
+            tenant: 租户标识
+
+        Returns:
+            bytes: audio_format 格式的音频数据
+        """
+        chunks = []
+        async for chunk in self.stream_speech(text, voice, rate, volume, word_boundaries=False, tenant=tenant):
+            chunks.append(chunk["data"])
+        if not chunks:
+            raise Exception("未收到音频数据")
+        return b"".join(chunks)
+
+    def get_tts_info(self) -> Dict:
+        """获取后端信息"""
+        return {"backend": self.name, "audio_format": self.audio_format}
@@ -0,0 +1,291 @@
+"""TTS 连接管理 - 共享连接池、启动预热与空闲后重新预热"""
+
+import os
+import time
+import asyncio
+import threading
+from typing import Dict, Optional
+
+# edge-tts 的服务主机，预热时对同一主机建立TLS连接
+EDGE_TTS_HOST = "speech.platform.bing.com"
+DEFAULT_PREWARM_URL = f"https://{EDGE_TTS_HOST}/"
+
+_shared_connector_class = None
+
+
+async def _noop():
+    return None
+
+
+def _get_shared_connector_class():
+    """
+    创建忽略会话关闭请求的连接器类(首次使用时才导入aiohttp)
+
+    edge-tts 每次合成都会创建 ClientSession 并在结束时关闭，
+    会话默认持有连接器，关闭会话会一并关闭连接器；
+    共享连接器只在 ConnectionManager 关闭时才真正关闭。
+    设置 redirect 后，发往 edge-tts 服务主机的请求改发到该地址(路径与参数不变)
+    """
+    global _shared_connector_class
+    if _shared_connector_class is None:
+        import aiohttp
+
+        class SharedTCPConnector(aiohttp.TCPConnector):
+            _allow_close = False
+            # 合成请求改发的目标地址(yarl.URL)，None表示使用 edge-tts 的地址
+            redirect = None
+
+            def close(self, *args, **kwargs):
+                if self._allow_close:
+                    return super().close(*args, **kwargs)
+                return _noop()
+
+            async def connect(self, req, traces, timeout):
+                target = self.redirect
+                if target is not None and req.url.host == EDGE_TTS_HOST:
+                    # 在取用连接池之前改写目标，连接按改写后的主机复用
+                    req.url = (req.url.with_scheme(target.scheme)
+                               .with_host(target.host).with_port(target.explicit_port))
+                    req.headers[aiohttp.hdrs.HOST] = (f"{target.host}:{target.port}"
+                                                      if target.explicit_port else target.host)
+                return await super().connect(req, traces, timeout)
+
+        _shared_connector_class = SharedTCPConnector
+    return _shared_connector_class
+
+
+def _edge_ssl_context():
+    """
+    获取 edge-tts 建立websocket时使用的SSL上下文
+
+    连接池按(主机, 端口, SSL上下文, 代理)区分连接，预热必须使用同一个上下文，
+    预热好的连接才能被 websocket 握手复用
+    """
+    try:
+        from edge_tts import communicate
+        return getattr(communicate, "_SSL_CTX", True)
+    except ImportError:
+        return True
+
+
+class _LoopState:
+    """单个事件循环上的连接池状态(aiohttp连接器绑定事件循环)"""
+
+    __slots__ = ("connector", "rewarm_task", "refill_task", "last_used", "last_active")
+
+    def __init__(self, connector):
+        self.connector = connector
+        self.rewarm_task: Optional[asyncio.Task] = None
+        self.refill_task: Optional[asyncio.Task] = None
+        # last_used 在重新预热后也会刷新；last_active 只记录真实的合成请求
+        self.last_used = time.monotonic()
+        self.last_active = self.last_used
+
+
+class ConnectionManager:
+    """
+    TTS 服务连接管理器
+
+    在各事件循环上维护一个共享的 aiohttp 连接器，并预先建立到TTS服务的TLS keep-alive连接。
+    edge-tts 的 websocket 握手会直接取用池中的空闲连接，省去DNS解析、TCP与TLS握手；
+    websocket 连接用完即关闭(协议不允许放回连接池)，因此每次使用后在后台补充一个预热连接，
+    空闲超过 rewarm_interval 后重新预热，避免服务端断开空闲连接后首个请求变慢；
+    超过 rewarm_idle_timeout 没有合成请求时停止重新预热，下次合成时恢复。
+    指定 synthesis_url 时合成改发到该地址(自建代理或本地模拟服务 scripts/mock_tts_server.py)，
+    预热默认也指向该主机
+    """
+
+    def __init__(self,
+                 endpoint: Optional[str] = None,
+                 synthesis_url: Optional[str] = None,
+                 warm_connections: Optional[int] = None,
+                 keepalive_timeout: Optional[float] = None,
+                 rewarm_interval: Optional[float] = None,
+                 rewarm_idle_timeout: Optional[float] = None,
+                 limit: Optional[int] = None):
+        """
+        初始化连接管理器，未指定的参数读取环境变量
+
+        Args:
+            endpoint: 预热请求的地址 (TTS_PREWARM_URL)，需与合成服务为同一主机，
+                预热的连接才能被 websocket 握手复用；默认为合成服务主机的根路径
+            synthesis_url: 合成websocket改发的地址 (TTS_SYNTHESIS_URL)，如 ws://127.0.0.1:8766，
+                只取协议、主机与端口；默认使用 edge-tts 的服务地址
+            warm_connections: 保持的预热连接数 (TTS_WARM_CONNECTIONS，默认2)
+            keepalive_timeout: 空闲连接保持时间(秒) (TTS_KEEPALIVE_TIMEOUT，默认60)
+            rewarm_interval: 空闲多久后重新预热(秒) (TTS_REWARM_INTERVAL，默认30，0表示不重新预热)
+            rewarm_idle_timeout: 多久没有合成请求后停止重新预热(秒) (TTS_REWARM_IDLE_TIMEOUT，默认300)
+            limit: 连接池最大连接数 (TTS_MAX_CONNECTIONS，默认100)
+        """
+        self.synthesis_url = synthesis_url or os.getenv('TTS_SYNTHESIS_URL') or None
+        self.endpoint = endpoint or os.getenv('TTS_PREWARM_URL') or self._default_endpoint()
+        self.warm_connections = (warm_connections if warm_connections is not None
+                                 else int(os.getenv('TTS_WARM_CONNECTIONS', '2')))
+        self.keepalive_timeout = keepalive_timeout or float(os.getenv('TTS_KEEPALIVE_TIMEOUT', '60'))
+        self.rewarm_interval = (rewarm_interval if rewarm_interval is not None
+                                else float(os.getenv('TTS_REWARM_INTERVAL', '30')))
+        self.rewarm_idle_timeout = rewarm_idle_timeout or float(os.getenv('TTS_REWARM_IDLE_TIMEOUT', '300'))
+        self.limit = limit or int(os.getenv('TTS_MAX_CONNECTIONS', '100'))
+
+        self._states: Dict[asyncio.AbstractEventLoop, _LoopState] = {}
+        self._lock = threading.Lock()
+        self._stats = {"prewarms": 0, "prewarm_failures": 0, "refills": 0,
+                       "rewarms": 0, "uses": 0, "last_prewarm_ms": None}
+
+    @classmethod
+    def from_env(cls) -> Optional['ConnectionManager']:
+        """
+        根据环境变量创建连接管理器，TTS_CONNECTION_REUSE 关闭时返回None
+
+        Returns:
+            Optional[ConnectionManager]: 连接管理器
+        """
+        if os.getenv('TTS_CONNECTION_REUSE', 'true').lower() not in ('1', 'true', 'yes'):
+            return None
+        return cls()
+
+    def _default_endpoint(self) -> str:
+        """合成服务主机的根路径(websocket地址对应的HTTP地址)"""
+        if not self.synthesis_url:
+            return DEFAULT_PREWARM_URL
+        from urllib.parse import urlsplit
+
+        parts = urlsplit(self.synthesis_url)
+        scheme = {"ws": "http", "wss": "https"}.get(parts.scheme, parts.scheme)
+        return f"{scheme}://{parts.netloc}/"
+
+    def _bump(self, name: str, amount: int = 1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def _get_state(self) -> _LoopState:
+        """获取当前事件循环的连接池，不存在或已关闭时创建"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            # 清理已关闭事件循环上的状态
+            for closed_loop in [l for l in self._states if l.is_closed()]:
+                del self._states[closed_loop]
+            state = self._states.get(loop)
+            if state is None or state.connector.closed:
+                connector = _get_shared_connector_class()(
+                    limit=self.limit,
+                    keepalive_timeout=self.keepalive_timeout,
+                    ttl_dns_cache=300,
+                )
+                if self.synthesis_url:
+                    from yarl import URL
+
+                    connector.redirect = URL(self.synthesis_url)
+                state = self._states[loop] = _LoopState(connector)
+        return state
+
+    def _ensure_rewarm(self, state: _LoopState):
+        """有合成请求时启动(或恢复)重新预热"""
+        state.last_active = time.monotonic()
+        if self.rewarm_interval > 0 and (state.rewarm_task is None or state.rewarm_task.done()):
+            state.rewarm_task = asyncio.get_running_loop().create_task(self._rewarm_loop(state))
+
+    def connector(self):
+        """
+        获取当前事件循环上的共享连接器，传给 edge_tts.Communicate(connector=...)
+
+        Returns:
+            aiohttp.TCPConnector: 共享连接器
+        """
+        state = self._get_state()
+        self._ensure_rewarm(state)
+        return state.connector
+
+    async def prewarm(self, count: Optional[int] = None) -> int:
+        """
+        预先建立到TTS服务的keep-alive连接
+
+        Args:
+            count: 预热连接数，不指定时使用 warm_connections
+
+        Returns:
+            int: 成功建立的连接数
+        """
+        import aiohttp
+
+        state = self._get_state()
+        count = self.warm_connections if count is None else count
+        if count <= 0:
+            return 0
+
+        ssl_context = _edge_ssl_context()
+        started = time.perf_counter()
+        async with aiohttp.ClientSession(connector=state.connector, connector_owner=False) as session:
+            async def warm_one() -> bool:
+                try:
+                    async with session.get(self.endpoint, ssl=ssl_context,
+                                           timeout=aiohttp.ClientTimeout(total=10)) as response:
+                        await response.read()
+                    return True
+                except Exception as e:
+                    print(f"⚠️ TTS连接预热失败: {str(e)}")
+                    return False
+
+            # 同时发起，确保建立多条独立连接而不是复用同一条
+            results = await asyncio.gather(*(warm_one() for _ in range(count)))
+
+        warmed = sum(results)
+        with self._lock:
+            self._stats["prewarms"] += warmed
+            self._stats["prewarm_failures"] += count - warmed
+            self._stats["last_prewarm_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return warmed
+
+    def note_use(self):
+        """
+        记录一次合成已占用连接，在后台补充一个预热连接
+
+        需在使用连接的事件循环中调用
+        """
+        state = self._get_state()
+        state.last_used = time.monotonic()
+        self._ensure_rewarm(state)
+        self._bump("uses")
+        if self.warm_connections > 0 and (state.refill_task is None or state.refill_task.done()):
+            state.refill_task = asyncio.get_running_loop().create_task(self._refill())
+
+    async def _refill(self):
+        if await self.prewarm(1):
+            self._bump("refills")
+
+    async def _rewarm_loop(self, state: _LoopState):
+        """空闲超过 rewarm_interval 后重新预热，服务端通常会断开长时间空闲的连接；长时间没有合成请求时退出"""
+        try:
+            while True:
+                await asyncio.sleep(self.rewarm_interval)
+                if time.monotonic() - state.last_active >= self.rewarm_idle_timeout:
+                    return
+                if time.monotonic() - state.last_used >= self.rewarm_interval:
+                    if await self.prewarm():
+                        self._bump("rewarms")
+                    state.last_used = time.monotonic()
+        except asyncio.CancelledError:
+            pass
+
+    async def aclose(self):
+        """关闭当前事件循环上的连接池"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            state = self._states.pop(loop, None)
+        if state is None:
+            return
+        for task in (state.rewarm_task, state.refill_task):
+            if task is not None and not task.done():
+                task.cancel()
+        state.connector._allow_close = True
+        await state.connector.close()
+
+    def get_stats(self) -> Dict:
+        """获取连接管理统计"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["loops"] = len(self._states)
+        stats["endpoint"] = self.endpoint
+        stats["synthesis_url"] = self.synthesis_url
+        stats["warm_connections"] = self.warm_connections
+        return stats
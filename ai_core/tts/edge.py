@@ -1,14 +1,49 @@
-import edge_tts
-import asyncio
 import os
 import time
-from typing import Optional, List, Dict
+import asyncio
+from typing import Optional, List, Dict, Callable, AsyncIterator, NamedTuple
 from pathlib import Path
 
+from .base import TTSBackend
+from .loop import EventLoopThread
+from .scheduler import FairScheduler
+from .phrase_cache import PhraseCache
+from .connection import ConnectionManager
+from ..cancel import CancelToken
+
+# edge-tts 默认输出格式 audio-24khz-48kbitrate-mono-mp3 的码率(bit/s)
+EDGE_MP3_BITRATE = 48000
 
-class EdgeTTS:
+
+def load_warmup_phrases(path: Optional[str]) -> List[str]:
+    """
+    读取预热短语文件，每行一条，忽略空行和 # 开头的注释
+    
+    Args:
+        path: 文件路径，None或不存在时返回空列表
+        
+    Returns:
+        List[str]: 短语列表
+    """
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+class SynthesisParams(NamedTuple):
+    """单次合成请求的不可变参数，请求开始时从实例默认值快照"""
+    voice: str
+    rate: str
+    volume: str
+
+
+class EdgeTTS(TTSBackend):
     """Edge TTS 语音合成封装类"""
     
+    name = "edge"
+    audio_format = "mp3"
+    
     # 类变量用于单例模式
     _instance = None
     
@@ -41,6 +76,28 @@ class EdgeTTS:
             "xiaomo": "zh-CN-XiaomoNeural",     # 中文女声
             "xiaoxuan": "zh-CN-XiaoxuanNeural", # 中文女声
         }
+        
+        # 合成完成回调 (文本, 音频时长秒)，如语速估计器
+        self._synthesis_listeners: List[Callable[[str, float], None]] = []
+        
+        # 同步接口共用的常驻事件循环
+        self.loop_thread = EventLoopThread.get_default()
+        
+        # 并发合成调度(全局上限 + 按租户公平排队)
+        self.scheduler = FairScheduler()
+        
+        # 常用短语缓存(内存LRU + 磁盘)，TTS_CACHE_ENABLED=false 时为None
+        self.phrase_cache = PhraseCache.from_env()
+        # TTS服务连接复用与预热，TTS_CONNECTION_REUSE=false 时为None
+        self.connections = ConnectionManager.from_env()
+        
+        # 各下行预设的Opus编码器，预编码缓存时复用
+        self._downlinks: Dict[str, object] = {}
+        
+        # 分句并行合成：并发上限，以及自动启用的最短文本长度(0表示不自动启用)
+        self.parallelism = int(os.getenv('TTS_PARALLELISM', '4'))
+        self.parallel_min_chars = int(os.getenv('TTS_PARALLEL_MIN_CHARS', '80'))
+        self.segment_max_chars = int(os.getenv('TTS_SEGMENT_MAX_CHARS', '120'))
     
     @classmethod
     def get_instance(cls, voice: str = None, rate: str = "+0%", volume: str = "+0%") -> 'EdgeTTS':
@@ -61,38 +118,390 @@ class EdgeTTS:
             cls._instance = cls(voice=voice, rate=rate, volume=volume)
         return cls._instance
     
-    async def _generate_speech_async(self, text: str, output_path: str) -> bool:
+    def resolve_params(self,
+                       voice: Optional[str] = None,
+                       rate: Optional[str] = None,
+                       volume: Optional[str] = None) -> SynthesisParams:
         """
-        异步生成语音文件
+        生成本次请求的合成参数，未指定的项使用实例默认值
         
         Args:
-            text: 要转换的文本
-            output_path: 输出文件路径
+            voice: 临时使用的语音角色
+            rate: 临时语速调节
+            volume: 临时音量调节
             
         Returns:
-            是否生成成功
+            SynthesisParams: 不可变的合成参数
         """
+        return SynthesisParams(voice or self.voice, rate or self.rate, volume or self.volume)
+    
+    async def stream_speech(self,
+                            text: str,
+                            voice: Optional[str] = None,
+                            rate: Optional[str] = None,
+                            volume: Optional[str] = None,
+                            word_boundaries: bool = True,
+                            tenant: str = "default") -> AsyncIterator[Dict]:
+        """
+        流式合成语音，音频块到达即产出，无需落盘
+        
+        首个音频块可以在后续内容仍在合成时就开始编码和下发
+        
+        Args:
+            text: 要转换的文本内容
+            voice: 临时使用的语音角色，不指定则使用默认
+            rate: 临时语速调节，不指定则使用默认
+            volume: 临时音量调节，不指定则使用默认
+            word_boundaries: 是否产出词边界事件
+            tenant: 租户标识(如设备ID)，用于并发调度的公平排队
+        
+        Yields:
+            Dict: 音频块 {"type": "audio", "data": bytes}，
+                  或词边界 {"type": "WordBoundary", "offset": 秒, "duration": 秒, "text": str}
+        
+        Raises:
+            Exception: 当文本为空或合成失败时抛出异常
+        """
+        if not text or not text.strip():
+            raise Exception("文本内容不能为空")
+        
+        params = self.resolve_params(voice, rate, volume)
+        
+        # 命中短语缓存时直接返回，无需联网合成
+        cache_key = self.phrase_cache.make_key(text, *params) if self.phrase_cache else None
+        cached = await self.phrase_cache.aget(cache_key) if cache_key else None
+        if cached is not None:
+            audio, boundaries = cached
+            if word_boundaries:
+                for boundary in boundaries:
+                    yield dict(boundary)
+            yield {"type": "audio", "data": audio}
+            return
+        
+        import edge_tts
+        
+        kwargs = {"rate": params.rate, "volume": params.volume}
+        try:
+            # edge-tts 7.x 默认只返回句边界，需要显式请求词边界；共享连接器复用预热好的连接
+            connector = self.connections.connector() if self.connections else None
+            communicate = edge_tts.Communicate(text, params.voice, boundary="WordBoundary",
+                                               connector=connector, **kwargs)
+        except TypeError:
+            # 旧版 edge-tts 不支持 boundary/connector 参数
+            connector = None
+            communicate = edge_tts.Communicate(text, params.voice, **kwargs)
+        
+        audio_chunks: List[bytes] = []
+        boundaries: List[Dict] = []
         try:
-            # 创建TTS通信对象
-            communicate = edge_tts.Communicate(text, self.voice, rate=self.rate, volume=self.volume)
+            async with self.scheduler.slot(tenant):
+                async for chunk in communicate.stream():
+                    if chunk["type"] == "audio":
+                        if connector is not None and not audio_chunks:
+                            # websocket已占用预热连接，在后台补充一条
+                            self.connections.note_use()
+                        audio_chunks.append(chunk["data"])
+                        yield {"type": "audio", "data": chunk["data"]}
+                    elif chunk["type"] == "WordBoundary":
+                        # edge-tts 的偏移和时长以100纳秒为单位
+                        boundary = {
+                            "type": "WordBoundary",
+                            "offset": chunk["offset"] / 1e7,
+                            "duration": chunk["duration"] / 1e7,
+                            "text": chunk["text"],
+                        }
+                        boundaries.append(boundary)
+                        if word_boundaries:
+                            yield dict(boundary)
+        except Exception as e:
+            raise Exception(f"EdgeTTS 流式合成失败: {str(e)}")
+        
+        if audio_chunks:
+            audio = b"".join(audio_chunks)
+            if cache_key:
+                self.phrase_cache.put(cache_key, audio, boundaries)
+            self._notify_synthesis(text, self.estimate_duration(len(audio)))
+    
+    def split_segments(self, text: str) -> List[str]:
+        """
+        按句子边界切分长文本，过短的句子并入下一句，过长的句子在逗号处切开
+        
+        Args:
+            text: 要转换的文本内容
             
-            # 生成语音文件
-            await communicate.save(output_path)
+        Returns:
+            List[str]: 分段文本
+        """
+        from ..llm.sentence import split_sentences
+        
+        segments = split_sentences(text, min_chars=6, max_chars=self.segment_max_chars)
+        return [segment for segment in segments if segment.strip()] or [text.strip()]
+    
+    async def stream_segments(self,
+                              text: str,
+                              voice: Optional[str] = None,
+                              rate: Optional[str] = None,
+                              volume: Optional[str] = None,
+                              parallelism: Optional[int] = None,
+                              tenant: str = "default") -> AsyncIterator[Dict]:
+        """
+        分句并行合成，按原文顺序逐段产出
+        
+        各句同时合成(受 parallelism 限制，靠前的句子优先开始)，第一句合成完即可下发，
+        总耗时接近最慢的一批句子而不是所有句子之和
+        
+        Args:
+            text: 要转换的文本内容
+            voice: 临时使用的语音角色，不指定则使用默认
+            rate: 临时语速调节，不指定则使用默认
+            volume: 临时音量调节，不指定则使用默认
+            parallelism: 同时合成的最大句数，不指定时读取 TTS_PARALLELISM
+            tenant: 租户标识(如设备ID)，用于并发调度的公平排队
             
-            return True
+        Yields:
+            Dict: {"index": 序号, "text": 分段文本, "audio": MP3数据, "final": 是否最后一段}
+        """
+        if not text or not text.strip():
+            raise Exception("文本内容不能为空")
+        
+        params = self.resolve_params(voice, rate, volume)
+        segments = self.split_segments(text)
+        # asyncio.Semaphore 按等待顺序唤醒，保证靠前的句子先合成
+        limit = asyncio.Semaphore(max(1, parallelism or self.parallelism))
+        
+        async def synthesize(segment: str) -> bytes:
+            async with limit:
+                return await self.synthesize_async(segment, *params, tenant=tenant)
+        
+        tasks = [asyncio.ensure_future(synthesize(segment)) for segment in segments]
+        try:
+            for index, (segment, task) in enumerate(zip(segments, tasks)):
+                yield {
+                    "index": index,
+                    "text": segment,
+                    "audio": await task,
+                    "final": index == len(segments) - 1,
+                }
+        finally:
+            # 调用方提前退出或某段失败时取消剩余合成
+            pending = [task for task in tasks if not task.done()]
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+    
+    async def synthesize_parallel_async(self,
+                                        text: str,
+                                        voice: Optional[str] = None,
+                                        rate: Optional[str] = None,
+                                        volume: Optional[str] = None,
+                                        parallelism: Optional[int] = None,
+                                        tenant: str = "default") -> bytes:
+        """
+        分句并行合成并拼接为完整MP3(各段码率相同，MP3帧可直接首尾相接)
+        
+        Args:
+            text: 要转换的文本内容
+            voice: 临时使用的语音角色，不指定则使用默认
+            rate: 临时语速调节，不指定则使用默认
+            volume: 临时音量调节，不指定则使用默认
+            parallelism: 同时合成的最大句数
+            tenant: 租户标识(如设备ID)，用于并发调度的公平排队
             
-        except Exception as e:
-            print(f"语音生成失败: {str(e)}")
-            return False
+        Returns:
+            bytes: MP3音频数据
+        """
+        chunks = []
+        async for segment in self.stream_segments(text, voice, rate, volume, parallelism, tenant):
+            chunks.append(segment["audio"])
+        return b"".join(chunks)
     
-    def text_to_speech(self, 
-                      text: str, 
-                      filename: Optional[str] = None,
-                      voice: Optional[str] = None,
-                      rate: Optional[str] = None,
-                      volume: Optional[str] = None) -> Optional[str]:
+    def _use_parallel(self, text: str, parallel: Optional[bool]) -> bool:
+        if parallel is not None:
+            return parallel
+        return 0 < self.parallel_min_chars <= len(text.strip())
+    
+    def _get_downlink(self, preset: str):
+        """获取(或创建)指定预设的下行编码器"""
+        downlink = self._downlinks.get(preset)
+        if downlink is None:
+            from ..audio.audio import DownlinkProcessor
+            downlink = self._downlinks[preset] = DownlinkProcessor(preset=preset)
+        return downlink
+    
+    def _encode_opus(self, audio: bytes, preset: str) -> bytes:
+        """使用下行预设将MP3数据编码为Opus(阻塞，需在线程池中调用)，数据经管道传递不落盘"""
+        return self._get_downlink(preset).encode_bytes(audio, "mp3")
+    
+    async def text_to_opus_async(self,
+                                 text: str,
+                                 preset: str = "balanced",
+                                 voice: Optional[str] = None,
+                                 rate: Optional[str] = None,
+                                 volume: Optional[str] = None,
+                                 tenant: str = "default") -> bytes:
         """
-        将文本转换为语音文件
+        合成并编码为指定下行预设的Opus数据，常用短语直接返回预编码结果
+        
+        Args:
+            text: 要转换的文本内容
+            preset: 下行预设名称 (见 DownlinkProcessor)
+            voice: 临时使用的语音角色，不指定则使用默认
+            rate: 临时语速调节，不指定则使用默认
+            volume: 临时音量调节，不指定则使用默认
+            tenant: 租户标识(如设备ID)，用于并发调度的公平排队
+            
+        Returns:
+            bytes: Opus编码的音频数据
+        """
+        params = self.resolve_params(voice, rate, volume)
+        cache_key = self.phrase_cache.make_key(text, *params) if self.phrase_cache else None
+        opus = await self.phrase_cache.aget_opus(cache_key, preset) if cache_key else None
+        if opus is not None:
+            return opus
+        
+        audio = await self.synthesize_async(text, *params, tenant=tenant)
+        opus = await asyncio.get_running_loop().run_in_executor(None, self._encode_opus, audio, preset)
+        if cache_key:
+            self.phrase_cache.put_opus(cache_key, preset, opus)
+        return opus
+    
+    async def warmup_async(self,
+                           phrases: Optional[List[str]] = None,
+                           presets: Optional[List[str]] = None) -> int:
+        """
+        预先合成常用短语并编码为各下行预设的Opus，写入短语缓存
+        
+        Args:
+            phrases: 短语列表，不指定时读取 TTS_WARMUP_FILE (每行一条)
+            presets: 需要预编码的下行预设，不指定时读取 TTS_WARMUP_PRESETS (逗号分隔)
+            
+        Returns:
+            int: 成功预热的短语数
+        """
+        if self.phrase_cache is None:
+            return 0
+        if phrases is None:
+            phrases = load_warmup_phrases(os.getenv('TTS_WARMUP_FILE'))
+        if presets is None:
+            presets = [p.strip() for p in os.getenv('TTS_WARMUP_PRESETS', '').split(',') if p.strip()]
+        if not phrases:
+            return 0
+        
+        async def warm(phrase: str) -> bool:
+            try:
+                if presets:
+                    for preset in presets:
+                        await self.text_to_opus_async(phrase, preset, tenant="warmup")
+                else:
+                    await self.synthesize_async(phrase, tenant="warmup")
+                return True
+            except Exception as e:
+                print(f"⚠️ 短语预热失败 [{phrase}]: {str(e)}")
+                return False
+        
+        started = time.perf_counter()
+        results = await asyncio.gather(*(warm(phrase) for phrase in phrases))
+        warmed = sum(results)
+        print(f"🔥 TTS短语预热完成: {warmed}/{len(phrases)} 条, 耗时 {time.perf_counter() - started:.1f}s")
+        return warmed
+    
+    async def prewarm_async(self, count: Optional[int] = None) -> int:
+        """
+        预先建立到TTS服务的连接，在当前事件循环上生效
+        
+        Args:
+            count: 预热连接数，不指定时读取 TTS_WARM_CONNECTIONS
+            
+        Returns:
+            int: 成功建立的连接数
+        """
+        if self.connections is None:
+            return 0
+        warmed = await self.connections.prewarm(count)
+        if warmed:
+            print(f"🔌 TTS连接预热完成: {warmed} 条, 耗时 {self.connections.get_stats()['last_prewarm_ms']}ms")
+        return warmed
+    
+    def prewarm(self, count: Optional[int] = None) -> int:
+        """预先建立到TTS服务的连接(同步接口，作用于常驻事件循环)"""
+        return self.loop_thread.run(self.prewarm_async(count))
+    
+    def warmup(self, phrases: Optional[List[str]] = None, presets: Optional[List[str]] = None) -> int:
+        """预热常用短语(同步接口)，参数同 warmup_async"""
+        return self.loop_thread.run(self.warmup_async(phrases, presets))
+    
+    def _resolve_output_path(self, filename: Optional[str]) -> Path:
+        """生成输出文件路径并确保目录存在"""
+        # 生成输出文件名
+        if filename is None:
+            filename = f"tts_output_{time.time_ns()}.mp3"
+        
+        # 确保文件扩展名
+        if not filename.endswith(('.mp3', '.wav')):
+            filename += '.mp3'
+        
+        # 如果filename包含路径分隔符，说明是完整路径
+        if '/' in filename or '\\' in filename:
+            output_path = Path(filename)
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+        else:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            output_path = self.output_dir / filename
+        return output_path
+    
+    async def synthesize_speech_async(self,
+                                      text: str,
+                                      voice: Optional[str] = None,
+                                      rate: Optional[str] = None,
+                                      volume: Optional[str] = None,
+                                      tenant: str = "default",
+                                      parallel: Optional[bool] = None) -> bytes:
+        """
+        异步合成完整的MP3数据，结果留在内存中，可直接交给 DownlinkProcessor.process_audio
+        
+        参数同 text_to_speech_async
+        
+        Returns:
+            bytes: MP3音频数据
+        """
+        if not text or not text.strip():
+            raise Exception("文本内容不能为空")
+        # 本次请求的参数快照，不修改实例上的默认值，并发请求互不影响
+        params = self.resolve_params(voice, rate, volume)
+        if self._use_parallel(text, parallel):
+            return await self.synthesize_parallel_async(text, *params, tenant=tenant)
+        return await self.synthesize_async(text, *params, tenant=tenant)
+    
+    def synthesize(self,
+                   text: str,
+                   voice: Optional[str] = None,
+                   rate: Optional[str] = None,
+                   volume: Optional[str] = None,
+                   tenant: str = "default",
+                   parallel: Optional[bool] = None,
+                   cancel_token: Optional[CancelToken] = None) -> bytes:
+        """
+        合成完整的MP3数据(同步接口)，不写文件
+        
+        参数同 text_to_speech
+        
+        Returns:
+            bytes: MP3音频数据
+        """
+        return self.loop_thread.run(self.synthesize_speech_async(text, voice, rate, volume, tenant, parallel),
+                                    cancel_token=cancel_token)
+    
+    async def text_to_speech_async(self,
+                                   text: str,
+                                   filename: Optional[str] = None,
+                                   voice: Optional[str] = None,
+                                   rate: Optional[str] = None,
+                                   volume: Optional[str] = None,
+                                   tenant: str = "default",
+                                   parallel: Optional[bool] = None) -> str:
+        """
+        异步将文本转换为语音文件，可在已运行的事件循环中直接 await，多个合成可并发执行
         
         Args:
             text: 要转换的文本内容
@@ -100,9 +509,11 @@ class EdgeTTS:
             voice: 临时使用的语音角色，不指定则使用默认
             rate: 临时语速调节，不指定则使用默认
             volume: 临时音量调节，不指定则使用默认
+            tenant: 租户标识(如设备ID)，用于并发调度的公平排队
+            parallel: 是否分句并行合成，None时文本长度达到 TTS_PARALLEL_MIN_CHARS 自动启用
             
         Returns:
-            生成的音频文件路径，失败时返回None
+            生成的音频文件路径
             
         Raises:
             Exception: 当语音生成失败时抛出异常
@@ -112,58 +523,80 @@ class EdgeTTS:
             if not text or not text.strip():
                 raise Exception("文本内容不能为空")
             
-            # 生成输出文件名
-            if filename is None:
-                timestamp = int(time.time())
-                filename = f"tts_output_{timestamp}.mp3"
-            
-            # 确保文件扩展名
-            if not filename.endswith(('.mp3', '.wav')):
-                filename += '.mp3'
+            output_path = self._resolve_output_path(filename)
+            audio = await self.synthesize_speech_async(text, voice, rate, volume, tenant, parallel)
+            output_path.write_bytes(audio)
             
-            # 完整的输出路径
-            # 如果filename包含路径分隔符，说明是完整路径
-            if '/' in filename or '\\' in filename:
-                output_path = Path(filename)
-                # 确保目录存在
-                output_path.parent.mkdir(parents=True, exist_ok=True)
-            else:
-                # 确保默认输出目录存在
-                self.output_dir.mkdir(parents=True, exist_ok=True)
-                output_path = self.output_dir / filename
-            
-            # 使用临时参数或默认参数
-            current_voice = voice if voice else self.voice
-            current_rate = rate if rate else self.rate
-            current_volume = volume if volume else self.volume
+            print(f"✅ 语音文件生成成功: {output_path}")
+            return str(output_path)
+                
+        except Exception as e:
+            raise Exception(f"EdgeTTS 语音生成失败: {str(e)}")
+    
+    def text_to_speech(self, 
+                      text: str, 
+                      filename: Optional[str] = None,
+                      voice: Optional[str] = None,
+                      rate: Optional[str] = None,
+                      volume: Optional[str] = None,
+                      tenant: str = "default",
+                      parallel: Optional[bool] = None,
+                      cancel_token: Optional[CancelToken] = None) -> Optional[str]:
+        """
+        将文本转换为语音文件(同步接口)
+        
+        在常驻事件循环线程上执行 text_to_speech_async，不再每次创建新的事件循环；
+        在事件循环中请直接 await text_to_speech_async
+        
+        Args:
+            text: 要转换的文本内容
+            filename: 输出文件名，不指定则自动生成
+            voice: 临时使用的语音角色，不指定则使用默认
+            rate: 临时语速调节，不指定则使用默认
+            volume: 临时音量调节，不指定则使用默认
+            tenant: 租户标识(如设备ID)，用于并发调度的公平排队
+            parallel: 是否分句并行合成，None时按文本长度自动决定
+            cancel_token: CancelToken，被取消时(如用户打断)立即中止合成，连接与调度名额随之释放
             
-            # 临时修改实例参数
-            original_voice = self.voice
-            original_rate = self.rate
-            original_volume = self.volume
+        Returns:
+            生成的音频文件路径，失败时返回None
             
-            self.voice = current_voice
-            self.rate = current_rate
-            self.volume = current_volume
+        Raises:
+            Exception: 当语音生成失败时抛出异常
+            TurnCancelled: 已被 cancel_token 取消
+        """
+        return self.loop_thread.run(self.text_to_speech_async(text, filename, voice, rate, volume, tenant, parallel),
+                                    cancel_token=cancel_token)
+    
+    @staticmethod
+    def estimate_duration(mp3_size: int) -> float:
+        """
+        根据MP3字节数估算音频时长(edge-tts输出为固定码率)
+        
+        Args:
+            mp3_size: MP3数据字节数
             
+        Returns:
+            音频时长(秒)
+        """
+        return mp3_size * 8 / EDGE_MP3_BITRATE
+    
+    def add_synthesis_listener(self, callback: Callable[[str, float], None]):
+        """
+        注册合成完成回调，每次合成成功后以(文本, 音频时长秒)调用
+        
+        Args:
+            callback: 回调函数，如 chatglm.speech_rate.observe
+        """
+        self._synthesis_listeners.append(callback)
+    
+    def _notify_synthesis(self, text: str, seconds: float):
+        """通知合成完成，回调异常不影响合成结果"""
+        for callback in self._synthesis_listeners:
             try:
-                # 运行异步方法
-                success = asyncio.run(self._generate_speech_async(text, str(output_path)))
-                
-                if success and output_path.exists():
-                    print(f"✅ 语音文件生成成功: {output_path}")
-                    return str(output_path)
-                else:
-                    raise Exception("语音文件生成失败")
-                    
-            finally:
-                # 恢复原始参数
-                self.voice = original_voice
-                self.rate = original_rate
-                self.volume = original_volume
-                
-        except Exception as e:
-            raise Exception(f"EdgeTTS 语音生成失败: {str(e)}")
+                callback(text, seconds)
+            except Exception as e:
+                print(f"合成回调执行失败: {str(e)}")
     
     def set_voice(self, voice: str):
         """设置默认语音角色"""
@@ -189,6 +622,8 @@ class EdgeTTS:
     
     async def get_all_voices(self) -> List[Dict]:
         """异步获取所有可用语音（包括其他语言）"""
+        import edge_tts
+        
         try:
             voices = await edge_tts.list_voices()
             return voices
@@ -199,9 +634,13 @@ class EdgeTTS:
     def get_tts_info(self) -> Dict:
         """获取当前TTS配置信息"""
         return {
+            "backend": self.name,
             "voice": self.voice,
             "rate": self.rate,
             "volume": self.volume,
             "output_dir": str(self.output_dir),
-            "available_chinese_voices": len(self.chinese_voices)
+            "available_chinese_voices": len(self.chinese_voices),
+            "scheduler": self.scheduler.get_stats(),
+            "phrase_cache": self.phrase_cache.get_stats() if self.phrase_cache else None,
+            "connections": self.connections.get_stats() if self.connections else None
         }
@@ -0,0 +1,241 @@
+"""本地离线 TTS - 确定性音调合成，无需网络，用于离线测试、压测与低延迟短提示"""
+
+import os
+import sys
+import math
+import struct
+import asyncio
+import hashlib
+from array import array
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from .base import TTSBackend
+
+# 停顿时长(秒)：句末标点与句内标点
+_SENTENCE_PAUSE = 0.35
+_CLAUSE_PAUSE = 0.18
+_SENTENCE_MARKS = set("。！？；….!?;")
+_CLAUSE_MARKS = set("，、：,:")
+
+# 每个音调首尾的淡入淡出时长(秒)，避免爆音
+_FADE_SECONDS = 0.005
+
+
+def _parse_percent(value: Optional[str]) -> float:
+    """解析 "+20%" / "-10%" 形式的调节参数为比例"""
+    if not value:
+        return 0.0
+    try:
+        return float(value.strip().rstrip('%')) / 100.0
+    except ValueError:
+        return 0.0
+
+
+def _is_cjk(ch: str) -> bool:
+    code = ord(ch)
+    return 0x4E00 <= code <= 0x9FFF or 0x3400 <= code <= 0x4DBF or 0x3040 <= code <= 0x30FF or 0xAC00 <= code <= 0xD7AF
+
+
+class LocalTTS(TTSBackend):
+    """
+    本地确定性音调合成引擎
+
+    每个字符映射为一个固定音高的短音，标点映射为停顿，输出16bit单声道WAV。
+    相同的文本与参数总是得到完全相同的音频，时长与真实语音接近(中文约每秒4.5字)，
+    可在无网络环境下跑通流水线、做可复现的压测，或为极短提示提供毫秒级响应
+    """
+
+    name = "local"
+    audio_format = "wav"
+
+    # 类变量用于单例模式
+    _instance = None
+
+    def __init__(self,
+                 voice: str = "local-tone",
+                 rate: str = "+0%",
+                 volume: str = "+0%",
+                 sample_rate: Optional[int] = None,
+                 cjk_char_seconds: float = 0.22,
+                 other_char_seconds: float = 0.07):
+        """
+        初始化本地TTS
+
+        Args:
+            voice: 音色名称，决定基础音高
+            rate: 语速调节，如 "+20%"
+            volume: 音量调节，如 "-10%"
+            sample_rate: 采样率，默认读取 TTS_LOCAL_SAMPLE_RATE (16000)
+            cjk_char_seconds: 每个中日韩字符的时长(秒)
+            other_char_seconds: 其他字符的时长(秒)
+        """
+        self.voice = voice
+        self.rate = rate
+        self.volume = volume
+        self.sample_rate = sample_rate or int(os.getenv('TTS_LOCAL_SAMPLE_RATE', '16000'))
+        self.cjk_char_seconds = cjk_char_seconds
+        self.other_char_seconds = other_char_seconds
+
+    @classmethod
+    def get_instance(cls) -> 'LocalTTS':
+        """获取LocalTTS单例实例"""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def _base_frequency(self, voice: str) -> float:
+        # 按音色名称确定性地取 160-260Hz 的基础音高
+        digest = hashlib.md5(voice.encode("utf-8")).digest()
+        return 160.0 + digest[0] / 255.0 * 100.0
+
+    def _plan(self, text: str, voice: str, rate: str) -> List[Tuple[str, float, float]]:
+        """
+        生成合成计划
+
+        Returns:
+            List[Tuple[str, float, float]]: [(字符, 频率Hz(0表示静音), 时长秒)]
+        """
+        speed = max(0.1, 1.0 + _parse_percent(rate))
+        base = self._base_frequency(voice)
+        plan = []
+        for ch in text:
+            if ch in _SENTENCE_MARKS:
+                plan.append((ch, 0.0, _SENTENCE_PAUSE / speed))
+            elif ch in _CLAUSE_MARKS:
+                plan.append((ch, 0.0, _CLAUSE_PAUSE / speed))
+            elif ch.isspace():
+                plan.append((ch, 0.0, self.other_char_seconds / speed))
+            elif _is_cjk(ch):
+                plan.append((ch, base * 2 ** ((ord(ch) % 12) / 12.0), self.cjk_char_seconds / speed))
+            elif ch.isalnum():
+                plan.append((ch, base * 2 ** ((ord(ch) % 7) / 12.0), self.other_char_seconds / speed))
+            # 其他符号不发音
+        return plan
+
+    def _render(self, frequency: float, samples: int, amplitude: float) -> bytes:
+        """生成一个音调(或静音)的PCM数据"""
+        if frequency <= 0 or samples <= 0:
+            return bytes(samples * 2)
+        fade = min(int(self.sample_rate * _FADE_SECONDS), samples // 2)
+        step = 2 * math.pi * frequency / self.sample_rate
+        peak = 32767 * amplitude
+        pcm = array('h', (int(peak * math.sin(step * i)) for i in range(samples)))
+        for i in range(fade):
+            scale = i / fade
+            pcm[i] = int(pcm[i] * scale)
+            pcm[samples - 1 - i] = int(pcm[samples - 1 - i] * scale)
+        if sys.byteorder == 'big':
+            pcm.byteswap()
+        return pcm.tobytes()
+
+    def _wav_header(self, data_size: int) -> bytes:
+        """16bit单声道WAV文件头"""
+        byte_rate = self.sample_rate * 2
+        return struct.pack('<4sI4s4sIHHIIHH4sI',
+                           b'RIFF', 36 + data_size, b'WAVE',
+                           b'fmt ', 16, 1, 1, self.sample_rate, byte_rate, 2, 16,
+                           b'data', data_size)
+
+    async def stream_speech(self,
+                            text: str,
+                            voice: Optional[str] = None,
+                            rate: Optional[str] = None,
+                            volume: Optional[str] = None,
+                            word_boundaries: bool = True,
+                            tenant: str = "default") -> AsyncIterator[Dict]:
+        """
+        流式合成：先产出WAV头，再按字符产出PCM块
+
+        Args:
+            text: 要转换的文本内容
+            voice: 音色名称，不指定则使用默认
+            rate: 语速调节，不指定则使用默认
+            volume: 音量调节，不指定则使用默认
+            word_boundaries: 是否产出词边界事件
+            tenant: 租户标识(本地引擎不排队，仅为接口一致)
+
+        Yields:
+            Dict: 音频块 {"type": "audio", "data": bytes} 或词边界事件
+        """
+        # 逐块在线程池中生成，长文本合成期间不独占事件循环
+        loop = asyncio.get_running_loop()
+        events = self._iter_events(text, voice, rate, volume, word_boundaries)
+        while True:
+            event = await loop.run_in_executor(None, next, events, None)
+            if event is None:
+                break
+            yield event
+
+    def _iter_events(self, text: str, voice: Optional[str], rate: Optional[str],
+                     volume: Optional[str], word_boundaries: bool):
+        if not text or not text.strip():
+            raise Exception("文本内容不能为空")
+
+        plan = self._plan(text, voice or self.voice, rate or self.rate)
+        amplitude = min(1.0, max(0.0, 0.3 * (1.0 + _parse_percent(volume or self.volume))))
+        sample_counts = [int(round(seconds * self.sample_rate)) for _, _, seconds in plan]
+        yield {"type": "audio", "data": self._wav_header(sum(sample_counts) * 2)}
+
+        offset = 0
+        for (ch, frequency, _), samples in zip(plan, sample_counts):
+            if word_boundaries and frequency > 0:
+                yield {
+                    "type": "WordBoundary",
+                    "offset": offset / self.sample_rate,
+                    "duration": samples / self.sample_rate,
+                    "text": ch,
+                }
+            yield {"type": "audio", "data": self._render(frequency, samples, amplitude)}
+            offset += samples
+
+    def synthesize(self,
+                   text: str,
+                   voice: Optional[str] = None,
+                   rate: Optional[str] = None,
+                   volume: Optional[str] = None) -> bytes:
+        """
+        同步合成完整WAV数据(纯CPU计算，无需事件循环)
+
+        Args:
+            text: 要转换的文本内容
+            voice: 音色名称，不指定则使用默认
+            rate: 语速调节，不指定则使用默认
+            volume: 音量调节，不指定则使用默认
+
+        Returns:
+            bytes: WAV音频数据
+        """
+        return b"".join(event["data"] for event in self._iter_events(text, voice, rate, volume, False))
+
+    def text_to_speech(self, text: str, filename: str, **kwargs) -> str:
+        """
+        合成并保存为WAV文件
+
+        Args:
+            text: 要转换的文本内容
+            filename: 输出文件路径
+            **kwargs: 传给 synthesize 的 voice/rate/volume
+
+        Returns:
+            str: 输出文件路径
+        """
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(filename, "wb") as f:
+            f.write(self.synthesize(text, **kwargs))
+        return filename
+
+    def estimate_duration(self, wav_size: int) -> float:
+        """根据WAV字节数计算音频时长(秒)"""
+        return max(0, wav_size - 44) / (self.sample_rate * 2)
+
+    def get_tts_info(self) -> Dict:
+        """获取当前TTS配置信息"""
+        return {
+            "backend": self.name,
+            "voice": self.voice,
+            "rate": self.rate,
+            "volume": self.volume,
+            "sample_rate": self.sample_rate,
+        }
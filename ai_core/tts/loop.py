@@ -0,0 +1,132 @@
+"""常驻事件循环线程 - 供同步接口复用同一个事件循环"""
+
+import asyncio
+import threading
+import concurrent.futures
+from typing import Any, Awaitable, Optional
+
+from ..cancel import CancelToken, TurnCancelled
+
+
+class EventLoopThread:
+    """
+    在后台守护线程中运行的常驻事件循环
+
+    同步代码通过 run() 把协程提交到这个循环并等待结果，
+    避免每次调用 asyncio.run() 重复创建/销毁事件循环，
+    多个线程同时提交的协程在同一个循环上并发执行
+    """
+
+    _default: Optional['EventLoopThread'] = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, name: str = "ai-core-loop"):
+        """
+        初始化事件循环线程(首次使用时才启动)
+
+        Args:
+            name: 线程名称
+        """
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get_default(cls) -> 'EventLoopThread':
+        """获取进程内共享的事件循环线程"""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """获取事件循环，未启动时自动启动"""
+        with self._lock:
+            if self._loop is None or self._loop.is_closed() or not self._thread.is_alive():
+                self._start()
+            return self._loop
+
+    def _start(self):
+        ready = threading.Event()
+        loop = asyncio.new_event_loop()
+
+        def run():
+            asyncio.set_event_loop(loop)
+            loop.call_soon(ready.set)
+            loop.run_forever()
+            # 循环停止后清理未完成的任务
+            pending = asyncio.all_tasks(loop)
+            for task in pending:
+                task.cancel()
+            if pending:
+                loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+
+        self._loop = loop
+        self._thread = threading.Thread(target=run, name=self.name, daemon=True)
+        self._thread.start()
+        ready.wait()
+
+    def in_loop_thread(self) -> bool:
+        """当前线程是否为事件循环线程"""
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def submit(self, coro: Awaitable) -> "asyncio.Future":
+        """
+        提交协程，立即返回 concurrent.futures.Future
+
+        Args:
+            coro: 协程对象
+
+        Returns:
+            concurrent.futures.Future: 可在任意线程等待的结果
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Awaitable, timeout: Optional[float] = None,
+            cancel_token: Optional[CancelToken] = None) -> Any:
+        """
+        在常驻循环上执行协程并阻塞等待结果
+
+        Args:
+            coro: 协程对象
+            timeout: 等待超时(秒)，超时后取消协程
+            cancel_token: CancelToken，被取消时(可在其他线程)立即取消协程
+
+        Returns:
+            协程的返回值
+
+        Raises:
+            RuntimeError: 在事件循环线程内调用(会造成死锁)
+            TurnCancelled: 已被 cancel_token 取消
+        """
+        if self.in_loop_thread():
+            coro.close()
+            raise RuntimeError("不能在事件循环线程内调用同步接口，请直接 await 异步接口")
+        future = self.submit(coro)
+        remove = cancel_token.add_callback(future.cancel) if cancel_token is not None else None
+        try:
+            return future.result(timeout)
+        except concurrent.futures.CancelledError:
+            if cancel_token is not None and cancel_token.cancelled:
+                raise TurnCancelled(cancel_token.reason)
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            if remove is not None:
+                remove()
+
+    def stop(self):
+        """停止事件循环并等待线程退出"""
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                return
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+            self._loop = None
+            self._thread = None
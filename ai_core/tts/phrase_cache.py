@@ -0,0 +1,418 @@
+"""TTS 短语缓存 - 内存LRU + 磁盘持久化，缓存合成音频及各下行预设的Opus编码结果"""
+
+import os
+import json
+import queue
+import struct
+import asyncio
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+def normalize_text(text: str) -> str:
+    """
+    归一化待合成文本
+
+    只做全角转半角(NFKC)和空白合并，保留标点：标点会影响语气和停顿，
+    "好的。" 与 "好的？" 的合成结果不同
+
+    Args:
+        text: 原始文本
+
+    Returns:
+        str: 归一化后的文本
+    """
+    text = unicodedata.normalize("NFKC", text or "")
+    return " ".join(text.split())
+
+
+class _Entry:
+    """缓存项：音频 + 词边界 + 各预设的Opus"""
+
+    __slots__ = ("audio", "boundaries", "opus")
+
+    def __init__(self, audio: bytes, boundaries: Optional[List[Dict]] = None):
+        self.audio = audio
+        self.boundaries = boundaries or []
+        self.opus: Dict[str, bytes] = {}
+
+    @property
+    def size(self) -> int:
+        return len(self.audio) + sum(len(data) for data in self.opus.values())
+
+
+class PhraseCache:
+    """
+    常用短语的合成结果缓存
+
+    键为 (归一化文本, 语音, 语速, 音量)，值为合成的MP3音频，并可附带各下行预设预先编码的Opus。
+    内存部分按总字节数和条目数做LRU淘汰；配置了缓存目录时同时写入磁盘(总大小按LRU限制)，
+    重启后首次访问从磁盘加载，常用短语无需再次联网合成。
+    磁盘写入由后台线程完成；异步调用方使用 aget / aget_opus，磁盘读取在线程池中执行
+    """
+
+    def __init__(self,
+                 max_bytes: int = 64 * 1024 * 1024,
+                 max_entries: int = 2048,
+                 cache_dir: Optional[str] = None,
+                 max_text_length: int = 200,
+                 max_disk_bytes: int = 256 * 1024 * 1024):
+        """
+        初始化短语缓存
+
+        Args:
+            max_bytes: 内存中缓存的最大总字节数
+            max_entries: 内存中最大条目数
+            cache_dir: 磁盘缓存目录，None表示只缓存在内存中
+            max_text_length: 可缓存文本的最大长度，长回复通常不会重复出现
+            max_disk_bytes: 磁盘缓存的最大总字节数，超出时删除最久未使用的文件
+        """
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_text_length = max_text_length
+        self.max_disk_bytes = max_disk_bytes
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "opus_hits": 0,
+                       "opus_misses": 0, "evictions": 0, "bypassed": 0,
+                       "disk_evictions": 0, "disk_dropped": 0}
+
+        # 磁盘文件索引(路径 -> 字节数，按最近使用排序)，由写入线程启动时扫描建立
+        self._disk_files: "OrderedDict[Path, int]" = OrderedDict()
+        self._disk_bytes = 0
+        self._disk_queue: queue.Queue = queue.Queue(maxsize=256)
+        if self.cache_dir is not None:
+            threading.Thread(target=self._disk_writer, name="PhraseCacheWriter", daemon=True).start()
+
+    @classmethod
+    def from_env(cls) -> Optional['PhraseCache']:
+        """
+        根据环境变量创建缓存，TTS_CACHE_ENABLED 关闭时返回None
+
+        磁盘缓存默认关闭(TTS_CACHE_DIR 为空)：缓存的是回复文本的合成结果，需显式配置目录才会落盘
+
+        Returns:
+            Optional[PhraseCache]: 缓存实例
+        """
+        if os.getenv('TTS_CACHE_ENABLED', 'true').lower() not in ('1', 'true', 'yes'):
+            return None
+        return cls(
+            max_bytes=int(os.getenv('TTS_CACHE_MAX_MB', '64')) * 1024 * 1024,
+            max_entries=int(os.getenv('TTS_CACHE_MAX_ENTRIES', '2048')),
+            cache_dir=os.getenv('TTS_CACHE_DIR', '') or None,
+            max_text_length=int(os.getenv('TTS_CACHE_MAX_TEXT_LENGTH', '200')),
+            max_disk_bytes=int(os.getenv('TTS_CACHE_DISK_MAX_MB', '256')) * 1024 * 1024,
+        )
+
+    def make_key(self, text: str, voice: str, rate: str, volume: str) -> Optional[str]:
+        """
+        计算缓存键
+
+        Args:
+            text: 待合成文本
+            voice: 语音角色
+            rate: 语速调节
+            volume: 音量调节
+
+        Returns:
+            Optional[str]: 缓存键，文本过长不缓存时返回None
+        """
+        normalized = normalize_text(text)
+        if not normalized or len(normalized) > self.max_text_length:
+            with self._lock:
+                self._stats["bypassed"] += 1
+            return None
+        raw = "\x1f".join((normalized, voice, rate, volume))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    # ------------------------------------------------------------------
+    # 内存LRU
+    # ------------------------------------------------------------------
+
+    def _touch(self, key: str) -> Optional[_Entry]:
+        """在持有锁时查找并标记为最近使用"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key: str, entry: _Entry):
+        """在持有锁时写入条目并按限制淘汰"""
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old.size
+        self._entries[key] = entry
+        self._bytes += entry.size
+        self._evict()
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+            self._stats["evictions"] += 1
+
+    # ------------------------------------------------------------------
+    # 磁盘持久化
+    # ------------------------------------------------------------------
+
+    def _disk_path(self, key: str, suffix: str) -> Path:
+        # 按键前两位分目录，避免单目录文件过多
+        return self.cache_dir / key[:2] / f"{key}{suffix}"
+
+    @staticmethod
+    def _pack_audio(audio: bytes, boundaries: List[Dict]) -> bytes:
+        """音频文件格式: 4字节小端词边界JSON长度 + 词边界JSON + MP3音频"""
+        meta = json.dumps(boundaries, ensure_ascii=False).encode("utf-8")
+        return struct.pack('<I', len(meta)) + meta + audio
+
+    @staticmethod
+    def _unpack_audio(data: bytes) -> Optional[Tuple[bytes, List[Dict]]]:
+        try:
+            (length,) = struct.unpack_from('<I', data)
+            boundaries = json.loads(data[4:4 + length].decode("utf-8"))
+            return data[4 + length:], boundaries
+        except (struct.error, ValueError):
+            return None
+
+    def _schedule_write(self, key: str, suffix: str, data: bytes):
+        """投递磁盘写入，立即返回；队列满时放弃写入"""
+        if self.cache_dir is None:
+            return
+        try:
+            self._disk_queue.put_nowait((self._disk_path(key, suffix), data))
+        except queue.Full:
+            with self._lock:
+                self._stats["disk_dropped"] += 1
+
+    def _scan_disk(self):
+        """启动时按修改时间建立已有文件的索引"""
+        files = []
+        for path in self.cache_dir.glob("*/*"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if path.suffix == ".tmp":
+                # 上次退出时未写完的临时文件
+                path.unlink(missing_ok=True)
+                continue
+            files.append((stat.st_mtime, path, stat.st_size))
+        files.sort()
+        with self._lock:
+            for _, path, size in files:
+                self._disk_files[path] = size
+                self._disk_bytes += size
+
+    def _disk_writer(self):
+        try:
+            self._scan_disk()
+        except OSError as e:
+            print(f"⚠️ TTS缓存目录扫描失败: {str(e)}")
+        self._evict_disk()
+        while True:
+            path, data = self._disk_queue.get()
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                # 先写临时文件再改名，避免并发读到写了一半的文件
+                tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+                tmp_path.write_bytes(data)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"⚠️ TTS缓存写入磁盘失败: {str(e)}")
+                continue
+            with self._lock:
+                self._disk_bytes += len(data) - self._disk_files.pop(path, 0)
+                self._disk_files[path] = len(data)
+            self._evict_disk()
+
+    def _evict_disk(self):
+        """删除最久未使用的文件，直到磁盘占用回到上限以内"""
+        while True:
+            with self._lock:
+                if not self._disk_files or self._disk_bytes <= self.max_disk_bytes:
+                    return
+                path, size = self._disk_files.popitem(last=False)
+                self._disk_bytes -= size
+                self._stats["disk_evictions"] += 1
+            try:
+                path.unlink(missing_ok=True)
+            except OSError:
+                pass
+
+    def _read_disk(self, key: str, suffix: str) -> Optional[bytes]:
+        if self.cache_dir is None:
+            return None
+        path = self._disk_path(key, suffix)
+        with self._lock:
+            if path not in self._disk_files:
+                return None
+            self._disk_files.move_to_end(path)
+        try:
+            return path.read_bytes()
+        except OSError:
+            return None
+
+    async def _read_disk_async(self, key: str, suffix: str) -> Optional[bytes]:
+        if self.cache_dir is None:
+            return None
+        return await asyncio.get_running_loop().run_in_executor(None, self._read_disk, key, suffix)
+
+    # ------------------------------------------------------------------
+    # 读写接口
+    # ------------------------------------------------------------------
+
+    def _get_memory(self, key: str) -> Optional[Tuple[bytes, List[Dict]]]:
+        with self._lock:
+            entry = self._touch(key)
+            if entry is not None:
+                self._stats["hits"] += 1
+                return entry.audio, entry.boundaries
+        return None
+
+    def _load_disk(self, key: str, data: Optional[bytes]) -> Optional[Tuple[bytes, List[Dict]]]:
+        unpacked = self._unpack_audio(data) if data is not None else None
+        with self._lock:
+            if unpacked is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["disk_hits"] += 1
+            entry = self._touch(key)
+            if entry is None:
+                entry = _Entry(*unpacked)
+                self._store(key, entry)
+            return entry.audio, entry.boundaries
+
+    def get(self, key: Optional[str]) -> Optional[Tuple[bytes, List[Dict]]]:
+        """
+        查找合成音频(同步读取磁盘，异步代码中使用 aget)
+
+        Args:
+            key: make_key 返回的缓存键
+
+        Returns:
+            Optional[Tuple[bytes, List[Dict]]]: (MP3音频, 词边界)，未命中时返回None
+        """
+        if key is None:
+            return None
+        cached = self._get_memory(key)
+        if cached is not None:
+            return cached
+        return self._load_disk(key, self._read_disk(key, ".tts"))
+
+    async def aget(self, key: Optional[str]) -> Optional[Tuple[bytes, List[Dict]]]:
+        """查找合成音频，内存未命中时在线程池中读取磁盘"""
+        if key is None:
+            return None
+        cached = self._get_memory(key)
+        if cached is not None:
+            return cached
+        return self._load_disk(key, await self._read_disk_async(key, ".tts"))
+
+    def put(self, key: Optional[str], audio: bytes, boundaries: Optional[List[Dict]] = None):
+        """
+        写入合成音频(磁盘写入在后台完成)
+
+        Args:
+            key: 缓存键
+            audio: MP3音频
+            boundaries: 词边界事件
+        """
+        if key is None or not audio:
+            return
+        with self._lock:
+            self._store(key, _Entry(audio, boundaries))
+        self._schedule_write(key, ".tts", self._pack_audio(audio, boundaries or []))
+
+    def _get_opus_memory(self, key: str, preset: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._touch(key)
+            if entry is not None and preset in entry.opus:
+                self._stats["opus_hits"] += 1
+                return entry.opus[preset]
+        return None
+
+    def _load_opus_disk(self, key: str, preset: str, opus: Optional[bytes]) -> Optional[bytes]:
+        with self._lock:
+            if opus is None:
+                self._stats["opus_misses"] += 1
+                return None
+            self._stats["opus_hits"] += 1
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._bytes += len(opus) - len(entry.opus.get(preset, b""))
+                entry.opus[preset] = opus
+                self._evict()
+            return opus
+
+    def get_opus(self, key: Optional[str], preset: str) -> Optional[bytes]:
+        """
+        查找指定下行预设的Opus编码结果(同步读取磁盘，异步代码中使用 aget_opus)
+
+        Args:
+            key: 缓存键
+            preset: 下行预设名称
+
+        Returns:
+            Optional[bytes]: Opus数据，未命中时返回None
+        """
+        if key is None:
+            return None
+        opus = self._get_opus_memory(key, preset)
+        if opus is not None:
+            return opus
+        return self._load_opus_disk(key, preset, self._read_disk(key, f".{preset}.opus"))
+
+    async def aget_opus(self, key: Optional[str], preset: str) -> Optional[bytes]:
+        """查找指定下行预设的Opus编码结果，内存未命中时在线程池中读取磁盘"""
+        if key is None:
+            return None
+        opus = self._get_opus_memory(key, preset)
+        if opus is not None:
+            return opus
+        return self._load_opus_disk(key, preset, await self._read_disk_async(key, f".{preset}.opus"))
+
+    def put_opus(self, key: Optional[str], preset: str, opus: bytes):
+        """
+        写入指定下行预设的Opus编码结果(需先缓存对应音频，磁盘写入在后台完成)
+
+        Args:
+            key: 缓存键
+            preset: 下行预设名称
+            opus: Opus数据
+        """
+        if key is None or not opus:
+            return
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            self._bytes += len(opus) - len(entry.opus.get(preset, b""))
+            entry.opus[preset] = opus
+            self._evict()
+        self._schedule_write(key, f".{preset}.opus", opus)
+
+    def clear(self):
+        """清空内存缓存(磁盘文件保留)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> Dict:
+        """获取缓存统计"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+            lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+            stats["hit_rate"] = (stats["hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+            stats["disk_files"] = len(self._disk_files)
+            stats["disk_bytes"] = self._disk_bytes
+        stats["cache_dir"] = str(self.cache_dir) if self.cache_dir else None
+        return stats
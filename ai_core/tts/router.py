@@ -0,0 +1,140 @@
+"""TTS 路由 - 按文本长度在网络引擎与本地引擎之间选择，可在网络故障时降级"""
+
+import os
+import threading
+from typing import AsyncIterator, Dict, Optional
+
+from .base import TTSBackend
+
+
+class TTSRouter(TTSBackend):
+    """
+    TTS 后端路由
+
+    不超过 local_max_chars 的短提示(如"好的"、"请稍等")交给本地引擎，省去网络往返；
+    其余文本交给主引擎。开启 fallback 时，主引擎在产出任何音频前失败会改用本地引擎。
+    不同后端的音频格式不同，stream_speech 会先产出 {"type": "backend", "name", "format"} 事件
+    """
+
+    name = "router"
+
+    def __init__(self,
+                 primary: Optional[TTSBackend] = None,
+                 local: Optional[TTSBackend] = None,
+                 local_max_chars: Optional[int] = None,
+                 fallback: Optional[bool] = None):
+        """
+        初始化路由，未指定的参数读取环境变量
+
+        Args:
+            primary: 主引擎，默认 EdgeTTS 单例
+            local: 本地引擎，默认 LocalTTS 单例
+            local_max_chars: 交给本地引擎的最大文本长度 (TTS_LOCAL_MAX_CHARS，默认0表示不路由)
+            fallback: 主引擎失败时是否降级到本地引擎 (TTS_LOCAL_FALLBACK，默认关闭)
+        """
+        if primary is None:
+            from .edge import EdgeTTS
+            primary = EdgeTTS.get_instance()
+        if local is None:
+            from .local import LocalTTS
+            local = LocalTTS.get_instance()
+        self.primary = primary
+        self.local = local
+        self.local_max_chars = (local_max_chars if local_max_chars is not None
+                                else int(os.getenv('TTS_LOCAL_MAX_CHARS', '0')))
+        if fallback is None:
+            fallback = os.getenv('TTS_LOCAL_FALLBACK', 'false').lower() in ('1', 'true', 'yes')
+        self.fallback = fallback
+
+        self._lock = threading.Lock()
+        self._stats = {"primary": 0, "local": 0, "fallbacks": 0}
+
+    @property
+    def audio_format(self) -> str:
+        """主引擎的音频格式(短提示路由到本地引擎时以 backend 事件为准)"""
+        return self.primary.audio_format
+
+    def select(self, text: str) -> TTSBackend:
+        """
+        选择合成后端
+
+        Args:
+            text: 要转换的文本内容
+
+        Returns:
+            TTSBackend: 选中的后端
+        """
+        if self.local_max_chars > 0 and len((text or "").strip()) <= self.local_max_chars:
+            return self.local
+        return self.primary
+
+    def _bump(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    async def stream_speech(self,
+                            text: str,
+                            voice: Optional[str] = None,
+                            rate: Optional[str] = None,
+                            volume: Optional[str] = None,
+                            word_boundaries: bool = True,
+                            tenant: str = "default") -> AsyncIterator[Dict]:
+        """
+        路由后流式合成，参数同 TTSBackend.stream_speech
+
+        本地引擎使用自己的音色，voice 参数只传给主引擎
+        """
+        backend = self.select(text)
+        if backend is self.local:
+            self._bump("local")
+            yield {"type": "backend", "name": self.local.name, "format": self.local.audio_format}
+            async for event in self.local.stream_speech(text, None, rate, volume, word_boundaries, tenant):
+                yield event
+            return
+
+        self._bump("primary")
+        yield {"type": "backend", "name": self.primary.name, "format": self.primary.audio_format}
+        started = False
+        try:
+            async for event in self.primary.stream_speech(text, voice, rate, volume, word_boundaries, tenant):
+                started = True
+                yield event
+        except Exception as e:
+            if not self.fallback or started:
+                raise
+            print(f"⚠️ 主TTS引擎失败，降级到本地引擎: {str(e)}")
+            self._bump("fallbacks")
+            yield {"type": "backend", "name": self.local.name, "format": self.local.audio_format}
+            async for event in self.local.stream_speech(text, None, rate, volume, word_boundaries, tenant):
+                yield event
+
+    async def synthesize_async(self,
+                               text: str,
+                               voice: Optional[str] = None,
+                               rate: Optional[str] = None,
+                               volume: Optional[str] = None,
+                               tenant: str = "default") -> bytes:
+        """合成完整音频，格式由选中的后端决定(可用 select 查询)"""
+        chunks = []
+        async for event in self.stream_speech(text, voice, rate, volume, word_boundaries=False, tenant=tenant):
+            if event["type"] == "backend":
+                # 降级时丢弃主引擎已产出的部分
+                chunks = []
+            elif event["type"] == "audio":
+                chunks.append(event["data"])
+        if not chunks:
+            raise Exception("未收到音频数据")
+        return b"".join(chunks)
+
+    def get_tts_info(self) -> Dict:
+        """获取路由配置与统计"""
+        with self._lock:
+            stats = dict(self._stats)
+        return {
+            "backend": self.name,
+            "primary": self.primary.get_tts_info(),
+            "local": self.local.get_tts_info(),
+            "local_max_chars": self.local_max_chars,
+            "fallback": self.fallback,
+            "stats": stats,
+        }
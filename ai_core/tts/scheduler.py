@@ -0,0 +1,151 @@
+"""TTS 合成调度 - 全局并发上限 + 按租户轮转的公平排队"""
+
+import os
+import asyncio
+import threading
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional
+
+
+class _Waiter:
+    """排队中的请求"""
+
+    __slots__ = ("tenant", "loop", "future", "granted")
+
+    def __init__(self, tenant: str, loop: asyncio.AbstractEventLoop):
+        self.tenant = tenant
+        self.loop = loop
+        self.future = loop.create_future()
+        self.granted = False
+
+
+class FairScheduler:
+    """
+    有界并发的公平调度器
+
+    同时进行的合成数不超过 max_concurrency；名额不足时按租户(如设备ID)分别排队，
+    释放名额时在有排队的租户之间轮转分配，单个租户的大量请求不会饿死其他租户。
+    内部状态由线程锁保护，可同时服务多个事件循环(如常驻循环线程与调用方自己的循环)
+    """
+
+    def __init__(self, max_concurrency: Optional[int] = None, max_per_tenant: Optional[int] = None):
+        """
+        初始化调度器，未指定的参数读取环境变量
+
+        Args:
+            max_concurrency: 全局最大并发合成数 (TTS_MAX_CONCURRENCY，默认16)
+            max_per_tenant: 单个租户最大并发合成数 (TTS_MAX_PER_TENANT，默认0表示不限)
+        """
+        self.max_concurrency = max_concurrency or int(os.getenv('TTS_MAX_CONCURRENCY', '16'))
+        if max_per_tenant is None:
+            max_per_tenant = int(os.getenv('TTS_MAX_PER_TENANT', '0'))
+        self.max_per_tenant = max_per_tenant
+
+        self._active = 0
+        self._tenant_active: Dict[str, int] = {}
+        # 租户 -> 排队请求；OrderedDict 的顺序即轮转顺序
+        self._queues: "OrderedDict[str, Deque[_Waiter]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"acquired": 0, "queued": 0, "cancelled": 0, "max_queue_depth": 0}
+
+    def _tenant_full(self, tenant: str) -> bool:
+        return self.max_per_tenant > 0 and self._tenant_active.get(tenant, 0) >= self.max_per_tenant
+
+    def _grant(self, tenant: str):
+        self._active += 1
+        self._tenant_active[tenant] = self._tenant_active.get(tenant, 0) + 1
+        self._stats["acquired"] += 1
+
+    def _queue_depth(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    @asynccontextmanager
+    async def slot(self, tenant: str = "default"):
+        """
+        获取一个合成名额，退出上下文时归还
+
+        Args:
+            tenant: 租户标识，同一租户的请求按先后顺序排队
+        """
+        await self.acquire(tenant)
+        try:
+            yield
+        finally:
+            self.release(tenant)
+
+    async def acquire(self, tenant: str = "default"):
+        """获取合成名额，名额不足时排队等待"""
+        with self._lock:
+            if (self._active < self.max_concurrency and not self._queues.get(tenant)
+                    and not self._tenant_full(tenant)):
+                self._grant(tenant)
+                return
+            waiter = _Waiter(tenant, asyncio.get_running_loop())
+            self._queues.setdefault(tenant, deque()).append(waiter)
+            self._stats["queued"] += 1
+            self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], self._queue_depth())
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                self._stats["cancelled"] += 1
+                if not waiter.granted:
+                    queue = self._queues.get(tenant)
+                    if queue is not None and waiter in queue:
+                        queue.remove(waiter)
+                        if not queue:
+                            del self._queues[tenant]
+                    raise
+            # 名额已分配但调用方被取消，转交给下一个请求
+            self.release(tenant)
+            raise
+
+    def release(self, tenant: str = "default"):
+        """归还合成名额，并按租户轮转唤醒下一个排队请求"""
+        with self._lock:
+            self._active -= 1
+            remaining = self._tenant_active.get(tenant, 1) - 1
+            if remaining > 0:
+                self._tenant_active[tenant] = remaining
+            else:
+                self._tenant_active.pop(tenant, None)
+            self._dispatch()
+
+    def _dispatch(self):
+        """在持有锁时把空闲名额分给排队的租户"""
+        while self._active < self.max_concurrency and self._queues:
+            chosen = None
+            for tenant in self._queues:
+                if not self._tenant_full(tenant):
+                    chosen = tenant
+                    break
+            if chosen is None:
+                return
+
+            queue = self._queues.pop(chosen)
+            waiter = queue.popleft()
+            if queue:
+                # 该租户还有请求，排到轮转队尾
+                self._queues[chosen] = queue
+
+            waiter.granted = True
+            self._grant(chosen)
+            waiter.loop.call_soon_threadsafe(self._wake, waiter)
+
+    @staticmethod
+    def _wake(waiter: _Waiter):
+        if not waiter.future.done():
+            waiter.future.set_result(None)
+
+    def get_stats(self) -> Dict:
+        """获取调度统计"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["active"] = self._active
+            stats["waiting"] = self._queue_depth()
+            stats["tenants_waiting"] = len(self._queues)
+            stats["max_concurrency"] = self.max_concurrency
+            stats["max_per_tenant"] = self.max_per_tenant
+        return stats
@@ -208,29 +208,31 @@ def test_edge_tts():
 def test_funasr():
     """FunASR测试"""
     import time
-    import torch
     
     try:
         print("🎤 FunASR 语音识别测试")
         print("=" * 40)
         
-        # 显示系统信息
-        print(f"🖥️  设备信息:")
-        print(f"   CUDA可用: {'✅' if torch.cuda.is_available() else '❌'}")
-        if torch.cuda.is_available():
-            print(f"   GPU设备: {torch.cuda.get_device_name()}")
-            print(f"   GPU内存: {torch.cuda.get_device_properties(0).total_memory / 1024**3:.1f} GB")
-        
         # 懒加载FunASR模块
         from ai_core.asr.funasr_wrapper import FunASR
         
-        # 初始化ASR（测量初始化时间）
+        # 初始化ASR（测量初始化时间，包含torch导入）
         print(f"\n⏱️  模型加载中...")
         start_time = time.time()
         asr = FunASR.get_instance()
         init_time = time.time() - start_time
         print(f"   初始化耗时: {init_time:.2f}秒")
         
+        # torch 已在设备检测时加载，此处导入无额外开销
+        import torch
+        
+        # 显示系统信息
+        print(f"🖥️  设备信息:")
+        print(f"   CUDA可用: {'✅' if torch.cuda.is_available() else '❌'}")
+        if torch.cuda.is_available():
+            print(f"   GPU设备: {torch.cuda.get_device_name()}")
+            print(f"   GPU内存: {torch.cuda.get_device_properties(0).total_memory / 1024**3:.1f} GB")
+        
         # 查找测试音频文件（优先从当前会话的EdgeTTS，然后是所有时间戳文件夹）
         session_audio_files = glob.glob(f"outputs/{test_session.timestamp}/EdgeTTS/*.mp3")
         general_audio_files = glob.glob("outputs/*/EdgeTTS/*.mp3")
@@ -444,38 +446,34 @@ def test_comprehensive_demo():
         
         print(f"\n🎯 用户问题: {user_text}")
         
+        # 阶段之间的数据全部在内存中传递，留档文件由后台线程异步写入
+        from ai_core.pipeline.artifacts import ArtifactWriter
+        comp_folder = test_session.get_case_path("Comprehensive")
+        artifacts = ArtifactWriter(comp_folder)
+        
         # 2. TTS - 将用户问题转为语音
         print("\n🎤 步骤1: 文字转语音 (TTS)")
         tts = EdgeTTS.get_instance()
-        # 获取综合演示的输出文件夹
-        comp_folder = test_session.get_case_path("Comprehensive")
-        user_audio_path = os.path.join(comp_folder, "user_question.mp3")
-        tts_result = tts.text_to_speech(user_text, user_audio_path)
-        if not tts_result:
-            print("❌ TTS失败")
-            return
-        audio_path = user_audio_path
-        print(f"   ✅ 生成语音: {audio_path}")
+        # 预热TTS服务连接与常用短语(配置了 TTS_WARMUP_FILE 时)
+        tts.prewarm()
+        tts.warmup()
+        user_audio = tts.synthesize(user_text)
+        artifacts.save("user_question.mp3", user_audio)
+        print(f"   ✅ 生成语音: {len(user_audio):,} bytes")
         
         # 3. Audio处理 - 模拟IoT设备传输
         print("\n📡 步骤2: 音频编码传输 (Audio Processing)")
         
         # 下行: 编码为Opus
         downlink = DownlinkProcessor(preset="low_latency")
-        opus_data = downlink.process_audio(audio_path, output_format="bytes")
+        opus_data = downlink.process_audio(user_audio, output_format="bytes")
+        artifacts.save("user_question.opus", opus_data)
         print(f"   📤 Opus编码: {len(opus_data):,} bytes")
         
-        # 上行: 解码为WAV供ASR使用
+        # 上行: 解码为ASR可直接使用的采样数组
         uplink = UplinkProcessor(preset="general")
-        # 保存到Comprehensive文件夹中
-        asr_audio_path = os.path.join(comp_folder, "for_asr.wav")
-        # 确保opus_data是bytes类型
-        if isinstance(opus_data, bytes):
-            uplink.decode_to_file(opus_data, asr_audio_path)
-        else:
-            print("❌ Opus数据类型错误")
-            return
-        print(f"   📥 解码音频: {asr_audio_path}")
+        asr_samples = uplink.decode_to_array(opus_data)
+        print(f"   📥 解码音频: {len(asr_samples) / uplink.sample_rate:.1f}秒")
         
         # 4. ASR - 语音识别
         print("\n🎤 步骤3: 语音识别 (ASR)")
@@ -484,7 +482,7 @@ def test_comprehensive_demo():
         
         print("   ⏱️ 开始识别...")
         start_time = time.time()
-        recognized_text = asr.transcribe_file(asr_audio_path)
+        recognized_text = asr.transcribe_audio_data(asr_samples, uplink.sample_rate)
         asr_time = time.time() - start_time
         
         if not recognized_text:
@@ -493,36 +491,41 @@ def test_comprehensive_demo():
         print(f"   🎯 识别结果: {recognized_text}")
         print(f"   ⚡ ASR耗时: {asr_time:.2f}秒")
         
-        # 5. LLM - 生成回答
+        # 5. LLM - 生成回答 (按目标播报时长控制回复长度，语速从TTS输出中学习)
         print("\n🤖 步骤4: AI生成回答 (LLM)")
         chatglm = ChatGLM.get_instance(api_key)
-        ai_response = chatglm.generate_response(recognized_text)
+        tts.add_synthesis_listener(chatglm.speech_rate.observe)
+        ai_response = chatglm.generate_voice_response(recognized_text)
         print(f"   💡 AI回答: {ai_response}")
         
         # 6. TTS - 将AI回答转为语音
         print("\n🔊 步骤5: 回答转语音 (TTS)")
-        ai_audio_path = os.path.join(comp_folder, "ai_response.mp3") 
-        tts_result = tts.text_to_speech(ai_response, ai_audio_path)
-        if tts_result:
-            print(f"   ✅ 回答语音: {tts_result}")
+        ai_audio = tts.synthesize(ai_response)
+        artifacts.save("ai_response.mp3", ai_audio)
+        print(f"   ✅ 回答语音: {len(ai_audio):,} bytes")
         
         # 保存综合报告
-        demo_report_file = os.path.join(comp_folder, "demo_report.txt")
-        with open(demo_report_file, "w", encoding="utf-8") as f:
-            f.write(f"AI Server 综合演示报告\n")
-            f.write(f"=" * 40 + "\n")
-            f.write(f"测试时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"流程: 用户输入 -> TTS -> Audio处理 -> ASR -> LLM -> TTS\n\n")
-            f.write(f"1. 用户问题: {user_text}\n")
-            f.write(f"2. TTS生成语音: {audio_path}\n")
-            f.write(f"3. Opus编码大小: {len(opus_data):,} bytes\n")
-            f.write(f"4. 解码音频: {asr_audio_path}\n")
-            f.write(f"5. ASR识别结果: {recognized_text}\n")
-            f.write(f"6. ASR耗时: {asr_time:.2f}秒\n")
-            f.write(f"7. AI回答: {ai_response}\n")
-            f.write(f"8. 回答语音: {tts_result}\n")
-        
-        # 文件已直接生成到正确位置，无需复制
+        report = "\n".join([
+            "AI Server 综合演示报告",
+            "=" * 40,
+            f"测试时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+            "流程: 用户输入 -> TTS -> Audio处理 -> ASR -> LLM -> TTS",
+            "",
+            f"1. 用户问题: {user_text}",
+            f"2. TTS生成语音: {artifacts.path_of('user_question.mp3')}",
+            f"3. Opus编码大小: {len(opus_data):,} bytes",
+            f"4. 解码音频: {len(asr_samples) / uplink.sample_rate:.1f}秒",
+            f"5. ASR识别结果: {recognized_text}",
+            f"6. ASR耗时: {asr_time:.2f}秒",
+            f"7. AI回答: {ai_response}",
+            f"8. 回答语音: {artifacts.path_of('ai_response.mp3')}",
+            "",
+        ])
+        demo_report_file = artifacts.path_of("demo_report.txt")
+        artifacts.save("demo_report.txt", report)
+        
+        # 等待后台写完留档文件
+        artifacts.close()
         
         print("\n🎉 综合演示完成!")
         print(f"📄 演示报告已保存到: {demo_report_file}")
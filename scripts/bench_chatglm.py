@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""ChatGLM 并发/缓存压测 - 默认对接进程内的离线模拟服务
+
+用法:
+    python scripts/bench_chatglm.py --requests 500 --concurrency 100
+    python scripts/bench_chatglm.py --stream --hot-ratio 0.8 --cache
+    python scripts/bench_chatglm.py --base-url http://127.0.0.1:8765/api/paas/v4
+
+不指定 --base-url 时在进程内启动 scripts/mock_llm_server.py，结果可在离线机器上复现
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import statistics
+from typing import List, Optional
+
+# 添加项目根目录到路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from mock_llm_server import MockConfig, start_mock_server, base_url_of  # noqa: E402
+
+# 热门问题，按 --hot-ratio 比例重复出现以测试缓存与请求合并
+HOT_PROMPTS = ["你好", "现在几点", "今天天气怎么样", "讲个笑话", "明天早上七点叫我"]
+
+
+def _percentile(samples: List[float], p: float) -> Optional[float]:
+    if not samples:
+        return None
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(round(p / 100.0 * (len(samples) - 1))))]
+
+
+def _build_prompts(count: int, hot_ratio: float, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    prompts = []
+    for i in range(count):
+        if rng.random() < hot_ratio:
+            prompts.append(rng.choice(HOT_PROMPTS))
+        else:
+            prompts.append(f"第{i}个独立问题：请简单回答")
+    return prompts
+
+
+async def run_benchmark(args) -> bool:
+    """执行压测并打印报告"""
+    from ai_core.llm.async_chatglm import AsyncChatGLM
+    from ai_core.llm.cache import ResponseCache
+
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        server = start_mock_server(MockConfig(
+            ttft=args.ttft, tokens_per_second=args.tps, error_rate=args.error_rate, seed=args.seed
+        ))
+        base_url = base_url_of(server)
+
+    client = AsyncChatGLM(
+        api_key=os.getenv('ZHIPU_API_KEY') or "mock.key",
+        base_url=base_url,
+        max_concurrency=args.concurrency,
+        cache=ResponseCache(max_entries=4096, ttl=600) if args.cache else None,
+        coalesce=not args.no_coalesce,
+    )
+    if not args.cache:
+        client.cache = None
+
+    prompts = _build_prompts(args.requests, args.hot_ratio, args.seed)
+    latencies: List[float] = []
+    first_token: List[float] = []
+    errors: List[str] = []
+    gate = asyncio.Semaphore(args.concurrency)
+
+    async def one(prompt: str):
+        async with gate:
+            start = time.perf_counter()
+            try:
+                if args.stream:
+                    got_first = False
+                    async for _ in client.stream_response(prompt, temperature=0.1):
+                        if not got_first:
+                            first_token.append(time.perf_counter() - start)
+                            got_first = True
+                else:
+                    await client.generate_response(prompt, temperature=0.1)
+                latencies.append(time.perf_counter() - start)
+            except Exception as e:
+                errors.append(str(e))
+
+    print(f"🚀 ChatGLM 压测: {args.requests} 请求, 并发 {args.concurrency}, "
+          f"{'流式' if args.stream else '非流式'}, 热门问题占比 {args.hot_ratio:.0%}")
+    print(f"   目标: {base_url}")
+    started = time.perf_counter()
+    await asyncio.gather(*(one(p) for p in prompts))
+    elapsed = time.perf_counter() - started
+    stats = client.get_pool_stats()
+    await client.aclose()
+
+    print("=" * 60)
+    print(f"⏱️  总耗时: {elapsed:.2f}s, 吞吐: {len(latencies) / elapsed:.1f} req/s")
+    if latencies:
+        print(f"   延迟 p50/p95/p99: {_percentile(latencies, 50) * 1000:.0f} / "
+              f"{_percentile(latencies, 95) * 1000:.0f} / {_percentile(latencies, 99) * 1000:.0f} ms"
+              f" (平均 {statistics.mean(latencies) * 1000:.0f} ms)")
+    if first_token:
+        print(f"   首包 p50/p95: {_percentile(first_token, 50) * 1000:.0f} / "
+              f"{_percentile(first_token, 95) * 1000:.0f} ms")
+    print(f"❌ 失败: {len(errors)}" + (f" (示例: {errors[0]})" if errors else ""))
+    if stats.get("cache"):
+        cache = stats["cache"]
+        print(f"💾 缓存命中率: {cache['hit_rate']:.1%} ({cache['hits']}/{cache['hits'] + cache['misses']})")
+    if stats.get("coalesce"):
+        print(f"🔗 请求合并: {stats['coalesce']['coalesced']} 次")
+    resilience = stats["resilience"]
+    print(f"🛡️  对冲 {resilience['hedges']} 次(胜出 {resilience['hedge_wins']}), 重试 {resilience['retries']} 次")
+    if server is not None:
+        print(f"🧪 上游实际请求: {server.RequestHandlerClass.config.stats['requests']}")
+        server.shutdown()
+    return not errors or args.error_rate > 0
+
+
+def main() -> bool:
+    parser = argparse.ArgumentParser(description="ChatGLM 并发/缓存压测")
+    parser.add_argument("--base-url", help="LLM服务地址，不指定时启动进程内模拟服务")
+    parser.add_argument("--requests", type=int, default=200, help="请求总数")
+    parser.add_argument("--concurrency", type=int, default=50, help="并发数")
+    parser.add_argument("--stream", action="store_true", help="使用流式接口")
+    parser.add_argument("--hot-ratio", type=float, default=0.5, help="热门问题占比(0-1)")
+    parser.add_argument("--cache", action="store_true", help="启用回复缓存")
+    parser.add_argument("--no-coalesce", action="store_true", help="关闭请求合并")
+    parser.add_argument("--ttft", type=float, default=0.3, help="模拟服务首包延迟(秒)")
+    parser.add_argument("--tps", type=float, default=40.0, help="模拟服务生成速度(token/秒)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="模拟服务错误率(0-1)")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    args = parser.parse_args()
+    return asyncio.run(run_benchmark(args))
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""启动耗时基准测试 - 基于 python -X importtime
+
+在全新的解释器进程中冷导入各模块，统计累计导入耗时：
+- 任一模块超过预算时返回非零退出码
+- 检查不应在导入阶段加载的重量级依赖(torch/funasr/zai/edge_tts)
+
+用法:
+    python scripts/bench_startup.py
+    python scripts/bench_startup.py --budget-ms 100 --repeat 5
+    python scripts/bench_startup.py ai_core.llm ai_core.tts
+
+预算也可通过环境变量 STARTUP_IMPORT_BUDGET_MS 配置
+"""
+
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+from typing import Dict, List, Optional, Tuple
+
+# 项目根目录
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 默认测试的模块
+DEFAULT_TARGETS = [
+    'ai_core',
+    'ai_core.asr',
+    'ai_core.audio',
+    'ai_core.llm',
+    'ai_core.tts',
+    'ai_core.pipeline',
+    'ai_core.server',
+    'ai_core.audio.audio',
+    'ai_core.asr.funasr_wrapper',
+    'ai_core.llm.chatglm',
+    'ai_core.tts.edge',
+    'ai_core.pipeline.voice',
+    'ai_core.server.device',
+]
+
+# 导入阶段禁止加载的重量级依赖
+HEAVY_MODULES = ('torch', 'funasr', 'zai', 'edge_tts', 'pydub')
+
+
+def _parse_importtime(stderr: str) -> Dict[str, Tuple[int, int]]:
+    """
+    解析 -X importtime 输出
+
+    Args:
+        stderr: 子进程的标准错误输出
+
+    Returns:
+        Dict[str, Tuple[int, int]]: 模块名 -> (自身耗时us, 累计耗时us)
+    """
+    result = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3:
+            continue
+        try:
+            self_us = int(parts[0].strip())
+            cumulative_us = int(parts[1].strip())
+        except ValueError:
+            # 表头行
+            continue
+        name = parts[2].strip()
+        result[name] = (self_us, cumulative_us)
+    return result
+
+
+def measure_import(module: str) -> Tuple[Optional[float], List[str], str]:
+    """
+    在全新进程中冷导入模块并测量耗时
+
+    Args:
+        module: 要导入的模块名
+
+    Returns:
+        Tuple: (累计耗时ms，导入失败时为None, 被加载的重量级依赖, 错误信息)
+    """
+    cmd = [sys.executable, '-X', 'importtime', '-c', f'import {module}']
+    env = dict(os.environ)
+    env['PYTHONDONTWRITEBYTECODE'] = '1'
+    proc = subprocess.run(cmd, capture_output=True, text=True, cwd=PROJECT_ROOT, env=env)
+
+    timings = _parse_importtime(proc.stderr)
+    if proc.returncode != 0 or module not in timings:
+        error_lines = [l for l in proc.stderr.splitlines() if not l.startswith('import time:')]
+        return None, [], error_lines[-1] if error_lines else f"退出码 {proc.returncode}"
+
+    heavy = sorted({name.split('.')[0] for name in timings if name.split('.')[0] in HEAVY_MODULES})
+    return timings[module][1] / 1000.0, heavy, ""
+
+
+def main() -> bool:
+    """运行启动耗时基准测试"""
+    parser = argparse.ArgumentParser(description="AI Server 冷启动导入耗时基准")
+    parser.add_argument('targets', nargs='*', default=DEFAULT_TARGETS, help="要测试的模块")
+    parser.add_argument('--budget-ms', type=float,
+                        default=float(os.getenv('STARTUP_IMPORT_BUDGET_MS', '150')),
+                        help="单个模块累计导入耗时预算(ms)")
+    parser.add_argument('--repeat', type=int, default=3, help="每个模块重复测量次数，取中位数")
+    args = parser.parse_args()
+
+    print(f"⏱️  冷导入基准 (预算 {args.budget_ms:.0f}ms，重复 {args.repeat} 次)")
+    print("=" * 60)
+
+    passed = True
+    for module in args.targets:
+        samples = []
+        heavy = []
+        error = ""
+        for _ in range(max(1, args.repeat)):
+            elapsed_ms, heavy, error = measure_import(module)
+            if elapsed_ms is None:
+                break
+            samples.append(elapsed_ms)
+
+        if not samples:
+            print(f"❌ {module:<32} 导入失败: {error}")
+            passed = False
+            continue
+
+        median_ms = statistics.median(samples)
+        over_budget = median_ms > args.budget_ms
+        status = "❌" if over_budget or heavy else "✅"
+        line = f"{status} {module:<32} {median_ms:8.1f}ms"
+        if heavy:
+            line += f"  (导入时加载了重量级依赖: {', '.join(heavy)})"
+        print(line)
+
+        if over_budget or heavy:
+            passed = False
+
+    print("=" * 60)
+    print("✅ 启动耗时在预算内" if passed else "❌ 启动耗时超出预算")
+    return passed
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
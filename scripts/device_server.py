@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""设备接入服务入口 - 每台设备一个会话，上行Opus语音 → ASR → LLM → TTS → 下行Opus
+
+用法:
+    python scripts/device_server.py --port 8900 --max-connections 256
+    ZHIPU_BASE_URL=http://127.0.0.1:8765/api/paas/v4 python scripts/device_server.py
+
+帧格式: 1字节类型 + 4字节大端长度 + 负载，见 ai_core/server/protocol.py。
+Ctrl+C / SIGTERM 时停止接受新连接，进行中的对话处理完后退出
+"""
+
+import os
+import sys
+import signal
+import asyncio
+import argparse
+
+# 添加项目根目录到路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from dotenv import load_dotenv  # noqa: E402
+
+load_dotenv()
+
+
+async def serve(args) -> int:
+    from ai_core.llm.chatglm import ChatGLM
+    from ai_core.pipeline.voice import VoicePipeline
+    from ai_core.pipeline.admission import AdmissionController
+    from ai_core.server.device import DeviceServer, ServerConfig
+
+    api_key = os.getenv('ZHIPU_API_KEY')
+    if not api_key:
+        print("❌ 未配置ZHIPU_API_KEY环境变量")
+        return 1
+
+    pipeline = VoicePipeline(ChatGLM.get_instance(api_key), preset=args.preset,
+                             tts_parallelism=args.tts_parallelism,
+                             admission=None if args.no_admission else AdmissionController.get_default())
+    config = ServerConfig(host=args.host, port=args.port, max_connections=args.max_connections)
+    server = DeviceServer(pipeline, config)
+    await server.start()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            # Windows 不支持 add_signal_handler，Ctrl+C 以 KeyboardInterrupt 形式到达
+            pass
+    try:
+        await stop.wait()
+    finally:
+        await server.shutdown()
+        print(f"📊 统计: {server.get_stats()}")
+    return 0
+
+
+def main():
+    """启动设备接入服务"""
+    parser = argparse.ArgumentParser(description="AI Server 设备接入服务")
+    parser.add_argument("--host", help="监听地址(默认 SERVER_HOST 或 0.0.0.0)")
+    parser.add_argument("--port", type=int, help="监听端口(默认 SERVER_PORT 或 8900)")
+    parser.add_argument("--max-connections", type=int, help="最大同时连接数(默认 SERVER_MAX_CONNECTIONS 或 256)")
+    parser.add_argument("--preset", default="low_latency", help="下行Opus预设")
+    parser.add_argument("--tts-parallelism", type=int, default=2, help="每轮对话同时合成的最大句数")
+    parser.add_argument("--no-admission", action="store_true",
+                        help="关闭ASR/LLM/TTS准入控制(容量见 ADMISSION_* 环境变量)")
+    args = parser.parse_args()
+    try:
+        return asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
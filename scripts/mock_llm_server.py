@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""离线 OpenAI 兼容 LLM 模拟服务 - 用于 ChatGLM 压测
+
+实现 ZhipuAiClient / AsyncChatGLM 使用的 chat/completions 协议(含SSE流式)，
+可配置首包延迟、生成速度、错误率和回复语料，无需调用付费API即可压测并发与缓存
+
+用法:
+    python scripts/mock_llm_server.py --port 8765 --ttft 0.3 --tps 40 --error-rate 0.05
+    ZHIPU_BASE_URL=http://127.0.0.1:8765/api/paas/v4 python run.py
+
+语料文件为每行一条回复的文本文件，按用户消息哈希确定性地选取
+"""
+
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import hashlib
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, List, Optional
+
+DEFAULT_CORPUS = [
+    "你好！我是AI助手，有什么可以帮你的吗？",
+    "现在是下午三点。还有什么需要帮忙的吗？",
+    "今天天气晴朗，气温二十度左右，适合出门散步。",
+    "人工智能是让机器模拟人类智能的技术，包括学习、推理和感知等能力。它已经广泛应用于语音识别、图像处理和自然语言理解等领域。",
+    "好的，已经为你设置了明天早上七点的闹钟。",
+]
+
+# 简单分词：中日韩单字、英文单词、空白、标点各算一个token
+_TOKEN_PATTERN = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]|\w+|\s+|[^\w\s]")
+
+
+def tokenize(text: str) -> List[str]:
+    """将文本切分为模拟token"""
+    return _TOKEN_PATTERN.findall(text)
+
+
+class MockConfig:
+    """模拟服务配置"""
+
+    def __init__(self,
+                 ttft: float = 0.3,
+                 tokens_per_second: float = 40.0,
+                 error_rate: float = 0.0,
+                 error_status: int = 503,
+                 corpus: Optional[List[str]] = None,
+                 seed: int = 0,
+                 model: str = "glm-4.5"):
+        """
+        Args:
+            ttft: 首token延迟(秒)
+            tokens_per_second: 生成速度(token/秒)，0表示不限速
+            error_rate: 返回错误的概率(0-1)
+            error_status: 错误时返回的HTTP状态码
+            corpus: 回复语料
+            seed: 随机种子，保证错误注入可复现
+            model: 响应中的模型名
+        """
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.corpus = corpus or DEFAULT_CORPUS
+        self.model = model
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "streams": 0, "errors": 0, "tokens": 0}
+
+    def should_fail(self) -> bool:
+        with self._lock:
+            return self._rng.random() < self.error_rate
+
+    def bump(self, name: str, amount: int = 1):
+        with self._lock:
+            self.stats[name] += amount
+
+    def pick_response(self, messages: List[Dict]) -> str:
+        """按最后一条用户消息哈希确定性地选取回复"""
+        user_message = ""
+        for message in reversed(messages):
+            if message.get("role") == "user":
+                user_message = str(message.get("content", ""))
+                break
+        digest = hashlib.sha256(user_message.encode("utf-8")).digest()
+        return self.corpus[int.from_bytes(digest[:4], "big") % len(self.corpus)]
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    """chat/completions 请求处理"""
+
+    protocol_version = "HTTP/1.1"
+    config: MockConfig = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: Dict):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/health") or self.path == "/":
+            self._send_json(200, {"status": "ok", "stats": self.config.stats})
+        else:
+            self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        config = self.config
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+
+        length = int(self.headers.get("Content-Length", "0"))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": {"message": "invalid json"}})
+            return
+
+        config.bump("requests")
+        if config.should_fail():
+            config.bump("errors")
+            time.sleep(config.ttft / 2)
+            self._send_json(config.error_status, {"error": {"code": str(config.error_status),
+                                                            "message": "mock upstream error"}})
+            return
+
+        tokens = tokenize(config.pick_response(request.get("messages", [])))
+        max_tokens = request.get("max_tokens")
+        if max_tokens:
+            tokens = tokens[:int(max_tokens)]
+        config.bump("tokens", len(tokens))
+        interval = 1.0 / config.tokens_per_second if config.tokens_per_second > 0 else 0.0
+        completion_id = f"mock-{time.time_ns()}"
+        created = int(time.time())
+
+        if not request.get("stream"):
+            time.sleep(config.ttft + interval * max(0, len(tokens) - 1))
+            self._send_json(200, {
+                "id": completion_id,
+                "created": created,
+                "model": request.get("model", config.model),
+                "choices": [{
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": "".join(tokens)},
+                }],
+                "usage": {"prompt_tokens": 0, "completion_tokens": len(tokens),
+                          "total_tokens": len(tokens)},
+            })
+            return
+
+        config.bump("streams")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            time.sleep(config.ttft)
+            for index, token in enumerate(tokens):
+                if index:
+                    time.sleep(interval)
+                chunk = {
+                    "id": completion_id,
+                    "created": created,
+                    "model": request.get("model", config.model),
+                    "choices": [{"index": 0, "delta": {"role": "assistant", "content": token}}],
+                }
+                self._write_chunk(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+            final = {
+                "id": completion_id,
+                "created": created,
+                "model": request.get("model", config.model),
+                "choices": [{"index": 0, "finish_reason": "stop", "delta": {"role": "assistant", "content": ""}}],
+            }
+            self._write_chunk(f"data: {json.dumps(final)}\n\n".encode("utf-8"))
+            self._write_chunk(b"data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # 客户端提前断开(如取消、对冲落败)
+            pass
+
+
+class MockServer(ThreadingHTTPServer):
+    """多线程模拟服务，加大监听队列以承受高并发建连"""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def handle_error(self, request, client_address):
+        # 客户端提前断开(取消、对冲落败)属于正常情况，不打印堆栈
+        if isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            return
+        super().handle_error(request, client_address)
+
+
+def start_mock_server(config: Optional[MockConfig] = None,
+                      host: str = "127.0.0.1",
+                      port: int = 0) -> MockServer:
+    """
+    在后台线程中启动模拟服务
+
+    Args:
+        config: 服务配置
+        host: 监听地址
+        port: 监听端口，0表示随机端口
+
+    Returns:
+        MockServer: 服务对象，server.server_address 为实际地址，用 shutdown() 停止
+    """
+    handler = type("ConfiguredMockHandler", (MockHandler,), {"config": config or MockConfig()})
+    server = MockServer((host, port), handler)
+    thread = threading.Thread(target=server.serve_forever, name="mock-llm-server", daemon=True)
+    thread.start()
+    return server
+
+
+def base_url_of(server: MockServer) -> str:
+    """返回可直接用作 ZHIPU_BASE_URL 的地址"""
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}/api/paas/v4"
+
+
+def load_corpus(path: str) -> List[str]:
+    """读取语料文件，每行一条回复"""
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def main():
+    """启动模拟服务"""
+    parser = argparse.ArgumentParser(description="离线 OpenAI 兼容 LLM 模拟服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ttft", type=float, default=0.3, help="首token延迟(秒)")
+    parser.add_argument("--tps", type=float, default=40.0, help="生成速度(token/秒)，0表示不限速")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="错误概率(0-1)")
+    parser.add_argument("--error-status", type=int, default=503, help="错误时的HTTP状态码")
+    parser.add_argument("--corpus", help="语料文件路径，每行一条回复")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    args = parser.parse_args()
+
+    config = MockConfig(
+        ttft=args.ttft,
+        tokens_per_second=args.tps,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        corpus=load_corpus(args.corpus) if args.corpus else None,
+        seed=args.seed,
+    )
+    server = start_mock_server(config, args.host, args.port)
+    print(f"🧪 模拟LLM服务已启动: {base_url_of(server)}")
+    print(f"   首包延迟 {args.ttft}s, 速度 {args.tps} token/s, 错误率 {args.error_rate:.0%}")
+    print(f"💡 设置 ZHIPU_BASE_URL={base_url_of(server)} 后运行程序即可指向本服务")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(f"\n📊 统计: {config.stats}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
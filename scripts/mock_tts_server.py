@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""离线 EdgeTTS 模拟服务 - 用于连接复用与预热的联调和测试
+
+实现 edge-tts 使用的合成websocket协议(speech.config / ssml 请求，turn.start、
+audio.metadata 词边界、audio 二进制块与 turn.end 响应)，并在根路径响应预热请求。
+记录每个请求所用的客户端连接，可据此确认预热连接是否被合成复用
+
+用法:
+    python scripts/mock_tts_server.py --port 8766 --first-audio-delay 0.1
+    TTS_SYNTHESIS_URL=ws://127.0.0.1:8766 python run.py
+
+返回的音频为按字数生成的占位数据(大小与 48kbps MP3 一致)，不可播放
+"""
+
+import re
+import sys
+import json
+import time
+import html
+import uuid
+import asyncio
+import argparse
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# edge-tts 的合成路径
+SYNTHESIS_PATH = "/consumer/speech/synthesize/readaloud/edge/v1"
+
+# edge-tts 默认输出 audio-24khz-48kbitrate-mono-mp3
+_MP3_BYTES_PER_SECOND = 48000 // 8
+# 偏移与时长以100纳秒为单位
+_TICKS_PER_SECOND = 10_000_000
+
+_PROSODY_PATTERN = re.compile(r"<prosody[^>]*>(.*?)</prosody>", re.S)
+
+
+class MockTtsConfig:
+    """模拟服务配置"""
+
+    def __init__(self,
+                 first_audio_delay: float = 0.0,
+                 char_seconds: float = 0.22):
+        """
+        Args:
+            first_audio_delay: 收到合成请求到返回首个音频块的延迟(秒)
+            char_seconds: 每个字符对应的音频时长(秒)
+        """
+        self.first_audio_delay = first_audio_delay
+        self.char_seconds = char_seconds
+        self._lock = threading.Lock()
+        self.stats = {"prewarms": 0, "syntheses": 0, "audio_bytes": 0}
+        # (请求类型 "prewarm"/"synthesis", 客户端端口)，按到达顺序
+        self.requests: List[Tuple[str, int]] = []
+
+    def record(self, kind: str, client_port: int):
+        with self._lock:
+            self.requests.append((kind, client_port))
+            self.stats["prewarms" if kind == "prewarm" else "syntheses"] += 1
+
+    def bump(self, name: str, amount: int = 1):
+        with self._lock:
+            self.stats[name] += amount
+
+    def connections(self) -> int:
+        """服务端见到的客户端连接数"""
+        with self._lock:
+            return len({port for _, port in self.requests})
+
+
+def _text_message(request_id: str, path: str, body: str,
+                  content_type: str = "application/json; charset=utf-8") -> str:
+    return f"X-RequestId:{request_id}\r\nContent-Type:{content_type}\r\nPath:{path}\r\n\r\n{body}"
+
+
+def _audio_message(request_id: str, data: bytes) -> bytes:
+    # 前两字节为头部长度(大端)，随后是头部与音频数据
+    header = f"X-RequestId:{request_id}\r\nContent-Type:audio/mpeg\r\nPath:audio\r\n".encode("ascii")
+    return len(header).to_bytes(2, "big") + header + data
+
+
+def _parse_message(message: str) -> Tuple[Dict[str, str], str]:
+    head, _, body = message.partition("\r\n\r\n")
+    headers = {}
+    for line in head.split("\r\n"):
+        key, _, value = line.partition(":")
+        headers[key] = value
+    return headers, body
+
+
+def _client_port(request) -> int:
+    peer = request.transport.get_extra_info("peername") if request.transport else None
+    return peer[1] if peer else 0
+
+
+class MockTtsServer:
+    """在后台线程的事件循环中运行的 aiohttp 模拟服务"""
+
+    def __init__(self, config: MockTtsConfig, host: str, port: int):
+        self.config = config
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="mock-tts-server", daemon=True)
+        self._thread.start()
+        self._runner = None
+        self.server_address = asyncio.run_coroutine_threadsafe(self._start(host, port), self._loop).result()
+
+    async def _start(self, host: str, port: int) -> Tuple[str, int]:
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_get("/", self._prewarm)
+        app.router.add_get(SYNTHESIS_PATH, self._synthesize)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        return self._runner.addresses[0][:2]
+
+    async def _prewarm(self, request):
+        from aiohttp import web
+
+        self.config.record("prewarm", _client_port(request))
+        return web.Response(text="ok")
+
+    async def _synthesize(self, request):
+        from aiohttp import web
+
+        self.config.record("synthesis", _client_port(request))
+        websocket = web.WebSocketResponse()
+        await websocket.prepare(request)
+        async for message in websocket:
+            if message.type != web.WSMsgType.TEXT:
+                continue
+            headers, body = _parse_message(message.data)
+            if headers.get("Path") == "ssml":
+                await self._speak(websocket, headers.get("X-RequestId") or uuid.uuid4().hex, body)
+        return websocket
+
+    async def _speak(self, websocket, request_id: str, ssml: str):
+        config = self.config
+        match = _PROSODY_PATTERN.search(ssml)
+        text = html.unescape(match.group(1)) if match else ""
+        await websocket.send_str(_text_message(request_id, "turn.start", "{}"))
+        if config.first_audio_delay > 0:
+            await asyncio.sleep(config.first_audio_delay)
+
+        offset = 0
+        duration = int(config.char_seconds * _TICKS_PER_SECOND)
+        chunk = bytes(int(config.char_seconds * _MP3_BYTES_PER_SECOND))
+        for ch in text:
+            if ch.isspace():
+                continue
+            metadata = {"Metadata": [{"Type": "WordBoundary", "Data": {
+                "Offset": offset, "Duration": duration, "text": {"Text": ch}}}]}
+            await websocket.send_str(_text_message(request_id, "audio.metadata",
+                                                   json.dumps(metadata, ensure_ascii=False)))
+            await websocket.send_bytes(_audio_message(request_id, chunk))
+            config.bump("audio_bytes", len(chunk))
+            offset += duration
+        await websocket.send_str(_text_message(request_id, "turn.end", "{}"))
+
+    @property
+    def url(self) -> str:
+        """可直接用作 TTS_SYNTHESIS_URL 的地址"""
+        host, port = self.server_address
+        return f"ws://{host}:{port}"
+
+    def shutdown(self):
+        """停止服务"""
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+def start_mock_tts_server(config: Optional[MockTtsConfig] = None,
+                          host: str = "127.0.0.1",
+                          port: int = 0) -> MockTtsServer:
+    """
+    在后台线程中启动模拟服务
+
+    Args:
+        config: 服务配置
+        host: 监听地址
+        port: 监听端口，0表示随机端口
+
+    Returns:
+        MockTtsServer: 服务对象，server.url 为合成地址，用 shutdown() 停止
+    """
+    return MockTtsServer(config or MockTtsConfig(), host, port)
+
+
+def main():
+    """启动模拟服务"""
+    parser = argparse.ArgumentParser(description="离线 EdgeTTS 模拟服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--first-audio-delay", type=float, default=0.0, help="首个音频块延迟(秒)")
+    parser.add_argument("--char-seconds", type=float, default=0.22, help="每个字符的音频时长(秒)")
+    args = parser.parse_args()
+
+    config = MockTtsConfig(first_audio_delay=args.first_audio_delay, char_seconds=args.char_seconds)
+    server = start_mock_tts_server(config, args.host, args.port)
+    print(f"🧪 模拟TTS服务已启动: {server.url}")
+    print(f"💡 设置 TTS_SYNTHESIS_URL={server.url} 后运行程序即可指向本服务")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(f"\n📊 统计: {config.stats}，客户端连接 {config.connections()} 条")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
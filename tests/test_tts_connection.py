@@ -0,0 +1,88 @@
+"""EdgeTTS 连接复用：预热连接被下一次合成复用，用后在后台补充"""
+
+import os
+import sys
+import time
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiohttp")
+pytest.importorskip("edge_tts")
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "scripts"))
+
+from mock_tts_server import MockTtsConfig, start_mock_tts_server  # noqa: E402
+from ai_core.tts.connection import ConnectionManager  # noqa: E402
+from ai_core.tts.edge import EdgeTTS  # noqa: E402
+
+
+@pytest.fixture
+def server():
+    server = start_mock_tts_server(MockTtsConfig(char_seconds=0.1))
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def tts(monkeypatch, server):
+    # 关闭短语缓存，每次都经过websocket合成；代理只会绕开连接池
+    monkeypatch.setenv("TTS_CACHE_ENABLED", "false")
+    for name in ("HTTP_PROXY", "HTTPS_PROXY", "ALL_PROXY", "WSS_PROXY",
+                 "http_proxy", "https_proxy", "all_proxy", "wss_proxy"):
+        monkeypatch.delenv(name, raising=False)
+    tts = EdgeTTS()
+    tts.connections = ConnectionManager(synthesis_url=server.url, warm_connections=1, rewarm_interval=0)
+    return tts
+
+
+async def _synthesize(tts: EdgeTTS, text: str) -> bytes:
+    chunks = [chunk["data"] async for chunk in tts.stream_speech(text, word_boundaries=False)
+              if chunk["type"] == "audio"]
+    return b"".join(chunks)
+
+
+async def _wait_for(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "等待超时"
+        await asyncio.sleep(0.01)
+
+
+def test_default_endpoint_follows_synthesis_url():
+    manager = ConnectionManager(synthesis_url="wss://tts.example.com:8443", rewarm_interval=0)
+    assert manager.endpoint == "https://tts.example.com:8443/"
+    assert ConnectionManager(synthesis_url="ws://127.0.0.1:8766").endpoint == "http://127.0.0.1:8766/"
+
+
+def test_prewarmed_connection_is_reused_then_refilled(tts, server):
+    config = server.config
+
+    async def run():
+        try:
+            assert await tts.prewarm_async() == 1
+            (_, warm_port), = config.requests
+
+            audio = await _synthesize(tts, "你好")
+            assert audio
+            # 合成握手走的是预热连接，没有新建连接
+            assert config.requests[1] == ("synthesis", warm_port)
+
+            # websocket用完即关闭，后台补充一条新的预热连接
+            await _wait_for(lambda: len(config.requests) == 3)
+            kind, refill_port = config.requests[2]
+            assert kind == "prewarm" and refill_port != warm_port
+
+            # 下一次合成复用补充的连接
+            assert await _synthesize(tts, "再见")
+            await _wait_for(lambda: len(config.requests) >= 4)
+            assert config.requests[3] == ("synthesis", refill_port)
+
+            stats = tts.connections.get_stats()
+            assert stats["uses"] == 2 and stats["refills"] >= 1
+        finally:
+            await tts.connections.aclose()
+
+    asyncio.run(run())